@@ -1,12 +1,22 @@
 # 01_prepare_data.py
-import os, glob, re, json
+import os, sys, glob, re, json, hashlib, argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
-from scipy.signal import decimate
 from tqdm import tqdm
 
+# 서빙(NutPredictor)과 동일한 특징 추출 모듈 사용 (backend/ai_assets/features.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_assets.features import preprocess_signal, frame_signal, log_fft_features
+from ai_assets.shards import (
+    SHARDS_DIR, INDEX_FILE, MANIFEST_FILE, RunningStats, save_npy_atomic, build_index,
+)
+from ai_assets.registry import STATS_FILE
+from ai_assets.decimation import CASCADE_KEY
+
 RAW_DIR = r"D:\Vibe\data_raw"
-OUT_PATH = r"D:\Vibe\data_proc\dataset.npz"
+OUT_DIR = r"D:\Vibe\data_proc"             # shards/, index.npy, files.json, feature_stats.npz
+OUT_PATH = r"D:\Vibe\data_proc\dataset.npz"  # --legacy-npz 사용 시에만 생성 (기존 단일 파일 형식)
 META_PATH = r"D:\Vibe\data_proc\meta.json"
 
 # ====== 저사양 CPU 기준 추천 ======
@@ -15,6 +25,7 @@ TARGET_FS = 20_000
 WIN_SEC = 0.02   # ✅ 너가 방금 성공한 값(권장)
 HOP_SEC = 0.01
 USE_DECIMATE = True
+DECIM_CASCADE = True   # 다단 polyphase decimation (False: scipy decimate 와 같은 단일 단계)
 
 # 윈도우가 너무 많아지는 걸 막기 위한 상한(필요 없으면 None)
 MAX_WINDOWS_PER_CSV = None  # 예: 2000
@@ -28,21 +39,6 @@ def pick_two_numeric_cols(df: pd.DataFrame) -> np.ndarray:
         raise ValueError("2개 채널(숫자 컬럼)을 찾지 못했습니다.")
     return x
 
-def frame_signal(x: np.ndarray, win: int, hop: int) -> np.ndarray:
-    if x.shape[0] < win:
-        return np.empty((0, win, 2), dtype=np.float32)
-    idx = np.arange(0, x.shape[0] - win + 1, hop)
-    if idx.size == 0:
-        return np.empty((0, win, 2), dtype=np.float32)
-    frames = np.stack([x[i:i+win] for i in idx], axis=0).astype(np.float32)
-    return frames
-
-def log_fft_features(frames: np.ndarray) -> np.ndarray:
-    fft = np.fft.rfft(frames, axis=1)
-    mag = np.abs(fft).astype(np.float32)     # (B, F, 2)
-    feat = np.log1p(mag).astype(np.float32)  # 안정적 로그
-    return feat.reshape(feat.shape[0], -1)
-
 def extract_case_id(path: str) -> int:
     m = re.search(r"(?:\\|/)(Case)(\d+)(?:\\|/)", path)
     if not m:
@@ -52,8 +48,92 @@ def extract_case_id(path: str) -> int:
         raise ValueError(f"Case 번호를 추출할 수 없습니다: {path}")
     return int(m.group(2) if m.lastindex >= 2 else m.group(1)) - 1
 
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+def process_csv(path: str, params: dict, shard_dir: str, cached: dict = None) -> dict:
+    """
+    (워커 프로세스) CSV 1개 -> shard 1개.
+    크기/수정 시각이 같거나 내용 해시가 같고 shard 가 남아 있으면 다시 계산하지 않습니다.
+    특징은 shard 파일로 바로 쓰고, 메인 프로세스에는 통계(n, mean, m2)만 돌려줍니다.
+    """
+    st = os.stat(path)
+    entry = {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    try:
+        if cached and os.path.exists(os.path.join(shard_dir, cached["shard"])):
+            if cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+                return {**cached, **entry, "status": "cached"}
+        sha = file_sha256(path)
+        if cached and cached["sha256"] == sha and os.path.exists(os.path.join(shard_dir, cached["shard"])):
+            return {**cached, **entry, "status": "cached"}
+
+        cid = extract_case_id(path)
+        df = pd.read_csv(path)
+        x = pick_two_numeric_cols(df)  # (N,2)
+
+        # decimate + 평균 제거 (채널별)
+        x = preprocess_signal(x, params["decim"] if USE_DECIMATE else 1, params["decim_cascade"])
+
+        frames = frame_signal(x, params["win"], params["hop"])  # (B,win,2) strided view
+        if frames.shape[0] == 0:
+            return {**entry, "status": "skipped", "reason": "too_short_after_decimate"}
+
+        if MAX_WINDOWS_PER_CSV is not None and frames.shape[0] > MAX_WINDOWS_PER_CSV:
+            frames = frames[:MAX_WINDOWS_PER_CSV]
+
+        feats = log_fft_features(frames)  # (B,D) float32
+
+        shard = f"{sha[:20]}.npy"
+        save_npy_atomic(os.path.join(shard_dir, shard), feats)
+        return {
+            **entry, "status": "processed",
+            "sha256": sha, "shard": shard, "case_id": cid,
+            "n_windows": int(feats.shape[0]),
+            "stats": RunningStats.of(feats).to_dict(),
+        }
+    except Exception as e:
+        return {**entry, "status": "skipped", "reason": str(e)}
+
+def load_manifest(out_dir: str, params: dict) -> dict:
+    """이전 실행의 파일 목록 {path: entry} (전처리 파라미터가 바뀌었으면 빈 dict)"""
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("params") != params:
+        print("전처리 파라미터가 바뀌어 모든 CSV 를 다시 처리합니다.")
+        return {}
+    return {e["path"]: e for e in manifest.get("files", [])}
+
+def write_legacy_npz(out_dir: str, files: list, mean, std, params: dict):
+    """기존 단일 dataset.npz 형식 (정규화된 X 전체를 메모리에 올림)"""
+    shard_dir = os.path.join(out_dir, SHARDS_DIR)
+    X = np.concatenate([np.load(os.path.join(shard_dir, e["shard"])) for e in files], axis=0)
+    Xn = ((X - mean) / std).astype(np.float32)
+    np.savez_compressed(
+        OUT_PATH,
+        X=Xn, mean=mean, std=std,
+        case_id=np.concatenate([np.full(e["n_windows"], e["case_id"], dtype=np.int32) for e in files]),
+        csv_path=np.concatenate([np.array([e["path"]] * e["n_windows"], dtype=object) for e in files]),
+        fs=np.int32(params["fs"]), win=np.int32(params["win"]), hop=np.int32(params["hop"]),
+        decim=np.int32(params["decim"]), **{CASCADE_KEY: np.int32(params["decim_cascade"])},
+    )
+    print("Saved:", OUT_PATH)
+
 def main():
-    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--force", action="store_true", help="이전 결과를 무시하고 모든 CSV 를 다시 처리")
+    ap.add_argument("--legacy-npz", action="store_true", help="기존 dataset.npz 도 함께 생성")
+    args = ap.parse_args()
+
+    shard_dir = os.path.join(OUT_DIR, SHARDS_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
 
     csv_files = sorted(glob.glob(os.path.join(RAW_DIR, "Case*", "*.csv")))
     if not csv_files:
@@ -63,65 +143,67 @@ def main():
     fs = int(round(ORIG_FS / decim)) if USE_DECIMATE else ORIG_FS
     win = int(round(WIN_SEC * fs))
     hop = int(round(HOP_SEC * fs))
-
-    X_list, case_list, path_list = [], [], []
-    skipped = []
-
-    for path in tqdm(csv_files, desc="Processing CSV"):
-        try:
-            df = pd.read_csv(path)
-            x = pick_two_numeric_cols(df)  # (N,2)
-
-            if USE_DECIMATE and decim > 1:
-                x0 = decimate(x[:, 0], decim, ftype="fir", zero_phase=True).astype(np.float32)
-                x1 = decimate(x[:, 1], decim, ftype="fir", zero_phase=True).astype(np.float32)
-                x = np.stack([x0, x1], axis=1)
-
-            x = x - x.mean(axis=0, keepdims=True)
-
-            frames = frame_signal(x, win, hop)
-            if frames.shape[0] == 0:
-                skipped.append({"path": path, "reason": "too_short_after_decimate"})
-                continue
-
-            if MAX_WINDOWS_PER_CSV is not None and frames.shape[0] > MAX_WINDOWS_PER_CSV:
-                frames = frames[:MAX_WINDOWS_PER_CSV]
-
-            feats = log_fft_features(frames)  # (B,D)
-
-            cid = extract_case_id(path)
-            X_list.append(feats)
-            case_list.append(np.full((feats.shape[0],), cid, dtype=np.int32))
-            path_list.append(np.array([path] * feats.shape[0], dtype=object))
-
-        except Exception as e:
-            skipped.append({"path": path, "reason": str(e)})
-
-    if not X_list:
+    params = {"fs": fs, "win": win, "hop": hop, "decim": decim, "decim_cascade": DECIM_CASCADE,
+              "use_decimate": USE_DECIMATE, "max_windows_per_csv": MAX_WINDOWS_PER_CSV}
+
+    previous = {} if args.force else load_manifest(OUT_DIR, params)
+
+    # CSV 를 프로세스 풀로 분배 (각 워커가 shard 를 직접 저장)
+    results = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(process_csv, p, params, shard_dir, previous.get(p)): p for p in csv_files}
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="Processing CSV"):
+            results[futures[fut]] = fut.result()
+
+    # 파일 순서(정렬된 경로)대로 인덱스 / 통계 병합 -> 실행마다 같은 결과
+    files, skipped = [], []
+    total = RunningStats()
+    for path in csv_files:
+        r = results[path]
+        if r["status"] == "skipped":
+            skipped.append({"path": path, "reason": r["reason"]})
+            continue
+        r["file_id"] = len(files)
+        files.append(r)
+        total.merge(RunningStats.from_dict(r["stats"]))
+
+    if not files:
         raise SystemExit("유효한 윈도우가 0개입니다. WIN_SEC/TARGET_FS를 조정하세요.")
 
-    X = np.concatenate(X_list, axis=0).astype(np.float32)
-    case_id = np.concatenate(case_list, axis=0)
-    csv_path = np.concatenate(path_list, axis=0)
+    mean = total.mean.astype(np.float32)[None, :]
+    std = (total.std + 1e-8).astype(np.float32)[None, :]
 
-    mean = X.mean(axis=0, keepdims=True).astype(np.float32)
-    std = (X.std(axis=0, keepdims=True) + 1e-8).astype(np.float32)
-    Xn = ((X - mean) / std).astype(np.float32)
-
-    np.savez_compressed(
-        OUT_PATH,
-        X=Xn, mean=mean, std=std,
-        case_id=case_id,
-        csv_path=csv_path,
-        fs=np.int32(fs), win=np.int32(win), hop=np.int32(hop),
-        decim=np.int32(decim),
+    index = build_index([(e["case_id"], e["n_windows"]) for e in files])
+    save_npy_atomic(os.path.join(OUT_DIR, INDEX_FILE), index)
+    np.savez(
+        os.path.join(OUT_DIR, STATS_FILE),
+        mean=mean, std=std, n=np.int64(total.n),
+        fs=np.int32(fs), win=np.int32(win), hop=np.int32(hop), decim=np.int32(decim),
+        **{CASCADE_KEY: np.int32(DECIM_CASCADE)},
     )
-
+    manifest_path = os.path.join(OUT_DIR, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"params": params, "files": [{k: v for k, v in e.items() if k != "status"} for e in files]},
+                  f, ensure_ascii=False)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # 더 이상 참조되지 않는 shard 정리
+    live = {e["shard"] for e in files}
+    for name in os.listdir(shard_dir):
+        if name.endswith(".npy") and name not in live:
+            os.remove(os.path.join(shard_dir, name))
+
+    if args.legacy_npz:
+        write_legacy_npz(OUT_DIR, files, mean, std, params)
+
+    case_id = index["case_id"]
     meta = {
         "raw_dir": RAW_DIR,
         "num_csv_files_found": len(csv_files),
-        "num_windows_total": int(Xn.shape[0]),
-        "feature_dim": int(Xn.shape[1]),
+        "num_csv_processed": sum(r["status"] == "processed" for r in results.values()),
+        "num_csv_cached": sum(r["status"] == "cached" for r in results.values()),
+        "num_windows_total": int(total.n),
+        "feature_dim": int(mean.shape[1]),
         "fs_after": int(fs),
         "win_samples": int(win),
         "hop_samples": int(hop),
@@ -131,9 +213,10 @@ def main():
     with open(META_PATH, "w", encoding="utf-8") as f:
         json.dump(meta, f, ensure_ascii=False, indent=2)
 
-    print("Saved:", OUT_PATH)
+    print("Saved:", OUT_DIR)
     print("Meta :", META_PATH)
-    print("Total windows:", Xn.shape[0])
+    print(f"Processed: {meta['num_csv_processed']} | Cached: {meta['num_csv_cached']} | Skipped: {len(skipped)}")
+    print("Total windows:", total.n)
     print("Cases:", np.unique(case_id))
 
 if __name__ == "__main__":
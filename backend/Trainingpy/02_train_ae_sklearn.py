@@ -1,9 +1,14 @@
 # 02_train_ae_sklearn.py
-import os, json
+import os, sys, json, argparse
 import numpy as np
 from sklearn.neural_network import MLPRegressor
 
-NPZ = r"D:\Vibe\data_proc\dataset.npz"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_assets.shards import ShardDataset
+from ai_assets.ae_engine import AEEngine
+from ai_assets.streaming import BUFFER_WINDOWS, new_regressor, fit_streaming, evaluate_streaming
+
+DATA_DIR = r"D:\Vibe\data_proc"  # 01_prepare_data.py 출력 (shards/, index.npy, feature_stats.npz)
 MODEL_OUT = r"D:\Vibe\models\ae_sklearn.npz"
 THR_OUT = r"D:\Vibe\models\threshold.json"
 
@@ -13,15 +18,9 @@ HIDDEN = (64, 16, 64)  # 가벼운 AE
 MAX_ITER = 500
 RANDOM_STATE = 42
 
-def main():
-    os.makedirs(os.path.dirname(MODEL_OUT), exist_ok=True)
-
-    data = np.load(NPZ, allow_pickle=True)
-    X = data["X"].astype(np.float32)
-    case_id = data["case_id"].astype(np.int32)
-
-    mask = np.isin(case_id, np.array(TRAIN_CASES, dtype=np.int32))
-    X_train = X[mask]
+def train_in_memory(ds):
+    """정상 case 의 shard 를 모두 메모리에 올려 fit"""
+    X_train = ds.load(case_ids=TRAIN_CASES)
     if len(X_train) < 5:
         raise SystemExit("정상 학습 데이터가 너무 적습니다.")
 
@@ -40,8 +39,45 @@ def main():
     # 정상 데이터 기준 재구성 오차
     recon = ae.predict(X_train)
     err = np.mean((recon - X_train) ** 2, axis=1)
+    return ae, {"threshold_method": "p99(train_recon_error)",
+                "threshold": float(np.percentile(err, 99)),
+                "train_err_mean": float(err.mean()),
+                "train_err_p95": float(np.percentile(err, 95)),
+                "train_err_p99": float(np.percentile(err, 99))}
+
+def train_streaming(ds, buffer_windows):
+    """shard 를 mmap 으로 열어 섞은 블록 단위로 학습 (메모리 사용량은 buffer_windows 로 제한)"""
+    paths = ds.shard_paths(TRAIN_CASES)
+    if ds.select(TRAIN_CASES)["count"].sum() < 5:
+        raise SystemExit("정상 학습 데이터가 너무 적습니다.")
+
+    ae = new_regressor(HIDDEN, random_state=RANDOM_STATE)
+    print(f"Training sklearn AutoEncoder (streaming, {len(paths)} shards, buffer {buffer_windows})...")
+    fit_streaming(ae, paths, ds.mean, ds.std, MAX_ITER, buffer_windows=buffer_windows,
+                  random_state=RANDOM_STATE, verbose=True)
+
+    # 정상 데이터 기준 재구성 오차 분위수 (전체 오차 배열 없이 추정)
+    sketch, _ = evaluate_streaming(AEEngine(ae.coefs_, ae.intercepts_), paths, ds.mean, ds.std)
+    return ae, {"threshold_method": "p99(train_recon_error, streaming quantile)",
+                "threshold": sketch.percentile(99),
+                "train_err_mean": sketch.mean,
+                "train_err_p95": sketch.percentile(95),
+                "train_err_p99": sketch.percentile(99)}
+
+def main():
+    ap = argparse.ArgumentParser(description="sklearn AutoEncoder 학습")
+    ap.add_argument("--streaming", action="store_true", help="shard 를 mmap mini-batch 로 학습 (데이터가 메모리보다 클 때)")
+    ap.add_argument("--buffer-windows", type=int, default=BUFFER_WINDOWS, help="streaming 셔플 버퍼 크기")
+    args = ap.parse_args()
+
+    os.makedirs(os.path.dirname(MODEL_OUT), exist_ok=True)
 
-    threshold = float(np.percentile(err, 99))
+    ds = ShardDataset(DATA_DIR)
+    if args.streaming:
+        ae, stats = train_streaming(ds, args.buffer_windows)
+    else:
+        ae, stats = train_in_memory(ds)
+    threshold = stats["threshold"]
 
     np.savez(
         MODEL_OUT,
@@ -53,11 +89,7 @@ def main():
     with open(THR_OUT, "w", encoding="utf-8") as f:
         json.dump({
             "train_cases": TRAIN_CASES,
-            "threshold_method": "p99(train_recon_error)",
-            "threshold": threshold,
-            "train_err_mean": float(err.mean()),
-            "train_err_p95": float(np.percentile(err, 95)),
-            "train_err_p99": threshold
+            **stats
         }, f, ensure_ascii=False, indent=2)
 
     print("Saved model:", MODEL_OUT)
@@ -1,8 +1,11 @@
 # 03_score_sklearn.py
-import os, csv, json
+import os, sys, csv, json
 import numpy as np
 
-NPZ = r"D:\Vibe\data_proc\dataset.npz"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_assets.shards import ShardDataset
+
+DATA_DIR = r"D:\Vibe\data_proc"  # 01_prepare_data.py 출력 (shards/, index.npy, feature_stats.npz)
 MODEL = r"D:\Vibe\models\ae_sklearn.npz"
 THR = r"D:\Vibe\models\threshold.json"
 OUT_CASE = r"D:\Vibe\models\scores_by_case.csv"
@@ -14,9 +17,7 @@ def mlp_predict(X, coefs, intercepts):
     return h @ coefs[-1] + intercepts[-1]
 
 def main():
-    data = np.load(NPZ, allow_pickle=True)
-    X = data["X"].astype(np.float32)
-    case_id = data["case_id"].astype(np.int32)
+    ds = ShardDataset(DATA_DIR)
 
     mdl = np.load(MODEL, allow_pickle=True)
     coefs = mdl["coefs"]
@@ -25,8 +26,13 @@ def main():
     with open(THR, "r", encoding="utf-8") as f:
         thr = json.load(f)["threshold"]
 
-    recon = mlp_predict(X, coefs, intercepts)
-    err = np.mean((recon - X) ** 2, axis=1)
+    # 파일(shard) 단위로 오차 계산 -> 전체 X 를 한 번에 올리지 않음
+    err_list = []
+    for _, X in ds.iter_files():
+        recon = mlp_predict(X, coefs, intercepts)
+        err_list.append(np.mean((recon - X) ** 2, axis=1))
+    err = np.concatenate(err_list)
+    case_id = ds.window_case_ids()
 
     rows = []
     for cid in sorted(np.unique(case_id)):
@@ -1,12 +1,20 @@
-import os, json
+import os, sys, json, time, argparse
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sklearn.neural_network import MLPRegressor
+from threadpoolctl import threadpool_limits
 
 # ===== 경로 설정 (현재 파일 위치 기준 상대 경로) =====
 CUR_DIR = Path(__file__).resolve().parent
 BASE_DATA_DIR = CUR_DIR / "data_proc_rpm"  # ai_assets/data_proc_rpm 
 BASE_MODEL_DIR = CUR_DIR / "RPM_model"     # ai_assets/RPM_model 
+SUMMARY_OUT = BASE_MODEL_DIR / "train_summary.json"
+
+# 서빙용 아티팩트 형식 (ai_assets/artifact.py)
+sys.path.insert(0, str(CUR_DIR.parent))
+from ai_assets.artifact import ARTIFACT_FILE, save_artifact
+from ai_assets.decimation import uses_cascade
 
 RPM_LIST = ["800", "1000", "1200"]
 TRAIN_CASES = [0]
@@ -14,8 +22,13 @@ HIDDEN = (64, 16, 64)
 MAX_ITER = 500
 RANDOM_STATE = 42
 
-def train_one_rpm(rpm: str):
+def train_one_rpm(rpm: str, blas_threads=None, verbose=True):
+    """
+    RPM 하나를 학습하고 요약(dict)을 반환합니다.
+    blas_threads: 이 작업이 사용할 BLAS/OpenMP 스레드 수 (None 이면 제한 없음)
+    """
     print(f"\n===== Training RPM {rpm} =====")
+    t_start = time.perf_counter()
 
     # 데이터 로드 경로: data_proc_rpm/{rpm}/dataset.npz 
     NPZ = BASE_DATA_DIR / rpm / "dataset.npz"
@@ -25,45 +38,48 @@ def train_one_rpm(rpm: str):
     MODEL_OUT = OUT_DIR / "ae_sklearn.npz"
     THR_OUT = OUT_DIR / "threshold.json"
     ERR_OUT = OUT_DIR / "ae_errors.npy"
+    ARTIFACT_OUT = OUT_DIR / ARTIFACT_FILE
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 데이터 로드
-    data = np.load(str(NPZ), allow_pickle=True)
-    X = data["X"].astype(np.float32)
-
-    # ===== 데이터 로드 =====
-    data = np.load(NPZ, allow_pickle=True)
-    X = data["X"].astype(np.float32)
-    case_id = data["case_id"].astype(np.int32)
+    # ===== 데이터 로드 (1회) =====
+    with np.load(NPZ, allow_pickle=True) as data:
+        X = data["X"].astype(np.float32)
+        case_id = data["case_id"].astype(np.int32)
+        stats = {k: data[k] for k in ("mean", "std", "win", "hop", "decim")}
+        fs = int(data["fs"]) if "fs" in data.files else 0
+        cascade = uses_cascade(data)
 
     mask = np.isin(case_id, np.array(TRAIN_CASES, dtype=np.int32))
     X_train = X[mask]
 
     if len(X_train) < 5:
         raise SystemExit(f"[RPM {rpm}] 정상 학습 데이터가 너무 적습니다.")
-
-    # ===== AE 학습 =====
-    ae = MLPRegressor(
-        hidden_layer_sizes=HIDDEN,
-        activation="relu",
-        solver="adam",
-        max_iter=MAX_ITER,
-        random_state=RANDOM_STATE,
-        verbose=True
-    )
-
-    ae.fit(X_train, X_train)
-
-    # ===== Threshold 계산 =====
-    recon_train = ae.predict(X_train)
-    err_train = np.mean((recon_train - X_train) ** 2, axis=1)
-    threshold = float(np.percentile(err_train, 95))
-
-    # ===== 전체 error 저장 =====
-    recon_all = ae.predict(X)
-    err_all = np.mean((recon_all - X) ** 2, axis=1)
-    np.save(ERR_OUT, err_all)
+    t_load = time.perf_counter()
+
+    with threadpool_limits(limits=blas_threads):
+        # ===== AE 학습 =====
+        ae = MLPRegressor(
+            hidden_layer_sizes=HIDDEN,
+            activation="relu",
+            solver="adam",
+            max_iter=MAX_ITER,
+            random_state=RANDOM_STATE,
+            verbose=verbose
+        )
+
+        ae.fit(X_train, X_train)
+        t_train = time.perf_counter()
+
+        # ===== Threshold 계산 =====
+        recon_train = ae.predict(X_train)
+        err_train = np.mean((recon_train - X_train) ** 2, axis=1)
+        threshold = float(np.percentile(err_train, 95))
+
+        # ===== 전체 error 저장 =====
+        recon_all = ae.predict(X)
+        err_all = np.mean((recon_all - X) ** 2, axis=1)
+        np.save(ERR_OUT, err_all)
 
     # ===== 모델 저장 =====
     np.savez(
@@ -74,23 +90,101 @@ def train_one_rpm(rpm: str):
         allow_pickle=True
     )
 
+    meta = {
+        "rpm": rpm,
+        "train_cases": TRAIN_CASES,
+        "threshold_method": "p95(train_recon_error)",
+        "threshold": threshold,
+        "train_err_mean": float(err_train.mean()),
+        "train_err_p95": float(np.percentile(err_train, 95)),
+        "train_err_p99": float(np.percentile(err_train, 99))
+    }
     with open(THR_OUT, "w", encoding="utf-8") as f:
-        json.dump({
-            "rpm": rpm,
-            "train_cases": TRAIN_CASES,
-            "threshold_method": "p95(train_recon_error)",
-            "threshold": threshold,
-            "train_err_mean": float(err_train.mean()),
-            "train_err_p95": float(np.percentile(err_train, 95)),
-            "train_err_p99": float(np.percentile(err_train, 99))
-        }, f, ensure_ascii=False, indent=2)
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # 서빙용 아티팩트 (가중치 + 정규화 통계 + 전처리 파라미터 + threshold, pickle 없음)
+    save_artifact(ARTIFACT_OUT, ae.coefs_, ae.intercepts_, stats["mean"], stats["std"],
+                  stats["win"], stats["hop"], stats["decim"], fs, cascade, threshold, rpm=rpm, meta=meta)
 
+    t_end = time.perf_counter()
     print(f"[RPM {rpm}] DONE | threshold = {threshold:.6e}")
+    return {
+        "rpm": rpm,
+        "pid": os.getpid(),
+        "blas_threads": blas_threads,
+        "n_train": int(len(X_train)),
+        "n_all": int(len(X)),
+        "n_iter": int(ae.n_iter_),
+        "final_loss": float(ae.loss_),
+        "threshold": threshold,
+        "load_sec": round(t_load - t_start, 3),
+        "train_sec": round(t_train - t_load, 3),
+        "total_sec": round(t_end - t_start, 3),
+    }
+
+
+def plan_workers(n_jobs: int, workers=None, threads=None):
+    """
+    (프로세스 수, 작업당 BLAS 스레드 수)
+    기본값은 코어를 프로세스 수로 나눠 프로세스 수 x 스레드 수 가 코어 수를 넘지 않게 합니다.
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, n_jobs))
+    threads = threads or max(1, cpus // workers)
+    return workers, threads
+
+
+def train_all(rpms, workers=None, threads=None):
+    """RPM 별 학습을 프로세스 풀에 나눠 실행하고 요약을 반환합니다."""
+    workers, threads = plan_workers(len(rpms), workers, threads)
+    # 데이터가 큰 RPM 부터 배정해 마지막에 긴 작업 하나만 남는 상황을 줄임
+    order = sorted(rpms, key=lambda r: (BASE_DATA_DIR / r / "dataset.npz").stat().st_size, reverse=True)
+    print(f"[train] {len(rpms)} RPM | workers={workers} | BLAS threads/worker={threads}")
+
+    t0 = time.perf_counter()
+    results = {}
+    if workers == 1:
+        for rpm in order:
+            results[rpm] = train_one_rpm(rpm, threads, verbose=True)
+    else:
+        # 병렬 실행 시 epoch 로그가 섞이므로 verbose 는 끔
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(train_one_rpm, rpm, threads, False): rpm for rpm in order}
+            for fut in as_completed(futures):
+                res = fut.result()
+                results[res["rpm"]] = res
+                print(f"[RPM {res['rpm']}] {res['train_sec']:.1f}s | iter={res['n_iter']} | "
+                      f"loss={res['final_loss']:.6e}")
+    wall = time.perf_counter() - t0
+
+    return {
+        "workers": workers,
+        "blas_threads_per_worker": threads,
+        "cpu_count": os.cpu_count(),
+        "wall_sec": round(wall, 3),
+        "sum_train_sec": round(sum(r["total_sec"] for r in results.values()), 3),
+        "rpms": [results[r] for r in rpms],
+    }
 
 
 def main():
-    for rpm in RPM_LIST:
-        train_one_rpm(rpm)
+    ap = argparse.ArgumentParser(description="RPM 별 AutoEncoder 학습 (프로세스 병렬)")
+    ap.add_argument("--rpm", nargs="+", default=RPM_LIST, help="학습할 RPM 목록")
+    ap.add_argument("--workers", type=int, default=None, help="동시에 학습할 RPM 수 (기본: min(RPM 수, 코어 수))")
+    ap.add_argument("--threads", type=int, default=None, help="작업당 BLAS 스레드 수 (기본: 코어 수 // workers)")
+    ap.add_argument("--summary", default=str(SUMMARY_OUT), help="학습 요약 JSON 저장 경로")
+    args = ap.parse_args()
+
+    summary = train_all(args.rpm, args.workers, args.threads)
+
+    print(f"\n{'rpm':>6}{'train s':>10}{'iter':>7}{'final loss':>14}{'threshold':>14}")
+    for r in summary["rpms"]:
+        print(f"{r['rpm']:>6}{r['train_sec']:>10.2f}{r['n_iter']:>7}{r['final_loss']:>14.6e}{r['threshold']:>14.6e}")
+    print(f"wall {summary['wall_sec']:.2f}s (sum of jobs {summary['sum_train_sec']:.2f}s)")
+
+    with open(args.summary, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"summary -> {args.summary}")
 
 
 if __name__ == "__main__":
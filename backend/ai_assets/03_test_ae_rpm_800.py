@@ -1,20 +1,25 @@
+import sys
 import json
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from scipy.signal import decimate
 from sklearn.neural_network import MLPRegressor
 
 # ================== 경로 설정 (상대 경로) ==================
 CUR_DIR = Path(__file__).resolve().parent
 
+# 학습/서빙과 동일한 특징 추출 모듈 (ai_assets/features.py)
+sys.path.insert(0, str(CUR_DIR.parent))
+from ai_assets.features import extract_features
+from ai_assets.decimation import uses_cascade
+
 # 테스트용 CSV (경로가 없다면 적절히 수정 필요)
 CSV_PATH  = CUR_DIR.parent / "Case1" / "Case1_800.csv" 
 
 # 이미지상 RPM_model/model_800 폴더 구조 반영 
 MODEL_NPZ = CUR_DIR / "RPM_model" / "model_800" / "ae_sklearn.npz"
 THR_PATH  = CUR_DIR / "RPM_model" / "model_800" / "threshold.json"
-DATA_NPZ  = CUR_DIR / "data_proc_rpm" / "800" / "dataset.npz" [cite: 13]
+DATA_NPZ  = CUR_DIR / "data_proc_rpm" / "800" / "dataset.npz"
 
 # ================== 1. 학습 데이터 정보 로드 ==================
 if not DATA_NPZ.exists():
@@ -50,32 +55,14 @@ with open(THR_PATH, "r", encoding="utf-8") as f:
 
 # ================== 4. CSV 로드 (1컬럼) ==================
 df = pd.read_csv(CSV_PATH, header=None)
-x = df.iloc[:, 0].astype(np.float32).values.reshape(-1, 1)
-
-# ================== 5. Decimate ==================
-if decim > 1:
-    x = decimate(x[:, 0], decim, ftype="fir", zero_phase=True).reshape(-1, 1)
-
-# mean 제거
-x = x - x.mean(axis=0, keepdims=True)
+x = df.iloc[:, 0].to_numpy(dtype=np.float32)
 
-# ================== 6. Windowing ==================
-frames = []
-for i in range(0, len(x) - win + 1, hop):
-    frames.append(x[i:i + win])
+# ================== 5~7. Decimate -> 평균 제거 -> Windowing -> FFT feature ==================
+X = extract_features(x, win, hop, decim, cascade=uses_cascade(data))
 
-frames = np.asarray(frames, dtype=np.float32)
-
-if len(frames) == 0:
+if len(X) == 0:
     raise RuntimeError("윈도우가 생성되지 않았습니다.")
 
-# ================== 7. FFT → feature ==================
-fft = np.fft.rfft(frames, axis=1)   # (B, F, 1)
-mag = np.abs(fft)
-feat = np.log1p(mag)
-
-X = feat.reshape(feat.shape[0], -1)
-
 print("Feature dim:", X.shape[1], "Expected:", mean.shape[1])
 
 # ================== 8. 정규화 ==================
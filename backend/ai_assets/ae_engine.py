@@ -0,0 +1,118 @@
+# backend/ai_assets/ae_engine.py
+import threading
+import numpy as np
+
+# 한 번에 처리할 윈도우 수 (스크래치 버퍼가 CPU 캐시에 머물도록 블록 단위로 처리)
+BLOCK_ROWS = 1024
+
+
+class AEEngine:
+    """
+    sklearn 없이 AutoEncoder(MLP, ReLU) 순전파와 재구성 오차(MSE)를 계산하는 추론 엔진.
+    Trainingpy/03_score_sklearn.py 의 mlp_predict 와 같은 계산을 float32 로 수행하며,
+    레이어별 중간 버퍼는 스레드마다 한 번 할당해 호출 간에 재사용합니다.
+    """
+
+    def __init__(self, coefs, intercepts):
+        # 가중치는 연속(contiguous) float32 배열로 고정
+        self.coefs = [np.ascontiguousarray(W, dtype=np.float32) for W in coefs]
+        self.intercepts = [np.ascontiguousarray(b, dtype=np.float32).reshape(-1) for b in intercepts]
+        if len(self.coefs) != len(self.intercepts) or not self.coefs:
+            raise ValueError("coefs / intercepts 레이어 수가 올바르지 않습니다.")
+
+        self.n_features = self.coefs[0].shape[0]
+        self.n_outputs = self.coefs[-1].shape[1]
+        if self.n_outputs != self.n_features:
+            raise ValueError(f"AutoEncoder 입력({self.n_features})과 출력({self.n_outputs}) 차원이 다릅니다.")
+        self.layer_units = [W.shape[1] for W in self.coefs]
+        self._local = threading.local()
+
+    @classmethod
+    def from_npz(cls, path):
+        """02_train_ae_sklearn_rpm.py 가 저장한 ae_sklearn.npz 에서 엔진을 생성합니다."""
+        model_npz = np.load(str(path), allow_pickle=True)
+        return cls(list(model_npz["coefs"]), list(model_npz["intercepts"]))
+
+    def _scratch(self):
+        """현재 스레드 전용 레이어 버퍼 (BLOCK_ROWS x units)"""
+        bufs = getattr(self._local, "bufs", None)
+        if bufs is None:
+            bufs = [np.empty((BLOCK_ROWS, units), dtype=np.float32) for units in self.layer_units]
+            self._local.bufs = bufs
+        return bufs
+
+    def _as_input(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"입력 차원 불일치: {X.shape} (expected (B, {self.n_features}))")
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _forward_block(self, Xb, bufs):
+        """블록 하나를 순전파하고 마지막 레이어 버퍼(view)를 반환합니다."""
+        m = Xb.shape[0]
+        h = Xb
+        last = len(self.coefs) - 1
+        for i, (W, b) in enumerate(zip(self.coefs, self.intercepts)):
+            out = bufs[i][:m]
+            np.matmul(h, W, out=out)
+            out += b
+            if i != last:
+                np.maximum(out, 0, out=out)  # ReLU (in-place)
+            h = out
+        return h
+
+    def predict(self, X):
+        """재구성 결과 (B, F) 를 반환합니다. (sklearn ae.predict 대체)"""
+        X = self._as_input(X)
+        bufs = self._scratch()
+        recon = np.empty_like(X)
+        for s in range(0, X.shape[0], BLOCK_ROWS):
+            Xb = X[s:s + BLOCK_ROWS]
+            recon[s:s + Xb.shape[0]] = self._forward_block(Xb, bufs)
+        return recon
+
+    def reconstruction_error(self, X, out=None):
+        """순전파와 윈도우별 MSE 를 한 번에 계산합니다. 반환: (B,) float32"""
+        X = self._as_input(X)
+        n = X.shape[0]
+        if out is None:
+            out = np.empty(n, dtype=np.float32)
+        bufs = self._scratch()
+        for s in range(0, n, BLOCK_ROWS):
+            Xb = X[s:s + BLOCK_ROWS]
+            m = Xb.shape[0]
+            diff = self._forward_block(Xb, bufs)
+            np.subtract(diff, Xb, out=diff)
+            np.einsum("ij,ij->i", diff, diff, out=out[s:s + m])
+        out /= np.float32(self.n_features)
+        return out
+
+
+if __name__ == "__main__":
+    # 번들된 RPM 모델로 sklearn 경로와의 수치 일치 여부를 확인합니다.
+    from pathlib import Path
+    from sklearn.neural_network import MLPRegressor
+
+    CUR_DIR = Path(__file__).resolve().parent
+    for rpm in ["800", "1000", "1200"]:
+        model_path = CUR_DIR / "RPM_model" / f"model_{rpm}" / "ae_sklearn.npz"
+        data_path = CUR_DIR / "data_proc_rpm" / rpm / "dataset.npz"
+        if not model_path.exists() or not data_path.exists():
+            continue
+
+        X = np.load(str(data_path), allow_pickle=True)["X"].astype(np.float32)
+        model_npz = np.load(str(model_path), allow_pickle=True)
+
+        ae = MLPRegressor(hidden_layer_sizes=tuple(model_npz["hidden"]))
+        ae.coefs_ = list(model_npz["coefs"])
+        ae.intercepts_ = list(model_npz["intercepts"])
+        ae.n_layers_ = len(ae.coefs_) + 1
+        ae.n_outputs_ = ae.coefs_[-1].shape[1]
+        ae.out_activation_ = "identity"
+        ae.n_features_in_ = ae.coefs_[0].shape[0]
+        ref = np.mean((X.astype(np.float64) - ae.predict(X)) ** 2, axis=1)
+
+        err = AEEngine.from_npz(model_path).reconstruction_error(X)
+        max_rel = float(np.max(np.abs(err - ref) / np.maximum(np.abs(ref), 1e-12)))
+        ok = np.allclose(err, ref, rtol=1e-4, atol=1e-7)
+        print(f"[RPM {rpm}] windows={len(X)} max_rel_diff={max_rel:.3e} {'OK' if ok else 'MISMATCH'}")
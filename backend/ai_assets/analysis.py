@@ -0,0 +1,108 @@
+# backend/ai_assets/analysis.py
+# /api/monitoring/latest-analysis 용 기준 분포(ae_errors.npy) 캐시와 히스토그램 계산
+import numpy as np
+from ai_assets.registry import ERRORS_FILE
+
+N_BINS = 10          # 0 ~ upper 구간 수 (마지막에 upper 이상 구간 1개 추가)
+
+
+class BaselineProfile:
+    """한 모델 버전의 기준 오차 분포 (정렬된 오차, 구간 경계, 구간별 비율)"""
+
+    def __init__(self, rpm, version, errors, threshold, n_bins=N_BINS):
+        self.rpm = str(rpm)
+        self.version = version
+        self.threshold = float(threshold)
+        self.errors = np.sort(np.asarray(errors, dtype=np.float64))
+        # 기준 분포의 99% 와 threshold 의 2배 중 큰 값까지 균등 분할, 그 이상은 마지막 구간
+        upper = max(float(np.percentile(self.errors, 99)), 2.0 * self.threshold, 1e-12)
+        self.edges = np.append(np.linspace(0.0, upper, n_bins + 1), np.inf)
+        self.labels = [f"{lo:.3g}-{hi:.3g}" for lo, hi in zip(self.edges[:-2], self.edges[1:-1])]
+        self.labels.append(f"{upper:.3g}+")
+        self.hist = self.histogram(self.errors)
+
+    @classmethod
+    def from_model(cls, mv, n_bins=N_BINS):
+        """ModelVersion 폴더의 ae_errors.npy 로 생성합니다. (없으면 None)"""
+        path = mv.path / ERRORS_FILE
+        if not path.exists():
+            return None
+        return cls(mv.rpm, mv.version, np.load(str(path)), mv.threshold, n_bins)
+
+    def histogram(self, errors) -> np.ndarray:
+        """구간별 비율 (합 1). 음수 오차는 첫 구간에 포함"""
+        errors = np.clip(np.asarray(errors, dtype=np.float64), 0.0, None)
+        if errors.size == 0:
+            return np.zeros(len(self.labels))
+        counts, _ = np.histogram(errors, bins=self.edges)
+        return counts / errors.size
+
+    def chart_data(self, recent) -> list:
+        current = self.histogram(recent)
+        return [
+            {"range": label, "baseline": round(float(b), 4), "current": round(float(c), 4)}
+            for label, b, c in zip(self.labels, self.hist, current)
+        ]
+
+
+class AnalysisCache:
+    """
+    - 기준 분포: RPM 별 현재 모델 버전의 BaselineProfile 을 한 번만 로드
+    - 분석 결과: (최신 문서 _id, 모델 버전) 이 같으면 이전 결과를 그대로 반환
+      새 업로드 / 새 모델 버전이 들어오면 키가 바뀌고, 문서 삭제 시에는 invalidate() 로 비웁니다.
+    """
+
+    def __init__(self, n_bins=N_BINS):
+        self.n_bins = n_bins
+        self._profiles = {}   # rpm -> BaselineProfile
+        self._key = None
+        self._result = None
+        self.hits = 0
+        self.misses = 0
+
+    def profile(self, mv):
+        prof = self._profiles.get(mv.rpm)
+        if prof is None or prof.version != mv.version:
+            prof = BaselineProfile.from_model(mv, self.n_bins)
+            if prof is not None:
+                self._profiles[mv.rpm] = prof
+        return prof
+
+    def get(self, key):
+        if key == self._key and self._result is not None:
+            self.hits += 1
+            return self._result
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._key, self._result = key, result
+
+    def invalidate(self):
+        self._key, self._result = None, None
+
+    def analyze(self, mv, doc, recent_errors) -> dict:
+        """최근 오차(최대 100개)와 기준 분포를 비교한 응답을 만듭니다."""
+        prof = self.profile(mv)
+        if prof is None:
+            return {"status": "error", "message": f"Baseline file for RPM {mv.rpm} not found."}
+
+        from scipy.stats import ks_2samp   # 모니터링 조회 때만 필요 (서버 기동 시 import 하지 않음)
+        recent = np.asarray(recent_errors, dtype=np.float64)
+        limit = prof.threshold
+        _, p_value = ks_2samp(prof.errors, recent) if recent.size else (0.0, 1.0)
+
+        return {
+            "rpm": mv.rpm,
+            "model_version": mv.version,
+            "filename": doc["original_filename"],
+            "timestamp": doc["created_at"].isoformat(),
+            "metrics": {
+                "variance": float(np.var(recent)) if recent.size else 0.0,
+                "tcr": float(np.mean(recent > limit)) if recent.size else 0.0,
+                "p_value": float(p_value),
+                "current_error": doc.get("error_val", 0),
+                "limit": limit
+            },
+            "chartData": prof.chart_data(recent)
+        }
@@ -0,0 +1,188 @@
+# backend/ai_assets/artifact.py
+# RPM 모델 1개를 담는 단일 파일 형식 (pickle 없이 memmap 으로 로드)
+#
+#   magic(8) | 헤더 길이(<u4) | JSON 헤더 (UTF-8, 64 bytes 경계까지 공백 채움) | little-endian float32 blob
+#
+# JSON 헤더: 형식 버전, RPM, 모델 버전 ID, 전처리 파라미터(win / hop / decim / fs / cascade), threshold,
+# blob 안의 텐서 목록 {"name": ..., "offset": 원소 위치, "shape": [...]}
+# 텐서: mean, std, coefs.<i>, intercepts.<i>  (가중치 + 정규화 통계를 한 번의 mmap 으로 엶)
+#
+# 기존 모델(ae_sklearn.npz 는 object 배열이라 allow_pickle 필요, 통계는 학습 행렬 전체가 든 dataset.npz)은
+# convert 명령으로 같은 폴더에 model.nutae 를 만들며, 레지스트리는 이 파일이 있으면 우선 사용합니다.
+#
+#   python -m ai_assets.artifact convert [--rpm 800 1000]    # 현재 서비스 중인 모델 변환
+#   python -m ai_assets.artifact info RPM_model/model_800/model.nutae
+import os
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+import numpy as np
+
+ARTIFACT_FILE = "model.nutae"
+MAGIC = b"NUTAE\x00\x00\x01"
+FORMAT_VERSION = 1
+ALIGN = 64
+BLOB_DTYPE = np.dtype("<f4")
+_PREFIX = len(MAGIC) + 4
+
+
+class ModelArtifact:
+    """로드된 아티팩트 (텐서는 읽기 전용 memmap view)"""
+
+    __slots__ = ("path", "header", "tensors")
+
+    def __init__(self, path, header, tensors):
+        self.path = Path(path)
+        self.header = header
+        self.tensors = tensors
+
+    @property
+    def version(self):
+        return self.header.get("version")
+
+    @property
+    def n_layers(self) -> int:
+        return int(self.header["n_layers"])
+
+    @property
+    def coefs(self) -> list:
+        return [self.tensors[f"coefs.{i}"] for i in range(self.n_layers)]
+
+    @property
+    def intercepts(self) -> list:
+        return [self.tensors[f"intercepts.{i}"] for i in range(self.n_layers)]
+
+
+def save_artifact(path, coefs, intercepts, mean, std, win, hop, decim, fs, cascade, threshold,
+                  rpm=None, version=None, meta=None):
+    """가중치 / 통계 / 전처리 파라미터 / threshold 를 한 파일로 저장합니다. (임시 파일 후 os.replace)"""
+    arrays = [("mean", mean), ("std", std)]
+    arrays += [(f"coefs.{i}", W) for i, W in enumerate(coefs)]
+    arrays += [(f"intercepts.{i}", b) for i, b in enumerate(intercepts)]
+
+    tensors, parts, offset = [], [], 0
+    for name, a in arrays:
+        a = np.ascontiguousarray(a, dtype=BLOB_DTYPE)
+        tensors.append({"name": name, "offset": offset, "shape": list(a.shape)})
+        parts.append(a.reshape(-1))
+        offset += a.size
+    blob = np.concatenate(parts) if parts else np.empty(0, dtype=BLOB_DTYPE)
+
+    header = {
+        "format": FORMAT_VERSION,
+        "rpm": None if rpm is None else str(rpm),
+        "version": version,
+        "win": int(win), "hop": int(hop), "decim": int(decim), "fs": int(fs), "cascade": bool(cascade),
+        "threshold": float(threshold),
+        "n_layers": len(coefs),
+        "hidden": [int(np.shape(W)[1]) for W in coefs[:-1]],
+        "tensors": tensors,
+        "blob_elements": int(blob.size),
+        "blob_sha256": hashlib.sha256(blob.tobytes()).hexdigest(),
+        "meta": meta or {},
+    }
+    raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    raw += b" " * (-(_PREFIX + len(raw)) % ALIGN)
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(raw)).astype("<u4").tobytes())
+        f.write(raw)
+        f.write(blob.data)
+    os.replace(tmp, path)
+    return path
+
+
+def read_header(path):
+    """(JSON 헤더, blob 시작 byte 위치)"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX)
+        if len(prefix) < _PREFIX or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"모델 아티팩트가 아닙니다: {path}")
+        n = int(np.frombuffer(prefix[len(MAGIC):], dtype="<u4")[0])
+        header = json.loads(f.read(n).decode("utf-8"))
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 아티팩트 형식 버전입니다: {header.get('format')} ({path})")
+    return header, _PREFIX + n
+
+
+def load_artifact(path, verify=False) -> ModelArtifact:
+    """헤더를 읽고 blob 을 memmap 으로 열어 텐서 view 를 만듭니다. verify=True 면 blob 해시 확인"""
+    header, start = read_header(path)
+    n = int(header["blob_elements"])
+    if os.path.getsize(path) < start + n * BLOB_DTYPE.itemsize:
+        raise ValueError(f"모델 아티팩트가 잘렸습니다: {path}")
+    blob = np.memmap(path, dtype=BLOB_DTYPE, mode="r", offset=start, shape=(n,)) if n else np.empty(0, BLOB_DTYPE)
+    if verify and hashlib.sha256(blob.tobytes()).hexdigest() != header["blob_sha256"]:
+        raise ValueError(f"모델 아티팩트 해시가 일치하지 않습니다: {path}")
+    tensors = {}
+    for t in header["tensors"]:
+        size = int(np.prod(t["shape"], dtype=np.int64))
+        tensors[t["name"]] = blob[t["offset"]:t["offset"] + size].reshape(t["shape"])
+    return ModelArtifact(path, header, tensors)
+
+
+def convert_model(registry, rpm) -> Path:
+    """
+    레지스트리가 서비스 중인 RPM 모델(기존 파일)을 같은 폴더의 아티팩트로 변환합니다.
+    버전 ID 는 기존 로드 방식과 같은 값을 기록하므로 결과 캐시 / 특징 저장소 키가 그대로 유지됩니다.
+    """
+    from ai_assets.registry import MODEL_FILE, THRESHOLD_FILE
+    from ai_assets.decimation import uses_cascade
+
+    rpm = str(rpm)
+    model_dir, stats_path, version = registry.resolve(rpm)
+    with np.load(str(model_dir / MODEL_FILE), allow_pickle=True) as mdl:
+        coefs, intercepts = list(mdl["coefs"]), list(mdl["intercepts"])
+    with np.load(str(stats_path), allow_pickle=True) as info:
+        stats = {k: info[k] for k in ("mean", "std", "win", "hop", "decim")}
+        fs = int(info["fs"]) if "fs" in info.files else 0
+        cascade = uses_cascade(info)
+    with open(model_dir / THRESHOLD_FILE, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if version is None:
+        # 기존(flat) 레이아웃과 같은 버전 ID (가중치 + threshold 내용 해시)
+        h = hashlib.sha256()
+        for p in (model_dir / MODEL_FILE, model_dir / THRESHOLD_FILE):
+            h.update(p.read_bytes())
+        version = h.hexdigest()[:12]
+    return save_artifact(model_dir / ARTIFACT_FILE, coefs, intercepts, stats["mean"], stats["std"],
+                         stats["win"], stats["hop"], stats["decim"], fs, cascade, meta["threshold"],
+                         rpm=rpm, version=version, meta=meta)
+
+
+def main():
+    from ai_assets.registry import ModelRegistry, list_model_rpms
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="RPM 모델 아티팩트 변환 / 조회")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="현재 모델(ae_sklearn.npz + 통계 + threshold.json)을 아티팩트로 변환")
+    c.add_argument("--rpm", nargs="*", default=None, help="변환할 RPM (기본: 전체)")
+    i = sub.add_parser("info", help="아티팩트 헤더 출력 및 해시 확인")
+    i.add_argument("path")
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        art = load_artifact(args.path, verify=True)
+        h = dict(art.header)
+        h["tensors"] = {t["name"]: t["shape"] for t in h["tensors"]}
+        print(json.dumps(h, ensure_ascii=False, indent=2))
+        return
+
+    model_dir = backend_dir / "ai_assets" / "RPM_model"
+    registry = ModelRegistry(model_dir, backend_dir / "ai_assets" / "data_proc_rpm")
+    for rpm in args.rpm or list_model_rpms(model_dir):
+        path = convert_model(registry, rpm)
+        t0 = time.perf_counter()
+        art = load_artifact(path)
+        ms = (time.perf_counter() - t0) * 1e3
+        print(f"RPM {rpm}: {path} | {os.path.getsize(path) / 1024:.1f} KiB | version {art.version} | load {ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# backend/ai_assets/batcher.py
+# 동시에 들어온 /predict 요청들의 윈도우를 모아 AutoEncoder 순전파를 한 번에 수행합니다.
+import time
+import asyncio
+from collections import deque
+import numpy as np
+from ai_assets.metrics import STAGE_SECONDS, BATCH_WINDOWS
+
+
+class _Batch:
+    __slots__ = ("engine", "items", "n_windows", "timer")
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.items = []      # (X, future, enqueue_time)
+        self.n_windows = 0
+        self.timer = None
+
+
+class BatcherStats:
+    """배치 크기 / 대기 시간 통계 (최근 history 개 기준 분위수)"""
+
+    def __init__(self, history: int = 1024):
+        self.batches = 0
+        self.requests = 0
+        self.windows = 0
+        self.max_batch_windows = 0
+        self.batch_windows = deque(maxlen=history)
+        self.batch_requests = deque(maxlen=history)
+        self.wait_ms = deque(maxlen=history)
+        self.forward_ms = deque(maxlen=history)
+
+    def record(self, n_windows: int, n_requests: int, waits_ms, forward_ms: float):
+        self.batches += 1
+        self.requests += n_requests
+        self.windows += n_windows
+        self.max_batch_windows = max(self.max_batch_windows, n_windows)
+        self.batch_windows.append(n_windows)
+        self.batch_requests.append(n_requests)
+        self.wait_ms.extend(waits_ms)
+        self.forward_ms.append(forward_ms)
+
+    @staticmethod
+    def _summary(values) -> dict:
+        if not values:
+            return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        v = np.fromiter(values, dtype=np.float64)
+        p50, p95 = np.percentile(v, [50, 95])
+        return {"mean": float(v.mean()), "p50": float(p50), "p95": float(p95), "max": float(v.max())}
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "windows": self.windows,
+            "max_batch_windows": self.max_batch_windows,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "batch_windows": self._summary(self.batch_windows),
+            "batch_requests": self._summary(self.batch_requests),
+            "wait_ms": self._summary(self.wait_ms),
+            "forward_ms": self._summary(self.forward_ms),
+        }
+
+
+class MicroBatcher:
+    """
+    같은 모델(engine)에 대한 요청을 최대 max_wait_ms 동안 또는 max_windows 개까지 모아
+    AEEngine.reconstruction_error 를 한 번만 호출하고, 요청별 오차를 돌려줍니다.
+    순전파는 이벤트 루프를 막지 않도록 스레드에서 실행됩니다.
+    """
+
+    def __init__(self, max_windows: int = 4096, max_wait_ms: float = 5.0, history: int = 1024):
+        self.max_windows = int(max_windows)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.stats = {}      # key -> BatcherStats
+        self._history = history
+        self._pending = {}   # (key, id(engine)) -> _Batch
+        self._tasks = set()  # 실행 중인 flush 작업 (이벤트 루프는 작업을 약한 참조로만 보관)
+
+    async def score(self, key, engine, X: np.ndarray) -> np.ndarray:
+        """X (B, F) 정규화된 특징 -> (B,) 재구성 오차"""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        qkey = (key, id(engine))
+
+        batch = self._pending.get(qkey)
+        if batch is None:
+            batch = _Batch(engine)
+            batch.timer = loop.call_later(self.max_wait, self._flush, qkey)
+            self._pending[qkey] = batch
+        batch.items.append((X, fut, time.perf_counter()))
+        batch.n_windows += len(X)
+
+        if batch.n_windows >= self.max_windows:
+            self._flush(qkey)
+        return await fut
+
+    def _flush(self, qkey):
+        batch = self._pending.pop(qkey, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        t = asyncio.ensure_future(self._run(qkey[0], batch))
+        self._tasks.add(t)
+        t.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch: _Batch):
+        t_flush = time.perf_counter()
+        items = batch.items
+        X = items[0][0] if len(items) == 1 else np.concatenate([x for x, _, _ in items], axis=0)
+        try:
+            err = await asyncio.to_thread(batch.engine.reconstruction_error, X)
+        except Exception as e:
+            for _, fut, _ in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        forward_ms = (time.perf_counter() - t_flush) * 1000.0
+
+        start = 0
+        for x, fut, _ in items:
+            end = start + len(x)
+            if not fut.done():  # 클라이언트 연결 종료 등으로 취소된 요청은 건너뜀
+                fut.set_result(err[start:end])
+            start = end
+
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = BatcherStats(self._history)
+        waits = [(t_flush - t0) * 1000.0 for _, _, t0 in items]
+        stats.record(len(X), len(items), waits, forward_ms)
+        BATCH_WINDOWS.observe(len(X))
+        STAGE_SECONDS.observe(forward_ms / 1000.0, "batcher", "ae_forward")
+        for w in waits:
+            STAGE_SECONDS.observe(w / 1000.0, "batcher", "queue_wait")
+
+    def snapshot(self) -> dict:
+        return {
+            "max_windows": self.max_windows,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "models": {str(k): s.snapshot() for k, s in self.stats.items()},
+        }
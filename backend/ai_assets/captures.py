@@ -0,0 +1,273 @@
+# backend/ai_assets/captures.py
+# 검증 통과 업로드(validated_data) 저장 형식: SHA-256 으로 주소를 정하는 float32 원신호 파일
+#
+#   <root>/<sha256 앞 2자>/<sha256>.f32    128 bytes 헤더 + little-endian float32 샘플
+#
+# 헤더: magic / 형식 버전 / 샘플링 주파수 / 샘플 수 / RPM / 업로드 SHA-256 (hex)
+# 샘플링 주파수는 저장된 샘플(decimation 전 원신호) 기준입니다. 모델 통계의 fs 는 decimation 후 값이므로 raw_fs 로 환산합니다.
+# 샘플 영역은 np.memmap 으로 바로 열 수 있으므로 재학습 / 재생 도구가 CSV 를 다시 파싱하지 않습니다.
+# 기존 CSV 저장 파일은 read_signal 이 그대로 읽으며, migrate 명령으로 변환할 수 있습니다.
+#
+#   python -m ai_assets.captures migrate [--dry-run] [--keep-csv]   # model_inputs 의 CSV 저장 파일 변환
+#   python -m ai_assets.captures info <경로 또는 sha256>
+import os
+import tempfile
+import hashlib
+import argparse
+from collections import Counter
+from pathlib import Path
+import numpy as np
+from ai_assets.ingest import read_column_csv
+
+MAGIC = b"NUTCAP\x00\x01"
+FORMAT_VERSION = 1
+CAPTURE_SUFFIX = ".f32"
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("fs", "<u4"),        # 원신호 샘플링 주파수 (Hz, 0 = 알 수 없음)
+    ("n_samples", "<u8"),
+    ("rpm", "S16"),
+    ("sha256", "S64"),
+    ("reserved", "V24"),
+])
+SAMPLE_DTYPE = np.dtype("<f4")
+assert HEADER_DTYPE.itemsize == HEADER_SIZE
+
+
+def raw_fs(fs, decim) -> int:
+    """모델 통계의 fs(decimation 후)와 decim -> 원신호 샘플링 주파수"""
+    return int(fs) * max(int(decim), 1)
+
+
+def _header_bytes(rpm, fs, n_samples, sha256) -> bytes:
+    h = np.zeros((), dtype=HEADER_DTYPE)
+    h["magic"] = MAGIC
+    h["version"] = FORMAT_VERSION
+    h["fs"] = int(fs)
+    h["n_samples"] = int(n_samples)
+    h["rpm"] = str(rpm).encode("ascii")
+    h["sha256"] = (sha256 or "").encode("ascii")
+    return h.tobytes()
+
+
+class CaptureWriter:
+    """
+    열린 binary 파일에 캡처를 순차 기록합니다. (StreamingIngest 의 spool)
+    샘플 수 / SHA-256 은 끝나야 알 수 있으므로 빈 헤더를 먼저 쓰고 finish() 에서 채웁니다.
+    """
+
+    def __init__(self, f, rpm, fs):
+        self.f = f
+        self.rpm = str(rpm)
+        self.fs = int(fs)
+        self.n_samples = 0
+        f.write(_header_bytes(rpm, fs, 0, ""))
+
+    def write(self, values):
+        samples = np.ascontiguousarray(values, dtype=SAMPLE_DTYPE)
+        self.f.write(samples.data)
+        self.n_samples += samples.size
+
+    def finish(self, sha256):
+        self.f.seek(0)
+        self.f.write(_header_bytes(self.rpm, self.fs, self.n_samples, sha256))
+        self.f.seek(0, os.SEEK_END)
+
+
+def write_capture(path, x, rpm, fs, sha256):
+    """신호 전체를 한 번에 캡처 파일로 씁니다."""
+    with open(path, "wb") as f:
+        w = CaptureWriter(f, rpm, fs)
+        w.write(x)
+        w.finish(sha256)
+
+
+class Capture:
+    """캡처 파일 1개 (samples 는 읽기 전용 memmap)"""
+
+    __slots__ = ("path", "rpm", "fs", "sha256", "samples")
+
+    def __init__(self, path, rpm, fs, sha256, samples):
+        self.path = Path(path)
+        self.rpm = rpm
+        self.fs = fs
+        self.sha256 = sha256
+        self.samples = samples
+
+    def __len__(self):
+        return self.samples.shape[0]
+
+
+def is_capture(path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def open_capture(path) -> Capture:
+    """헤더를 확인하고 샘플 영역을 memmap 으로 엽니다."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE or raw[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"캡처 파일이 아닙니다: {path}")
+    h = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if int(h["version"]) != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 캡처 형식 버전입니다: {int(h['version'])} ({path})")
+    n = int(h["n_samples"])
+    expected = HEADER_SIZE + n * SAMPLE_DTYPE.itemsize
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"캡처 파일이 잘렸습니다: {path}")
+    samples = (np.memmap(path, dtype=SAMPLE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+               if n else np.empty(0, dtype=SAMPLE_DTYPE))
+    return Capture(path, h["rpm"].decode("ascii"), int(h["fs"]), h["sha256"].decode("ascii"), samples)
+
+
+def read_signal(path) -> np.ndarray:
+    """저장된 업로드의 원신호 (float32). 캡처 파일은 memmap, 기존 CSV 는 파싱해서 반환합니다."""
+    if is_capture(path):
+        return open_capture(path).samples
+    return read_column_csv(path).astype(np.float32)
+
+
+class CaptureStore:
+    """
+    validated_data 아래의 캡처 저장소.
+    같은 업로드는 같은 경로가 되므로 이미 있는 파일은 다시 쓰지 않습니다.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"   # os.replace 가 원자적이도록 같은 파일 시스템에 임시 파일 작성
+
+    def path_for(self, sha256) -> Path:
+        return self.root / sha256[:2] / f"{sha256}{CAPTURE_SUFFIX}"
+
+    def new_spool(self) -> str:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.tmp_dir, suffix=".part", delete=False) as f:
+            return f.name
+
+    def commit(self, spool_path, sha256):
+        """spool 을 sha256 주소로 옮깁니다. 반환: (경로, 새로 만들었는지)"""
+        path = self.path_for(sha256)
+        if path.exists():
+            os.remove(spool_path)
+            return path, False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(spool_path, path)
+        return path, True
+
+    def remove(self, path):
+        """캡처 / 기존 CSV 저장 파일 삭제 (없으면 무시)"""
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def iter_captures(self, rpm=None):
+        """저장소의 캡처를 (재생 / 분석 도구용) 순회합니다."""
+        for path in sorted(self.root.glob(f"??/*{CAPTURE_SUFFIX}")):
+            cap = open_capture(path)
+            if rpm is None or cap.rpm == str(rpm):
+                yield cap
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def migrate(store: CaptureStore, col, fs_by_rpm, dry_run=False, keep_csv=False) -> dict:
+    """
+    model_inputs 문서 중 storage_path 가 CSV 인 것을 캡처로 변환하고 storage_path 를 바꿉니다.
+    주소는 문서의 sha256(원래 업로드 해시)이며, 없으면 CSV 파일 내용 해시를 사용합니다.
+    """
+    counts = {"converted": 0, "missing": 0, "failed": 0, "csv_bytes": 0, "capture_bytes": 0}
+    # 예전 저장 이름(<시각>_<파일명>.csv)은 같은 초에 같은 이름이 오면 여러 문서가 한 파일을 가리킬 수 있으므로,
+    # CSV 는 그 경로를 참조하는 문서를 모두 변환한 뒤에 삭제
+    docs = sorted(col.find({"storage_path": {"$regex": r"\.csv$"}}, {"storage_path": 1, "sha256": 1, "rpm": 1}),
+                  key=lambda d: d["storage_path"])
+    refs = Counter(d["storage_path"] for d in docs)
+    parsed = (None, None)   # (경로, 신호): 같은 경로의 문서는 연속이므로 직전 파싱 결과 재사용
+    for doc in docs:
+        src = doc["storage_path"]
+        refs[src] -= 1
+        if parsed[0] != src:
+            if not os.path.exists(src):
+                counts["missing"] += 1
+                continue
+            try:
+                parsed = (src, read_column_csv(src).astype(np.float32))
+            except (OSError, ValueError) as e:
+                print(f"  skip {src}: {e}")
+                counts["failed"] += 1
+                continue
+        x = parsed[1]
+        sha = doc.get("sha256") or file_sha256(src)
+        rpm = str(doc["rpm"])
+        counts["csv_bytes"] += os.path.getsize(src)
+        counts["capture_bytes"] += HEADER_SIZE + x.nbytes
+        counts["converted"] += 1
+        if dry_run:
+            continue
+        spool = store.new_spool()
+        write_capture(spool, x, rpm, fs_by_rpm.get(rpm, 0), sha)
+        path, _ = store.commit(spool, sha)
+        col.update_one({"_id": doc["_id"]}, {"$set": {"storage_path": str(path)}})
+        if not keep_csv and refs[src] == 0:
+            os.remove(src)
+    return counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description="validated_data 캡처 저장소 관리")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="model_inputs 의 CSV 저장 파일을 캡처로 변환")
+    m.add_argument("--dry-run", action="store_true", help="변환 대상과 크기만 출력")
+    m.add_argument("--keep-csv", action="store_true", help="변환 후 CSV 를 지우지 않음")
+    m.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    i = sub.add_parser("info", help="캡처 헤더 / 샘플 통계 출력")
+    i.add_argument("target", help="캡처 경로 또는 sha256")
+    args = ap.parse_args()
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    store = CaptureStore(backend_dir / "ai_assets" / "validated_data")
+
+    if args.cmd == "info":
+        target = args.target if os.path.exists(args.target) else store.path_for(args.target)
+        cap = open_capture(target)
+        x = cap.samples
+        print(f"{cap.path}\n  rpm {cap.rpm} | fs {cap.fs} Hz | {len(cap):,} samples ({len(cap) / max(cap.fs, 1):.2f} s)"
+              f" | sha256 {cap.sha256}")
+        if len(cap):
+            print(f"  mean {float(x.mean(dtype=np.float64)):.6f} | min {float(x.min()):.6f} | max {float(x.max()):.6f}")
+        return
+
+    from pymongo import MongoClient
+    from ai_assets.registry import ModelRegistry, list_model_rpms
+
+    model_dir = backend_dir / "ai_assets" / "RPM_model"
+    registry = ModelRegistry(model_dir, backend_dir / "ai_assets" / "data_proc_rpm")
+    fs_by_rpm = {}
+    for rpm in list_model_rpms(model_dir):
+        _, stats_path, _ = registry.resolve(rpm)
+        with np.load(str(stats_path), allow_pickle=True) as info:
+            fs_by_rpm[rpm] = raw_fs(info["fs"], info["decim"]) if "fs" in info.files else 0
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        counts = migrate(store, client.nutdb.model_inputs, fs_by_rpm, args.dry_run, args.keep_csv)
+    finally:
+        client.close()
+    ratio = counts["csv_bytes"] / counts["capture_bytes"] if counts["capture_bytes"] else 0.0
+    print(f"{'[dry-run] ' if args.dry_run else ''}converted {counts['converted']} | missing {counts['missing']} | "
+          f"failed {counts['failed']} | CSV {counts['csv_bytes'] / 2**20:.1f} MiB -> "
+          f"capture {counts['capture_bytes'] / 2**20:.1f} MiB ({ratio:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
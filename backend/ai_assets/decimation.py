@@ -0,0 +1,300 @@
+# backend/ai_assets/decimation.py
+# 다단(cascade) polyphase FIR decimation - 학습(features.preprocess_signal)과 서빙(ingest.StreamingIngest) 공통
+#
+# 큰 decimation 비율(예: 10 MHz -> 20 kHz, q=500)을 한 번에 처리하면 20q+1 탭 필터를 원신호 전체에 적용해야 하므로,
+# q 를 여러 단계로 나눕니다.
+#   - 앞 단계: 최종 대역(0 ~ 1.2/q)으로 접히는 성분만 제거하면 되므로 전이 대역이 넓은 짧은 Kaiser 필터
+#   - 마지막 단계: scipy.signal.decimate(ftype="fir") 와 같은 설계(20q+1 탭, hamming)를 낮은 샘플링 속도에서 적용
+# 각 단계는 upfirdn(polyphase)으로 남길 샘플만 계산하며, 필터는 (q, dtype) 별로 한 번만 설계해 캐시합니다.
+# scipy.signal 은 import 가 무거워 필터를 처음 설계할 때(서버는 모델 warm-up 때) 로드합니다.
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+STOPBAND_DB = 90.0      # 앞 단계 필터 감쇠량 (마지막 단계 hamming 필터 약 53 dB 보다 충분히 크게)
+BAND_MARGIN = 1.2       # 앞 단계가 보존할 대역: 0 ~ BAND_MARGIN / q (원신호 Nyquist = 1 기준)
+MAX_STAGES = 3
+MIN_GAIN = 2.0          # 단일 단계 대비 예상 연산량이 이 배수 이상 줄어들 때만 cascade 사용
+
+# feature_stats.npz / dataset.npz 에 기록하는 필터 방식 (1: cascade, 0 또는 없음: scipy 와 같은 단일 단계)
+# 기존 모델은 단일 단계 decimate 로 만든 특징으로 학습되었으므로 키가 없으면 단일 단계를 사용합니다.
+CASCADE_KEY = "decim_cascade"
+
+
+def uses_cascade(info) -> bool:
+    """np.load 한 전처리 통계에서 decimation 필터 방식을 읽습니다."""
+    return CASCADE_KEY in info.files and bool(int(info[CASCADE_KEY]))
+
+
+@lru_cache(maxsize=32)
+def fir_taps(q: int, dtype: str = "float32") -> np.ndarray:
+    """
+    scipy.signal.decimate(ftype="fir") 와 동일한 저역통과 FIR (20q+1 taps, hamming).
+    (q, dtype) 별로 한 번만 설계해 재사용합니다.
+    """
+    from scipy.signal import firwin
+    h = firwin(20 * q + 1, 1. / q, window="hamming").astype(dtype)
+    h.flags.writeable = False
+    return h
+
+
+def _kaiser_taps(q_stage: int, width: float, dtype: str) -> np.ndarray:
+    """앞 단계용 저역통과 (차단 1/q_stage, 전이 폭 width, Nyquist=1 기준)"""
+    from scipy.signal import firwin, kaiserord
+    numtaps, beta = kaiserord(STOPBAND_DB, width)
+    numtaps |= 1  # 홀수 (zero-phase 중심 탭)
+    return firwin(numtaps, 1. / q_stage, window=("kaiser", beta)).astype(dtype)
+
+
+def _ordered_factorizations(q: int, max_stages: int):
+    """q 를 1 보다 큰 정수의 곱으로 나누는 모든 순서 있는 분해 (최대 max_stages 단계)"""
+    if max_stages == 1:
+        yield (q,)
+        return
+    yield (q,)
+    for d in range(2, q):
+        if q % d == 0:
+            for rest in _ordered_factorizations(q // d, max_stages - 1):
+                yield (d,) + rest
+
+
+def _stage_filters(factors, q: int, dtype: str):
+    """단계별 필터 목록. 앞 단계 전이 폭이 0 이하(설계 불가)이면 None"""
+    taps, d_prev = [], 1
+    for i, qs in enumerate(factors):
+        if i == len(factors) - 1:
+            taps.append(fir_taps(qs, dtype))
+        else:
+            # 단계 입력 기준: 통과 대역 끝 1.2*d_prev/q, 저지 대역 시작 2/qs - 1.2*d_prev/q
+            width = 2. / qs - 2. * BAND_MARGIN * d_prev / q
+            if width <= 0:
+                return None
+            taps.append(_kaiser_taps(qs, width, dtype))
+        d_prev *= qs
+    return taps
+
+
+def _cost(factors, taps) -> float:
+    """원신호 샘플당 곱셈 수 (polyphase: 단계마다 출력 샘플당 탭 수)"""
+    cost, d_prev = 0.0, 1
+    for qs, h in zip(factors, taps):
+        cost += len(h) / (d_prev * qs)
+        d_prev *= qs
+    return cost
+
+
+@lru_cache(maxsize=32)
+def design_stages(q: int, dtype: str = "float32", cascade: bool = True) -> tuple:
+    """
+    ((q_1, taps_1), (q_2, taps_2), ...) - 예상 연산량이 가장 적은 단계 분할.
+    cascade=False 이거나 단일 단계보다 MIN_GAIN 배 이상 빠르지 않으면 scipy 와 같은 단일 단계를 반환합니다.
+    """
+    q = int(q)
+    if q <= 1:
+        return ()
+    single = ((q,), [fir_taps(q, dtype)])
+    best = single
+    if cascade:
+        for factors in _ordered_factorizations(q, MAX_STAGES):
+            if len(factors) == 1:
+                continue
+            taps = _stage_filters(factors, q, dtype)
+            if taps is not None and _cost(factors, taps) < _cost(*best):
+                best = (factors, taps)
+        if _cost(*best) * MIN_GAIN > _cost(*single):
+            best = single
+    stages = []
+    for qs, h in zip(*best):
+        h = np.array(h)
+        h.flags.writeable = False
+        stages.append((qs, h))
+    return tuple(stages)
+
+
+class _PolyphaseStage:
+    """
+    한 단계 zero-phase FIR decimation (resample_poly 와 같은 지연 보정, 입력 밖은 0).
+    start: 첫 입력 샘플의 인덱스 (앞 단계 출력은 음수 인덱스부터 시작할 수 있음)
+    출력은 필터가 입력과 겹치는 전 구간(음수 인덱스 포함)을 내보내므로, 단계를 이어도
+    합성 필터를 한 번에 적용한 것과 같은 가장자리 응답이 됩니다.
+    마지막 2*half 샘플만 상태로 유지하므로 청크로 나눠 넣어도 한 번에 처리한 결과와 같습니다. (반올림 오차 이내)
+    """
+
+    def __init__(self, q: int, h: np.ndarray, dtype, start: int = 0):
+        self.q = int(q)
+        self.dtype = np.dtype(dtype)
+        # 중심 탭 앞쪽 길이(half)를 q 의 배수로 맞춤 (양쪽 0 탭 추가: 응답은 동일)
+        half = (len(h) - 1) // 2
+        pad = -half % self.q
+        self.h = np.pad(h, pad) if pad else h
+        self._h_rev = np.ascontiguousarray(self.h[::-1], dtype=self.dtype)
+        self.half = half + pad
+        self.start = int(start)
+        # 첫 입력에 필터가 닿는 첫 출력 인덱스 / 버퍼 앞에 채울 0 개수
+        self.first = -((self.half - self.start) // self.q)
+        self._lead = self.start - (self.first * self.q - self.half)
+        self._pending = None
+        self.n_in = 0
+        self.n_out = 0
+
+    def _emit(self, buf: np.ndarray, count: int) -> np.ndarray:
+        # buf[0] 은 입력 인덱스 (다음 출력 인덱스) * q - half 에 해당
+        span = (count - 1) * self.q + 2 * self.half + 1
+        if count < 2 * self.half // self.q:
+            # 작은 청크: upfirdn 은 양 끝 과도 구간(2*half/q 개씩)까지 계산하므로 필요한 출력만 직접 계산
+            frames = sliding_window_view(buf[:span], self.h.shape[0], axis=0)[::self.q]   # (count, [C,] L)
+            return frames @ self._h_rev
+        from scipy.signal import upfirdn   # 필터 설계 때 이미 로드됨 (sys.modules 조회만)
+        y = upfirdn(self.h, buf[:span], 1, self.q, axis=0)
+        start = 2 * self.half // self.q
+        return y[start:start + count]
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if self._pending is None:
+            self._pending = np.zeros((self._lead,) + x.shape[1:], dtype=self.dtype)
+        self.n_in += x.shape[0]
+        buf = np.concatenate([self._pending, x])
+        if buf.shape[0] <= 2 * self.half:
+            self._pending = buf
+            return buf[:0]
+
+        count = (buf.shape[0] - 1 - 2 * self.half) // self.q + 1
+        y = self._emit(buf, count)
+        self._pending = buf[count * self.q:]
+        self.n_out += count
+        return y
+
+    def apply(self, u: np.ndarray) -> np.ndarray:
+        """입력 전체를 한 번에 처리 (process + flush 와 같은 출력, 첫 단계는 입력 복사 없음)"""
+        # upfirdn(h, u)[i] = sum_k h[k] u[i*q - k] 이므로 (half - start) 가 q 의 배수가 되도록 앞에 0 을 채움
+        r = (self.start - self.half) % self.q
+        if r:
+            u = np.concatenate([np.zeros((r,) + u.shape[1:], dtype=self.dtype), u])
+        i0 = self.first + (self.half - self.start + r) // self.q
+        last = (self.start + u.shape[0] - r - 1 + self.half) // self.q
+        from scipy.signal import upfirdn
+        return upfirdn(self.h, u, 1, self.q, axis=0)[i0:i0 + last - self.first + 1]
+
+    def flush(self) -> np.ndarray:
+        """입력 끝 뒤쪽(0)에 필터가 걸치는 나머지 출력을 반환합니다."""
+        if self._pending is None:
+            return np.empty(0, dtype=self.dtype)
+        last = (self.start + self.n_in - 1 + self.half) // self.q
+        count = last - (self.first + self.n_out) + 1
+        if count <= 0:
+            return self._pending[:0]
+        need = (count - 1) * self.q + 2 * self.half + 1
+        pad = np.zeros((max(0, need - self._pending.shape[0]),) + self._pending.shape[1:], dtype=self.dtype)
+        buf = np.concatenate([self._pending, pad])
+        y = self._emit(buf, count)
+        self._pending = buf[count * self.q:]
+        self.n_out += count
+        return y
+
+
+class StreamingDecimator:
+    """
+    decimate 를 청크 단위로 수행하는 상태 유지형 decimator. (N,) 또는 (N, C) 입력, axis=0.
+    design_stages(q) 의 단계를 차례로 연결하고 출력은 인덱스 0 ~ ceil(N/q)-1 만 남기며,
+    청크 크기와 관계없이 decimate(x, q) 와 같은 결과를 냅니다. (작은 청크는 직접 계산 경로를 타므로 float32 반올림 오차 이내)
+    cascade=False 이면 scipy.signal.decimate(x, q, ftype="fir", zero_phase=True) 와 같은 단일 단계 필터를 사용합니다.
+    """
+
+    def __init__(self, q: int, dtype=np.float32, cascade: bool = True):
+        self.q = int(q)
+        self.dtype = np.dtype(dtype)
+        self.stages, start = [], 0
+        for qs, h in design_stages(self.q, self.dtype.name, cascade):
+            self.stages.append(_PolyphaseStage(qs, h, self.dtype, start))
+            start = self.stages[-1].first
+        self._skip = -start  # 마지막 단계의 음수 인덱스 출력 수
+        self.n_in = 0
+        self.n_out = 0
+
+    @property
+    def factors(self) -> list:
+        return [s.q for s in self.stages]
+
+    def _take(self, y: np.ndarray, limit=None) -> np.ndarray:
+        if self._skip:
+            k = min(self._skip, y.shape[0])
+            y, self._skip = y[k:], self._skip - k
+        if limit is not None:
+            y = y[:max(0, limit - self.n_out)]
+        self.n_out += y.shape[0]
+        return y
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """새 샘플을 넣고, 이번에 확정된 출력 샘플을 반환합니다."""
+        y = np.asarray(x, dtype=self.dtype)
+        self.n_in += y.shape[0]
+        if not self.stages:
+            self.n_out += y.shape[0]
+            return y
+        for stage in self.stages:
+            if y.shape[0] == 0:
+                break
+            y = stage.process(y)
+        return self._take(y)
+
+    def flush(self) -> np.ndarray:
+        """각 단계의 남은 출력을 다음 단계로 넘기며 마무리합니다. (총 출력 ceil(N/q) 개)"""
+        if not self.stages:
+            return np.empty(0, dtype=self.dtype)
+        out = None
+        for stage in self.stages:
+            if out is not None and out.shape[0]:
+                out = np.concatenate([stage.process(out), stage.flush()])
+            else:
+                out = stage.flush()
+        return self._take(out, limit=-(-self.n_in // self.q))
+
+
+def decimate(x: np.ndarray, q: int, dtype=np.float32, cascade: bool = True) -> np.ndarray:
+    """(N,) 또는 (N, C) 신호를 axis=0 으로 decimate (출력 길이 ceil(N/q))"""
+    x = np.asarray(x, dtype=dtype)
+    if q <= 1:
+        return x
+    dec = StreamingDecimator(q, dtype, cascade)
+    y = x
+    for stage in dec.stages:
+        y = stage.apply(y)
+    skip = -dec.stages[-1].first  # 인덱스 0 ~ ceil(N/q)-1 만 남김
+    return y[skip:skip - (-x.shape[0] // q)]
+
+
+if __name__ == "__main__":
+    # 동등성 확인: 단일 단계 = scipy decimate, cascade ~= scipy decimate, 청크 스트리밍 = 일괄 처리
+    import os
+    from scipy.signal import decimate as scipy_decimate
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    rng = np.random.default_rng(0)
+    csv = os.path.join(here, "Case2_800.csv")
+    if os.path.exists(csv):
+        x = np.loadtxt(csv, dtype=np.float32)
+    else:
+        x = rng.normal(size=360_000).astype(np.float32)
+    q = 500
+
+    ref = scipy_decimate(x, q, ftype="fir", zero_phase=True).astype(np.float32)
+    single = decimate(x, q, cascade=False)
+    casc = decimate(x, q)
+    rms = float(np.sqrt(np.mean(ref.astype(np.float64) ** 2)))
+    print(f"stages {[s for s, _ in design_stages(q)]} taps {[len(h) for _, h in design_stages(q)]}")
+    print(f"single-stage vs scipy: max |diff| {np.abs(single - ref).max():.2e}")
+    rel = float(np.sqrt(np.mean((casc - ref).astype(np.float64) ** 2))) / rms
+    print(f"cascade vs scipy: relative RMS diff {rel:.2e} | len {len(casc)} == {len(ref)}")
+    assert len(single) == len(ref) == len(casc)
+    assert np.allclose(single, ref, rtol=1e-4, atol=1e-4 * rms)
+    assert rel < 1e-2
+
+    for cascade in (False, True):
+        dec = StreamingDecimator(q, cascade=cascade)
+        bounds = np.sort(rng.choice(np.arange(1, len(x)), 40, replace=False))
+        parts = [dec.process(c) for c in np.split(x, bounds)] + [dec.flush()]
+        streamed = np.concatenate(parts)
+        assert np.allclose(streamed, decimate(x, q, cascade=cascade), rtol=1e-5, atol=1e-6 * rms), cascade
+    x2 = np.stack([x, -0.5 * x], axis=1)
+    assert np.array_equal(decimate(x2, q)[:, 0], casc)
+    print("streaming == batch (random chunks, float32 rounding), 2-channel == per-channel: OK")
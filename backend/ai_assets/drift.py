@@ -0,0 +1,279 @@
+# backend/ai_assets/drift.py
+# 재학습 트리거용 RPM 별 오차 통계를 메모리에서 증분 갱신합니다.
+# (업로드마다 Mongo 를 3번 조회하고 ks_2samp 를 새로 계산하던 방식을 대체)
+import time
+import asyncio
+from datetime import datetime
+import numpy as np
+
+WINDOW = 100             # 최근 / 기준 오차 개수
+VAR_LIMIT = 1.5          # 1. 오차 분산 임계값
+ERROR_LIMIT = 0.5        # 2. TCR 계산용 오차 임계값
+TCR_LIMIT = 0.2          #    오차 0.5 초과 비율 임계값
+P_VALUE_LIMIT = 0.05     # 3. KS 검정 유의수준
+COUNT_STEP = 100         # 데이터 100개 단위 재학습
+
+
+class DriftState:
+    """
+    한 RPM 의 드리프트 통계.
+    - recent: 최근 WINDOW 개 오차 링 버퍼 + 슬라이딩 Welford 평균/분산
+    - over: 링 버퍼 안에서 ERROR_LIMIT 초과 개수 (TCR = over / n)
+    - baseline: 처음 WINDOW 개 오차 (정렬해 캐시, 한 번 채워지면 고정)
+    update() 는 O(1), KS 검정은 분산/TCR 조건을 모두 통과했을 때만 계산합니다.
+    """
+
+    # 누적 오차가 쌓이지 않도록 주기적으로 버퍼에서 평균/분산을 다시 계산
+    RESYNC_EVERY = 10000
+
+    def __init__(self, rpm, window: int = WINDOW):
+        self.rpm = str(rpm)
+        self.window = int(window)
+        self.total_count = 0
+        self.recent = np.zeros(self.window, dtype=np.float64)
+        self.pos = 0         # 다음에 쓸 위치
+        self.n = 0           # 링 버퍼에 들어 있는 개수
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.over = 0
+        self._baseline = []
+        self.baseline_sorted = None
+        self.dirty = 0       # 마지막 체크포인트 이후 갱신 횟수
+        self._since_resync = 0
+
+    # --- 갱신 ---
+
+    def _add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self, x):
+        if self.n == 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        d = x - self.mean
+        self.mean -= d / self.n
+        self.m2 -= d * (x - self.mean)
+
+    def _resync(self):
+        buf = self.ordered()
+        self.mean = float(buf.mean()) if self.n else 0.0
+        self.m2 = float(((buf - self.mean) ** 2).sum()) if self.n else 0.0
+        self.over = int(np.count_nonzero(buf > ERROR_LIMIT))
+        self._since_resync = 0
+
+    def update(self, err: float):
+        x = float(err)
+        if self.n == self.window:
+            old = self.recent[self.pos]
+            self._remove(old)
+            self.over -= old > ERROR_LIMIT
+        self.recent[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self._add(x)
+        self.over += x > ERROR_LIMIT
+
+        if self.baseline_sorted is None:
+            self._baseline.append(x)
+            if len(self._baseline) == self.window:
+                self.baseline_sorted = np.sort(np.asarray(self._baseline, dtype=np.float64))
+                self._baseline = []
+
+        self.total_count += 1
+        self.dirty += 1
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_EVERY:
+            self._resync()
+
+    def ordered(self) -> np.ndarray:
+        """링 버퍼 내용을 오래된 순서로 반환"""
+        if self.n < self.window:
+            return self.recent[:self.n].copy()
+        return np.roll(self.recent, -self.pos)
+
+    @property
+    def variance(self) -> float:
+        # np.var 와 같은 모분산
+        return max(self.m2, 0.0) / self.n if self.n else 0.0
+
+    @property
+    def tcr(self) -> float:
+        return self.over / self.n if self.n else 0.0
+
+    # --- 판단 ---
+
+    def evaluate(self, inserted: int = 1) -> dict:
+        """
+        재학습 조건 (app.py 의 기존 조건과 동일)
+        A. 데이터가 100 단위를 넘어선 시점
+        B. 최근 100개에서 분산 > 1.5, TCR > 0.2, KS p-value < 0.05 가 모두 성립
+        """
+        total = self.total_count
+        is_count_trigger = total > 0 and total // COUNT_STEP > (total - inserted) // COUNT_STEP
+
+        variance, tcr, p_value = self.variance, self.tcr, 1.0
+        is_performance_trigger = False
+        if total >= self.window and variance > VAR_LIMIT and tcr > TCR_LIMIT:
+            # scipy.stats 는 import 가 ~1초라 서버 기동 시가 아니라 KS 검정이 처음 필요할 때 로드
+            from scipy.stats import ks_2samp
+            baseline = self.baseline_sorted if self.baseline_sorted is not None else np.sort(self.ordered())
+            _, p_value = ks_2samp(baseline, self.ordered())
+            is_performance_trigger = bool(p_value < P_VALUE_LIMIT)
+
+        return {
+            "rpm": self.rpm,
+            "total_count": total,
+            "is_count_trigger": bool(is_count_trigger),
+            "is_performance_trigger": is_performance_trigger,
+            "should_retrain": bool(is_count_trigger or is_performance_trigger),
+            "metrics": {"variance": float(variance), "tcr": float(tcr), "p_value": float(p_value)},
+        }
+
+    # --- 체크포인트 ---
+
+    def to_doc(self) -> dict:
+        return {
+            "_id": self.rpm,
+            "total_count": self.total_count,
+            "recent": self.ordered().tolist(),
+            "baseline": (self.baseline_sorted.tolist() if self.baseline_sorted is not None else list(self._baseline)),
+            "baseline_full": self.baseline_sorted is not None,
+            "updated_at": datetime.utcnow(),
+        }
+
+    @classmethod
+    def from_errors(cls, rpm, total_count: int, recent, baseline, baseline_full: bool, window: int = WINDOW):
+        """recent: 오래된 순서의 최근 오차, baseline: 처음 오차들"""
+        st = cls(rpm, window)
+        for x in list(recent)[-st.window:]:
+            st.update(x)
+        if baseline_full:
+            st.baseline_sorted = np.sort(np.asarray(baseline, dtype=np.float64))
+            st._baseline = []
+        else:
+            st._baseline = [float(x) for x in baseline]
+        st.total_count = int(total_count)
+        st.dirty = 0
+        st._resync()
+        return st
+
+    @classmethod
+    def from_doc(cls, doc: dict, window: int = WINDOW):
+        return cls.from_errors(doc["_id"], doc["total_count"], doc["recent"], doc["baseline"],
+                               doc.get("baseline_full", False), window)
+
+
+class DriftMonitor:
+    """
+    RPM 별 DriftState 를 보관하고 Mongo(drift_state 컬렉션)에 주기적으로 체크포인트합니다.
+    - 로드 시 체크포인트를 읽고 count_documents 1회로 검증, 어긋나면 model_inputs 에서 다시 구성
+      (새 문서 저장 후 처음 로드하면 그 문서가 두 번 반영되므로, 서버 시작 시 load() 로 미리 읽어 둠)
+    - checkpoint_every 번 갱신마다 또는 checkpoint_sec 초가 지나면 저장
+    """
+
+    def __init__(self, inputs_col, state_col, window: int = WINDOW, checkpoint_every: int = 10, checkpoint_sec: float = 30.0):
+        self.inputs_col = inputs_col
+        self.state_col = state_col
+        self.window = int(window)
+        self.checkpoint_every = int(checkpoint_every)
+        self.checkpoint_sec = float(checkpoint_sec)
+        self._states = {}
+        self._locks = {}
+        self._last_checkpoint = {}
+
+    async def _rebuild(self, rpm) -> DriftState:
+        total = await self.inputs_col.count_documents({"rpm": rpm})
+        proj = {"error_val": 1, "_id": 0}  # rpm_created_at 인덱스로 covered scan
+        recent = await self.inputs_col.find({"rpm": rpm}, proj).sort("created_at", -1).limit(self.window).to_list(length=self.window)
+        first = await self.inputs_col.find({"rpm": rpm}, proj).sort("created_at", 1).limit(self.window).to_list(length=self.window)
+        recent_err = [d.get("error_val", 0) for d in reversed(recent)]
+        base_err = [d.get("error_val", 0) for d in first]
+        return DriftState.from_errors(rpm, total, recent_err, base_err, len(base_err) == self.window, self.window)
+
+    async def get(self, rpm) -> DriftState:
+        rpm = str(rpm)
+        st = self._states.get(rpm)
+        if st is not None:
+            return st
+        lock = self._locks.setdefault(rpm, asyncio.Lock())
+        async with lock:
+            st = self._states.get(rpm)
+            if st is not None:
+                return st
+            doc = await self.state_col.find_one({"_id": rpm})
+            total = await self.inputs_col.count_documents({"rpm": rpm})
+            if doc is not None and doc.get("total_count") == total:
+                st = DriftState.from_doc(doc, self.window)
+            else:
+                # 체크포인트가 없거나 이후 저장분이 반영되지 않은 경우 한 번만 다시 구성
+                st = await self._rebuild(rpm)
+                await self._save(st)
+            self._states[rpm] = st
+            self._last_checkpoint[rpm] = time.monotonic()
+            return st
+
+    async def load(self, rpms) -> dict:
+        """RPM 목록의 상태를 미리 읽어 둡니다. 반환: {rpm: total_count}"""
+        return {str(r): (await self.get(r)).total_count for r in rpms}
+
+    async def observe(self, rpm, errors) -> dict:
+        """새로 저장된 문서들의 오차를 반영하고 재학습 판단 결과를 반환합니다."""
+        st = await self.get(rpm)
+        errors = list(errors)
+        for e in errors:
+            st.update(e)
+        decision = st.evaluate(inserted=len(errors))
+        if st.dirty >= self.checkpoint_every or time.monotonic() - self._last_checkpoint.get(st.rpm, 0.0) >= self.checkpoint_sec:
+            await self._save(st)
+        return decision
+
+    async def _save(self, st: DriftState):
+        st.dirty = 0
+        self._last_checkpoint[st.rpm] = time.monotonic()
+        await self.state_col.replace_one({"_id": st.rpm}, st.to_doc(), upsert=True)
+
+    async def checkpoint(self):
+        """변경분이 있는 모든 RPM 상태를 저장합니다. (종료 시 호출)"""
+        for st in list(self._states.values()):
+            if st.dirty:
+                await self._save(st)
+
+    async def invalidate(self, rpm):
+        """문서 삭제 등으로 상태가 어긋난 경우 model_inputs 에서 바로 다시 구성합니다."""
+        rpm = str(rpm)
+        self._states.pop(rpm, None)
+        await self.state_col.delete_one({"_id": rpm})
+        await self.get(rpm)
+
+    def snapshot(self, rpm) -> dict:
+        st = self._states.get(str(rpm))
+        if st is None:
+            return None
+        out = st.evaluate(inserted=0)
+        out["recent_n"] = st.n
+        out["baseline_ready"] = st.baseline_sorted is not None
+        return out
+
+
+if __name__ == "__main__":
+    from scipy.stats import ks_2samp
+
+    # 증분 통계가 매번 다시 계산한 값과 같은지 확인
+    rng = np.random.default_rng(0)
+    errors = np.concatenate([rng.gamma(2.0, 0.1, 500), rng.gamma(2.0, 1.5, 500)])
+    st = DriftState("800")
+    t0 = time.perf_counter()
+    for i, e in enumerate(errors, 1):
+        st.update(e)
+        d = st.evaluate()
+        recent = errors[max(0, i - WINDOW):i]
+        assert abs(st.variance - np.var(recent)) < 1e-9, i
+        assert abs(st.tcr - np.mean(recent > ERROR_LIMIT)) < 1e-12, i
+        if i >= WINDOW and np.var(recent) > VAR_LIMIT and np.mean(recent > ERROR_LIMIT) > TCR_LIMIT:
+            _, p = ks_2samp(errors[:WINDOW], recent)
+            assert abs(d["metrics"]["p_value"] - p) < 1e-12, i
+    dt = (time.perf_counter() - t0) / len(errors) * 1e6
+    print(f"OK ({len(errors)} updates, {dt:.1f} us/update incl. evaluate)")
@@ -0,0 +1,171 @@
+# backend/ai_assets/executor.py
+# CPU 연산(파싱 + decimate + FFT 특징 추출)을 이벤트 루프 밖의 프로세스 풀에서 실행합니다.
+# AE 순전파는 메인 프로세스의 MicroBatcher(ai_assets/batcher.py)가 요청을 모아 수행합니다.
+import os
+import time
+import shutil
+import asyncio
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from ai_assets.inference import NutPredictor
+from ai_assets.ingest import StreamingIngest, CHUNK_SIZE
+from ai_assets.captures import CaptureWriter, raw_fs
+
+# 워커 프로세스 전역 상태 (initializer 에서 설정)
+_worker_predictor = None
+
+
+class ExecutorBusy(Exception):
+    """대기열이 가득 찬 경우"""
+
+
+def _init_worker(base_model_dir: str, base_data_dir: str):
+    """워커 시작 시 모든 RPM 모델을 미리 로드합니다."""
+    global _worker_predictor
+    _worker_predictor = NutPredictor(base_model_dir=base_model_dir, base_data_dir=base_data_dir)
+    _worker_predictor.registry.preload()
+
+
+def _run_ingest(predictor, chunks, rpm: str, version, spool_path: str, sha256=None) -> dict:
+    """
+    업로드 청크들을 StreamingIngest 로 처리하고 정규화 전 특징 행렬을 붙여 반환합니다.
+    version: 메인 프로세스가 사용할 모델 버전 (워커가 이전 버전을 들고 있으면 다시 로드)
+    sha256: 메인 프로세스에서 이미 계산한 업로드 해시 (있으면 다시 계산하지 않음)
+    """
+    mv = predictor.get_model(rpm, version)
+    if mv is None:
+        raise ValueError(f"RPM {rpm} 모델을 찾을 수 없습니다.")
+    cfg = mv.config
+
+    with open(spool_path, "wb") as f:
+        # 첫 번째 열을 float32 캡처로 기록 (검증 통과 시 captures.CaptureStore 로 옮김)
+        # 캡처는 decimation 전 원신호이므로 헤더에는 원신호 샘플링 주파수를 기록
+        spool = CaptureWriter(f, rpm, raw_fs(cfg["fs"], cfg["decim"]))
+        ingest = StreamingIngest(cfg["decim"], spool, cfg["cascade"], sha256)
+        for chunk in chunks:
+            ingest.feed(chunk)
+        out = ingest.finish()
+        spool.finish(out["sha256"])
+
+    signal = out.pop("signal")
+    t0 = time.perf_counter()
+    out["features"] = mv.extract_features(signal, decimated=True)
+    out["timings"]["fft_features"] = time.perf_counter() - t0
+    out["model_version"] = mv.version
+    return out
+
+
+def _extract_file(upload_path: str, rpm: str, version, spool_path: str, sha256=None) -> dict:
+    """워커에서 실행: 디스크에 복사된 업로드를 CHUNK_SIZE 단위로 읽어 특징을 추출합니다. (pickle 로 신호를 넘기지 않음)"""
+    with open(upload_path, "rb") as f:
+        return _run_ingest(_worker_predictor, iter(lambda: f.read(CHUNK_SIZE), b""), rpm, version, spool_path, sha256)
+
+
+def _copy_upload(src, path: str):
+    with open(path, "wb") as f:
+        shutil.copyfileobj(src, f, CHUNK_SIZE)
+
+
+def _remove(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class InferenceExecutor:
+    """
+    특징 추출 전용 프로세스 풀.
+    - workers=0 이면 프로세스 없이 스레드에서 실행 (개발/Windows 용)
+    - max_pending 을 넘는 요청은 ExecutorBusy 로 즉시 거절 (대기열 자리는 작업이 실제로 끝날 때 반환)
+    - 요청마다 timeout 초과 시 asyncio.TimeoutError. 대기 중인 작업은 취소하고, 이미 실행 중인 작업은
+      끝난 뒤 spool_path 를 삭제합니다. (워커가 쓰는 도중 호출 측이 지워 .part 파일이 남지 않도록)
+    """
+
+    def __init__(self, base_model_dir, base_data_dir, workers=None, max_pending=32, timeout=60.0, predictor=None):
+        self.base_model_dir = str(base_model_dir)
+        self.base_data_dir = str(base_data_dir)
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        self.max_pending = int(max_pending)
+        self.timeout = float(timeout)
+        self.predictor = predictor  # inline 모드에서 사용
+        self._pool = None
+        self._pending = 0
+
+    def start(self):
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.base_model_dir, self.base_data_dir),
+            )
+            # 워커를 미리 띄워 모델 로드를 끝내 둠 (첫 요청 cold start 방지)
+            for f in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+                f.result()
+        elif self.workers == 0 and self.predictor is None:
+            self.predictor = NutPredictor(base_model_dir=self.base_model_dir, base_data_dir=self.base_data_dir)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, fut, upload_path):
+        """작업 종료(완료 / 실패 / 취소) 시 이벤트 루프에서 호출"""
+        self._pending -= 1
+        _remove(upload_path)
+        if not fut.cancelled():
+            fut.exception()   # 시간 초과로 버려진 작업의 예외가 "never retrieved" 로 남지 않도록
+
+    async def extract_upload(self, upload, rpm: str, spool_path: str, version=None, sha256=None) -> dict:
+        """
+        워커에서 업로드 파싱/decimate/특징 추출을 수행합니다.
+        프로세스 풀에는 업로드를 spool_path 옆 임시 파일(<spool>.upload)로 복사해 경로만 넘기므로,
+        동시 업로드 수와 관계없이 메모리(/dev/shm 포함)에는 CHUNK_SIZE 단위 버퍼만 올라갑니다.
+        반환: sha256, nbytes, n_samples, mean, features (B, F) float32, model_version,
+              timings (단계별 초: upload_read / sha256 / csv_parse / write_back / decimate / fft_features)
+        """
+        if self._pending >= self.max_pending:
+            raise ExecutorBusy(f"추론 대기열이 가득 찼습니다. ({self._pending}/{self.max_pending})")
+        self._pending += 1
+        upload_path = None
+        read_sec = [0.0]
+        cfut = None
+        try:
+            if self._pool is None:
+                # inline 모드: 스레드에서 업로드 파일을 직접 청크 단위로 읽음
+                def read_chunk():
+                    t0 = time.perf_counter()
+                    chunk = upload.file.read(CHUNK_SIZE)
+                    read_sec[0] += time.perf_counter() - t0
+                    return chunk
+
+                fut = asyncio.get_running_loop().run_in_executor(
+                    None, _run_ingest, self.predictor, iter(read_chunk, b""), rpm, version, spool_path, sha256)
+            else:
+                upload_path = spool_path + ".upload"
+                t0 = time.perf_counter()
+                upload.file.seek(0)
+                await asyncio.to_thread(_copy_upload, upload.file, upload_path)
+                read_sec[0] = time.perf_counter() - t0
+                cfut = self._pool.submit(_extract_file, upload_path, rpm, version, spool_path, sha256)
+                fut = asyncio.wrap_future(cfut)
+        except BaseException:
+            self._pending -= 1
+            _remove(upload_path)
+            raise
+        fut.add_done_callback(lambda f: self._release(f, upload_path))
+
+        try:
+            out = await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # 아직 대기열에 있으면 취소, 실행 중이면 끝난 뒤 spool 삭제
+            if cfut is not None:
+                cfut.cancel()
+            fut.add_done_callback(lambda _: _remove(spool_path))
+            raise
+        out["timings"]["upload_read"] = read_sec[0]
+        return out
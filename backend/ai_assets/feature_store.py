@@ -0,0 +1,191 @@
+# backend/ai_assets/feature_store.py
+# 검증 통과 업로드의 정규화 전 log-FFT 특징 저장소 (RPM 별 append-only)
+#
+#   <root>/<rpm>/features.f32    업로드별 (B, D) float32 특징을 이어 붙인 파일
+#   <root>/<rpm>/index.bin       업로드별 고정 길이 레코드 (INDEX_DTYPE): SHA-256, 모델 버전, 전처리 파라미터, 위치
+#
+# /predict 가 채점하면서 만든 특징을 그대로 기록해 두면, 재학습은 같은 전처리(win / hop / decim / cascade)의
+# 특징을 decimation / FFT 없이 순차 읽기로 가져옵니다. 특징은 모델 가중치와 무관하므로 조회 키는
+# (SHA-256, 전처리 파라미터)이며, 모델 버전은 기록 당시 버전으로 함께 남깁니다.
+# 기록은 서버 프로세스 하나만 하고(스레드 잠금), 재학습 등 다른 프로세스는 읽기만 합니다.
+# 업로드 기록이 삭제되면 count=0 인 tombstone 레코드를 추가하며, 그 이전의 같은 SHA-256 레코드는 조회 / 순회 / 통계에서 빠집니다.
+#
+#   python -m ai_assets.feature_store stats --rpm 800
+#   python -m ai_assets.feature_store threshold --rpm 800     # 현재 모델로 저장된 특징의 p95 오차 재계산
+import os
+import time
+import argparse
+import threading
+from pathlib import Path
+import numpy as np
+
+FEATURES_FILE = "features.f32"
+INDEX_FILE = "index.bin"
+INDEX_DTYPE = np.dtype([
+    ("sha256", "S64"),
+    ("version", "S32"),
+    ("win", "<u4"),
+    ("hop", "<u4"),
+    ("decim", "<u4"),
+    ("cascade", "<u4"),
+    ("dim", "<u4"),
+    ("count", "<u4"),     # 윈도우 수 (0 = tombstone: 앞선 같은 SHA-256 레코드 삭제)
+    ("offset", "<u8"),    # features.f32 안의 byte 위치
+    ("created", "<f8"),
+])
+
+
+def prep_key(config) -> tuple:
+    """ModelVersion.config 또는 같은 키를 가진 dict -> (win, hop, decim, cascade)"""
+    return int(config["win"]), int(config["hop"]), int(config["decim"]), bool(config["cascade"])
+
+
+class FeatureStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._cache = {}   # rpm -> (index 파일 크기, 레코드 배열, {(sha, prep): 레코드 번호})
+
+    def _dir(self, rpm) -> Path:
+        return self.root / str(rpm)
+
+    def index(self, rpm):
+        """(레코드 배열, 조회 dict). 파일이 커졌으면(다른 프로세스의 기록 포함) 다시 읽습니다."""
+        path = self._dir(rpm) / INDEX_FILE
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return np.empty(0, dtype=INDEX_DTYPE), {}
+        cached = self._cache.get(str(rpm))
+        if cached is not None and cached[0] == size:
+            return cached[1], cached[2]
+        # 기록 도중 잘린 마지막 레코드는 무시
+        n = size // INDEX_DTYPE.itemsize
+        rows = np.fromfile(path, dtype=INDEX_DTYPE, count=n)
+        lookup, by_sha = {}, {}
+        for i, r in enumerate(rows):
+            sha = r["sha256"].decode("ascii")
+            if int(r["count"]) == 0:
+                for key in by_sha.pop(sha, ()):
+                    del lookup[key]
+                continue
+            key = (sha, (int(r["win"]), int(r["hop"]), int(r["decim"]), bool(r["cascade"])))
+            if key not in lookup:
+                lookup[key] = i
+                by_sha.setdefault(sha, []).append(key)
+        self._cache[str(rpm)] = (size, rows, lookup)
+        return rows, lookup
+
+    def contains(self, rpm, sha256, prep) -> bool:
+        return (sha256, tuple(prep)) in self.index(rpm)[1]
+
+    def get(self, rpm, sha256, prep):
+        """저장된 (B, D) float32 특징 (읽기 전용 memmap) 또는 None"""
+        rows, lookup = self.index(rpm)
+        i = lookup.get((sha256, tuple(prep)))
+        if i is None:
+            return None
+        r = rows[i]
+        count, dim = int(r["count"]), int(r["dim"])
+        return np.memmap(self._dir(rpm) / FEATURES_FILE, dtype=np.float32, mode="r",
+                         offset=int(r["offset"]), shape=(count, dim))
+
+    def append(self, rpm, sha256, version, prep, feats) -> bool:
+        """특징을 뒤에 붙이고 레코드를 기록합니다. 같은 (SHA-256, 전처리)가 이미 있으면 False"""
+        feats = np.ascontiguousarray(feats, dtype=np.float32)
+        if feats.ndim != 2 or len(feats) == 0:
+            return False
+        win, hop, decim, cascade = prep
+        d = self._dir(rpm)
+        with self._lock:
+            if self.contains(rpm, sha256, prep):
+                return False
+            d.mkdir(parents=True, exist_ok=True)
+            # 특징을 먼저 기록한 뒤 레코드를 추가 (중간에 멈추면 참조되지 않는 특징만 남음)
+            with open(d / FEATURES_FILE, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(feats.data)
+            rec = np.zeros(1, dtype=INDEX_DTYPE)
+            rec[0] = (sha256.encode("ascii"), str(version).encode("ascii")[:32], win, hop, decim, int(cascade),
+                      feats.shape[1], len(feats), offset, time.time())
+            self._write_record(d, rec)
+        return True
+
+    def forget(self, rpm, sha256) -> bool:
+        """업로드 기록 삭제 시 tombstone 추가 (특징 데이터는 append-only 라 그대로 두고 참조만 끊음)"""
+        with self._lock:
+            if not any(k[0] == sha256 for k in self.index(rpm)[1]):
+                return False
+            rec = np.zeros(1, dtype=INDEX_DTYPE)
+            rec[0]["sha256"] = sha256.encode("ascii")
+            rec[0]["created"] = time.time()
+            self._write_record(self._dir(rpm), rec)
+        return True
+
+    @staticmethod
+    def _write_record(d, rec):
+        with open(d / INDEX_FILE, "r+b" if (d / INDEX_FILE).exists() else "wb") as f:
+            # 잘린 마지막 레코드가 있으면 덮어씀
+            f.seek(f.seek(0, os.SEEK_END) // INDEX_DTYPE.itemsize * INDEX_DTYPE.itemsize)
+            f.write(rec.tobytes())
+            f.truncate()
+
+    def stats(self, rpm) -> dict:
+        rows, lookup = self.index(rpm)
+        rows = rows[sorted(lookup.values())]   # tombstone 으로 지워진 레코드 제외
+        by_prep = {}
+        for r in rows:
+            key = f"win={int(r['win'])},hop={int(r['hop'])},decim={int(r['decim'])},cascade={bool(r['cascade'])}"
+            s = by_prep.setdefault(key, {"uploads": 0, "windows": 0})
+            s["uploads"] += 1
+            s["windows"] += int(r["count"])
+        path = self._dir(rpm) / FEATURES_FILE
+        return {
+            "rpm": str(rpm),
+            "uploads": int(len(rows)),
+            "windows": int(rows["count"].sum()) if len(rows) else 0,
+            "bytes": path.stat().st_size if path.exists() else 0,
+            "by_preprocessing": by_prep,
+        }
+
+    def iter_features(self, rpm, prep):
+        """전처리가 같은 레코드를 기록 순서대로 (레코드, 특징) 로 돌려줍니다. (삭제된 업로드 제외)"""
+        rows, lookup = self.index(rpm)
+        for r in rows[sorted(lookup.values())]:
+            if (int(r["win"]), int(r["hop"]), int(r["decim"]), bool(r["cascade"])) == tuple(prep):
+                yield r, self.get(rpm, r["sha256"].decode("ascii"), prep)
+
+
+def main():
+    import json
+    from ai_assets.registry import ModelRegistry
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    default_root = os.getenv("FEATURE_STORE_DIR") or str(backend_dir / "ai_assets" / "feature_store")
+    ap = argparse.ArgumentParser(description="업로드 특징 저장소 조회")
+    ap.add_argument("cmd", choices=["stats", "threshold"])
+    ap.add_argument("--rpm", required=True)
+    ap.add_argument("--root", default=default_root)
+    ap.add_argument("--percentile", type=float, default=95.0)
+    args = ap.parse_args()
+
+    store = FeatureStore(args.root)
+    if args.cmd == "stats":
+        print(json.dumps(store.stats(args.rpm), indent=2))
+        return
+
+    # 현재 모델로 저장된 특징 전체의 재구성 오차 분위수 (threshold 재계산)
+    mv = ModelRegistry(backend_dir / "ai_assets" / "RPM_model", backend_dir / "ai_assets" / "data_proc_rpm").get(args.rpm)
+    if mv is None:
+        raise SystemExit(f"RPM {args.rpm} 모델을 찾을 수 없습니다.")
+    errs = [mv.engine.reconstruction_error(mv.normalize(np.asarray(X))) for _, X in store.iter_features(args.rpm, prep_key(mv.config))]
+    if not errs:
+        raise SystemExit("현재 모델과 전처리가 같은 저장 특징이 없습니다.")
+    err = np.concatenate(errs)
+    thr = float(np.percentile(err, args.percentile))
+    print(f"RPM {args.rpm} model {mv.version}: {len(errs)} uploads / {len(err)} windows | "
+          f"p{args.percentile:g} {thr:.6f} (current threshold {mv.threshold:.6f}, {thr / mv.threshold - 1.0:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
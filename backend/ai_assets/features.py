@@ -0,0 +1,93 @@
+# backend/ai_assets/features.py
+# 학습(Trainingpy/01_prepare_data.py)과 서빙(NutPredictor)이 공유하는 특징 추출 모듈
+# Decimate -> 평균 제거 -> Windowing -> rFFT -> log1p
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ai_assets.decimation import decimate
+
+
+def preprocess_signal(x: np.ndarray, decim: int, cascade: bool = True) -> np.ndarray:
+    """
+    (N,) 또는 (N,C) 원신호를 float32 로 decimate 한 뒤 채널별 평균을 제거합니다.
+    cascade=False 는 scipy.signal.decimate(ftype="fir") 와 같은 단일 단계 필터 (기존 모델 호환)
+    """
+    x = np.asarray(x, dtype=np.float32)
+    if decim > 1:
+        # polyphase FIR (ai_assets/decimation.py, 채널은 axis=0 으로 한 번에 처리)
+        x = decimate(x, decim, cascade=cascade)
+    return x - x.mean(axis=0, keepdims=True)
+
+
+def frame_signal(x: np.ndarray, win: int, hop: int) -> np.ndarray:
+    """
+    복사 없이 strided view 로 윈도우를 만듭니다.
+    (N,) -> (B, win),  (N,C) -> (B, win, C)
+    """
+    if x.shape[0] < win:
+        return np.empty((0, win) + x.shape[1:], dtype=x.dtype)
+    frames = sliding_window_view(x, win, axis=0)[::hop]  # (B, [C,] win)
+    if x.ndim == 2:
+        frames = frames.transpose(0, 2, 1)               # (B, win, C)
+    return frames
+
+
+def n_features(win: int, channels: int = 1) -> int:
+    return (win // 2 + 1) * channels
+
+
+def log_fft_features(frames: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    frames (B, win[, C]) -> (B, F*C) float32 log1p(|rFFT|).
+    out 이 주어지면 magnitude 와 log1p 를 그 버퍼에 in-place 로 계산합니다.
+    """
+    fft = np.fft.rfft(frames, axis=1)                    # (B, F[, C]) complex64
+    if out is None:
+        out = np.empty((fft.shape[0], int(np.prod(fft.shape[1:]))), dtype=np.float32)
+    mag = out.reshape(fft.shape)
+    np.abs(fft, out=mag)
+    np.log1p(mag, out=mag)                               # 안정적 로그
+    return out
+
+
+def extract_features(x: np.ndarray, win: int, hop: int, decim: int = 1, out: np.ndarray = None,
+                     cascade: bool = True) -> np.ndarray:
+    """원신호 -> (B, F*C) 특징 행렬 (학습/추론 공통 경로)"""
+    x = preprocess_signal(x, decim, cascade)
+    frames = frame_signal(x, win, hop)
+    if out is not None:
+        out = out[:frames.shape[0]]
+    return log_fft_features(frames, out=out)
+
+
+class FeatureExtractor:
+    """
+    서빙용 특징 추출기. 출력 버퍼를 스레드마다 재사용하므로
+    반환된 배열은 같은 스레드에서 다음 호출 전까지만 유효합니다.
+    """
+
+    def __init__(self, win: int, hop: int, decim: int = 1, channels: int = 1, cascade: bool = True):
+        self.win = int(win)
+        self.hop = int(hop)
+        self.decim = int(decim)
+        self.cascade = bool(cascade)
+        self.dim = n_features(self.win, channels)
+        self._local = threading.local()
+
+    def _buffer(self, n_windows: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n_windows:
+            buf = np.empty((max(n_windows, 64), self.dim), dtype=np.float32)
+            self._local.buf = buf
+        return buf[:n_windows]
+
+    def n_windows(self, n_samples: int) -> int:
+        if n_samples < self.win:
+            return 0
+        return (n_samples - self.win) // self.hop + 1
+
+    def transform(self, x: np.ndarray, decimated: bool = False) -> np.ndarray:
+        """decimated=True 이면 이미 decimate 된 신호(StreamingDecimator 출력)로 보고 평균 제거부터 수행합니다."""
+        x = preprocess_signal(x, 1 if decimated else self.decim, self.cascade)
+        frames = frame_signal(x, self.win, self.hop)
+        return log_fft_features(frames, out=self._buffer(frames.shape[0]))
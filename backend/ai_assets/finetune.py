@@ -0,0 +1,110 @@
+# backend/ai_assets/finetune.py
+# 현재 모델 가중치에서 시작하는 AutoEncoder 미세 조정 (새 데이터 + 이전 데이터 replay 샘플)
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from sklearn.neural_network import MLPRegressor
+from ai_assets.ae_engine import AEEngine
+from ai_assets.artifact import ARTIFACT_FILE, load_artifact
+from ai_assets.registry import MODEL_FILE
+
+REPLAY_FILE = "replay.npy"     # 버전 폴더에 저장하는 이전 학습 특징 샘플 (정규화 전 float32)
+REPLAY_WINDOWS = 2000          # replay 샘플 최대 윈도우 수
+
+
+@contextmanager
+def quiet_batch_clip():
+    """batch_size 보다 작은 배치를 partial_fit 할 때 sklearn 이 batch 를 줄이며 내는 경고만 숨김"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Got `batch_size`", category=UserWarning)
+        yield
+
+
+def load_weights(model_dir):
+    """모델 폴더의 model.nutae (없으면 ae_sklearn.npz) -> (coefs, intercepts) float64 리스트"""
+    model_dir = Path(model_dir)
+    if (model_dir / ARTIFACT_FILE).exists():
+        art = load_artifact(model_dir / ARTIFACT_FILE)
+        return ([np.array(w, dtype=np.float64) for w in art.coefs],
+                [np.array(b, dtype=np.float64) for b in art.intercepts])
+    mdl = np.load(str(model_dir / MODEL_FILE), allow_pickle=True)
+    coefs = [np.asarray(w, dtype=np.float64) for w in mdl["coefs"]]
+    intercepts = [np.asarray(b, dtype=np.float64) for b in mdl["intercepts"]]
+    return coefs, intercepts
+
+
+def warm_start_regressor(coefs, intercepts, learning_rate_init=1e-4, batch_size=256, random_state=42) -> MLPRegressor:
+    """
+    저장된 가중치로 초기화된 MLPRegressor 를 만듭니다. (이후 partial_fit 으로 학습)
+    partial_fit 1회로 내부 속성을 만든 뒤 가중치를 같은 배열에 in-place 로 덮어쓰고,
+    Adam 상태는 다음 partial_fit 에서 새로 만들어지도록 초기화합니다.
+    """
+    hidden = tuple(w.shape[1] for w in coefs[:-1])
+    n_features = coefs[0].shape[0]
+    ae = MLPRegressor(hidden_layer_sizes=hidden, activation="relu", solver="adam",
+                      learning_rate_init=learning_rate_init, batch_size=batch_size,
+                      random_state=random_state)
+    dummy = np.zeros((2, n_features))
+    with quiet_batch_clip():
+        ae.partial_fit(dummy, dummy)
+    for dst, src in zip(ae.coefs_ + ae.intercepts_, list(coefs) + list(intercepts)):
+        if dst.shape != src.shape:
+            raise ValueError(f"가중치 크기가 다릅니다: {dst.shape} != {src.shape}")
+        dst[...] = src
+    del ae._optimizer
+    ae.n_iter_ = 0
+    ae.loss_curve_ = []
+    return ae
+
+
+def validation_error(ae, X) -> float:
+    return float(AEEngine(ae.coefs_, ae.intercepts_).reconstruction_error(X).mean())
+
+
+def fine_tune(ae, X_train, X_val, max_epochs=30, patience=3, tol=1e-3, random_state=42) -> dict:
+    """
+    mini-batch(partial_fit) 로 epoch 단위 학습. 검증 오차가 tol(상대) 이상 줄지 않는 epoch 가
+    patience 번 이어지면 멈추고, 가장 좋았던 가중치로 되돌립니다.
+    """
+    rng = np.random.default_rng(random_state)
+    batch = ae.batch_size
+    best = validation_error(ae, X_val)
+    curve = [best]
+    best_params = [p.copy() for p in ae.coefs_ + ae.intercepts_]
+    best_epoch, bad = 0, 0
+
+    for epoch in range(1, max_epochs + 1):
+        order = rng.permutation(len(X_train))
+        for s in range(0, len(order), batch):
+            Xb = X_train[order[s:s + batch]]
+            with quiet_batch_clip():
+                ae.partial_fit(Xb, Xb)
+        err = validation_error(ae, X_val)
+        curve.append(err)
+        if err < best * (1.0 - tol):
+            best, best_epoch, bad = err, epoch, 0
+            best_params = [p.copy() for p in ae.coefs_ + ae.intercepts_]
+        else:
+            bad += 1
+            if bad >= patience:
+                break
+
+    for dst, src in zip(ae.coefs_ + ae.intercepts_, best_params):
+        dst[...] = src
+    return {
+        "epochs": len(curve) - 1,
+        "best_epoch": best_epoch,
+        "stopped_early": len(curve) - 1 < max_epochs,
+        "val_error_start": curve[0],
+        "val_error_best": best,
+        "val_curve": [round(v, 6) for v in curve],
+    }
+
+
+def sample_replay(X, n=REPLAY_WINDOWS, random_state=42) -> np.ndarray:
+    """X 에서 최대 n 개 윈도우를 무작위로 뽑아 float32 로 반환합니다."""
+    if len(X) <= n:
+        return np.ascontiguousarray(X, dtype=np.float32)
+    idx = np.sort(np.random.default_rng(random_state).choice(len(X), n, replace=False))
+    return np.ascontiguousarray(X[idx], dtype=np.float32)
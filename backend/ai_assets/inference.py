@@ -1,11 +1,11 @@
 # backend/ai_assets/inference.py
 import numpy as np
 import json
+import math
 import os
 from pathlib import Path
-from scipy.signal import decimate
-from sklearn.neural_network import MLPRegressor
-from scipy.stats import ks_2samp
+from ai_assets.registry import ModelRegistry
+from ai_assets.metrics import STAGE_SECONDS, WINDOWS
 class Monitor:
     def __init__(self, threshold=0.5):
         self.threshold = threshold
@@ -25,6 +25,7 @@ class Monitor:
         # 3. Error Distribution Shape (KS Test)
         # 과거 오차 분포와 현재 오차 분포가 통계적으로 다른지 확인
         if len(self.baseline_errors) > 0:
+            from scipy.stats import ks_2samp   # scipy.stats 는 import 가 무거워 사용할 때 로드
             _, p_value = ks_2samp(self.baseline_errors, errors)
             shape_collapsed = p_value < 0.05  # 분포가 유의미하게 변함
         else:
@@ -50,122 +51,174 @@ class NutPredictor:
         """
         self.base_model_dir = Path(base_model_dir)
         self.base_data_dir = Path(base_data_dir)
-        self.models = {}   # 로드된 모델 캐싱
-        self.configs = {}  # RPM별 전처리 설정 캐싱
+        # RPM 별 모델 버전 관리 (사전 로드 / 변경 감지 / 원자적 교체)
+        self.registry = ModelRegistry(self.base_model_dir, self.base_data_dir)
 
     def load_model(self, rpm):
         """특정 RPM에 해당하는 모델과 설정 파일을 로드합니다."""
-        rpm_str = str(rpm)
-        model_folder = f"model_{rpm_str}"
-        
-        # pathlib을 사용하여 경로 결합
-        model_path = self.base_model_dir / model_folder / "ae_sklearn.npz"
-        thr_path = self.base_model_dir / model_folder / "threshold.json"
-        data_path = self.base_data_dir / rpm_str / "dataset.npz"
-
-        if not model_path.exists():
-            print(f"Error: Model not found at {model_path}")
+        mv = self.registry.get(rpm)
+        if mv is None:
             return None, None
+        return mv.engine, mv.config
 
-        # 1. 전처리 기준 및 Threshold 로드
-        try:
-            data_info = np.load(str(data_path), allow_pickle=True)
-            with open(thr_path, "r", encoding="utf-8") as f:
-                thr_data = json.load(f)
-        except Exception as e:
-            print(f"Error loading data info or threshold: {e}")
-            return None, None
-
-        config = {
-            "mean": data_info["mean"],
-            "std": data_info["std"],
-            "win": int(data_info["win"]),
-            "hop": int(data_info["hop"]),
-            "decim": int(data_info["decim"]),
-            "threshold": float(thr_data["threshold"])
-        }
-
-        # 2. 모델 가중치 복원
-        try:
-            model_npz = np.load(str(model_path), allow_pickle=True)
-            hidden = tuple(model_npz["hidden"])
-            
-            ae = MLPRegressor(hidden_layer_sizes=hidden)
-            
-            # 가중치 직접 주입
-            ae.coefs_ = list(model_npz["coefs"])
-            ae.intercepts_ = list(model_npz["intercepts"])
-            ae.n_layers_ = len(ae.coefs_) + 1
-            ae.n_outputs_ = ae.coefs_[-1].shape[1]  # 출력 노드 수 설정
-            ae.out_activation_ = "identity" 
-
-            self.models[rpm_str] = ae
-            self.configs[rpm_str] = config
-            return ae, config
-        except Exception as e:
-            print(f"Error restoring model weights: {e}")
-            return None, None
-    
-    def predict(self, df_signal, rpm):
+    def get_model(self, rpm, version=None):
+        """
+        현재 서비스 중인 ModelVersion 을 반환합니다. (없으면 None)
+        version 이 주어지면 해당 버전이 될 때까지 다시 로드합니다. (워커 프로세스 동기화용)
+        """
+        mv = self.registry.get(rpm)
+        if mv is not None and version is not None and mv.version != version:
+            mv = self.registry.reload(rpm)
+            if mv is None or mv.version != version:
+                raise RuntimeError(f"RPM {rpm} 모델 버전 불일치 (요청: {version}, 로드: {mv and mv.version})")
+        return mv
+
+    def get_config(self, rpm):
+        """RPM 전처리 설정을 반환합니다. (필요 시 모델 로드, 없으면 None)"""
+        mv = self.registry.get(rpm)
+        return mv.config if mv is not None else None
+
+    def predict(self, df_signal, rpm, mode="full"):
         """입력 신호(DataFrame)에 대해 윈도우별 FFT 추론을 수행합니다."""
-        rpm_str = str(rpm)
-        
-        if rpm_str not in self.models:
-            res = self.load_model(rpm_str)
-            if res[0] is None: return None
+        # DataFrame에서 첫 번째 컬럼 추출
+        x = df_signal.iloc[:, 0].to_numpy(dtype=np.float32)
+        return self.predict_signal(x, rpm, mode=mode)
 
-        cfg = self.configs[rpm_str]
-        ae = self.models[rpm_str]
+    def extract_features(self, x, rpm, decimated=False, version=None):
+        """
+        Decimate -> Mean Removal -> Windowing(strided view) -> FFT -> Log1p  (B, F)
+        정규화 전 특징을 새 배열로 반환합니다. (모델이 없으면 None)
+        """
+        mv = self.get_model(rpm, version)
+        if mv is None: return None
+        return mv.extract_features(x, decimated=decimated)
 
-        # 1. 원시 신호 전처리
-        # DataFrame에서 첫 번째 컬럼 추출
-        x = df_signal.iloc[:, 0].astype(np.float32).values.reshape(-1, 1)
-        
-        # Decimate
-        if cfg["decim"] > 1:
-            # decimate는 1D 배열을 기대하므로 x[:, 0] 전달
-            x_dec = decimate(x[:, 0], cfg["decim"], ftype="fir", zero_phase=True)
-            x = x_dec.reshape(-1, 1)
-        
-        # Mean Removal
-        x = x - np.mean(x)
-
-        # 2. Windowing
-        frames = []
-        win, hop = cfg["win"], cfg["hop"]
-        for i in range(0, len(x) - win + 1, hop):
-            frames.append(x[i : i + win])
-        
-        frames = np.asarray(frames, dtype=np.float32)
-        if len(frames) == 0: return None
+    def predict_signal(self, x, rpm, decimated=False, mode="full"):
+        """
+        1차원 신호에 대해 추론합니다.
+        decimated=True 이면 스트리밍 업로드(ai_assets/ingest.py)에서 이미 decimate 된 신호로 간주합니다.
+        mode: full / columnar / summary (format_window_results)
+        """
+        mv = self.registry.get(rpm)
+        if mv is None: return None
 
-        # 3. FFT -> Log1p Feature 추출 (B, Win, 1) -> (B, F)
-        fft = np.fft.rfft(frames, axis=1)
-        mag = np.abs(fft)
-        feat = np.log1p(mag).reshape(len(frames), -1)
+        # 1~3. Decimate -> Mean Removal -> Windowing(strided view) -> FFT -> Log1p  (B, F)
+        with STAGE_SECONDS.time("predictor", "features"):
+            feat = mv.config["extractor"].transform(x, decimated=decimated)
+        if len(feat) == 0: return None
 
-        # 4. Normalization
-        # mean, std가 (F,) 형태여야 하므로 차원 확인
-        Xn = (feat - cfg["mean"]) / (cfg["std"] + 1e-9) # 0 나누기 방지
+        # 4. Normalization (특징 버퍼에서 in-place 로 수행)
+        with STAGE_SECONDS.time("predictor", "normalize"):
+            Xn = mv.normalize(feat, inplace=True)
 
-        # 5. Inference & Reconstruction Error (MSE)
+        # 5. Inference & Reconstruction Error (MSE) - 순전파와 오차 계산을 한 번에 수행
         try:
-            X_recon = ae.predict(Xn)
-            recon_err = np.mean((Xn - X_recon) ** 2, axis=1)
+            with STAGE_SECONDS.time("predictor", "inference"):
+                recon_err = mv.engine.reconstruction_error(Xn)
         except Exception as e:
             print(f"Inference Error: {e}")
             return None
+        WINDOWS.inc("predictor", mv.rpm, value=len(recon_err))
         
-        # 6. 결과 생성 (FastAPI/Frontend 형식 일치)
-        results = []
-        for i, err in enumerate(recon_err):
-            # float() 변환으로 JSON 직렬화 보장
-            err_val = float(err)
-            results.append({
-                "window_index": i,
-                "error": err_val,
-                "threshold": cfg["threshold"],
-                "is_anomaly": bool(err_val > cfg["threshold"])
-            })
-        
-        return results
\ No newline at end of file
+        # 6. 결과 생성 (full: FastAPI/Frontend 형식 일치, columnar / summary: 압축 형식)
+        return format_window_results(recon_err, mv.threshold, mode)
+
+
+RESPONSE_MODES = ("full", "columnar", "summary", "ndjson")
+TOP_K = 10            # summary 모드의 오차 상위 윈도우 수
+NDJSON_BLOCK = 4096   # ndjson 모드에서 한 번에 만들어 보내는 줄 수
+
+
+def anomaly_flags(recon_err, threshold) -> np.ndarray:
+    """윈도우별 이상 여부 (오차를 float64 로 올려 threshold 와 비교)"""
+    return np.asarray(recon_err, dtype=np.float64) > threshold
+
+
+def format_results(recon_err, threshold):
+    """윈도우별 오차 배열을 FastAPI/Frontend 응답 형식(dict 리스트)으로 변환합니다."""
+    # tolist() 로 한 번에 Python float / bool 로 변환 (JSON 직렬화 보장)
+    errors = np.asarray(recon_err, dtype=np.float64).tolist()
+    flags = anomaly_flags(recon_err, threshold).tolist()
+    return [
+        {"window_index": i, "error": e, "threshold": threshold, "is_anomaly": a}
+        for i, (e, a) in enumerate(zip(errors, flags))
+    ]
+
+
+def format_columnar(recon_err, threshold) -> dict:
+    """윈도우별 결과를 열 배열로 반환합니다. (threshold 는 한 번만)"""
+    return {
+        "threshold": threshold,
+        "windows": int(len(recon_err)),
+        "errors": np.asarray(recon_err, dtype=np.float64).tolist(),
+        "is_anomaly": anomaly_flags(recon_err, threshold).tolist(),
+    }
+
+
+def summarize_errors(recon_err, threshold, top_k=TOP_K) -> dict:
+    """
+    Trainingpy/03_score_sklearn.py 의 케이스 요약과 같은 지표 + 오차 상위 top_k 윈도우.
+    is_anomaly: p95 오차가 threshold 를 넘는지 여부
+    """
+    err = np.asarray(recon_err, dtype=np.float64)
+    if err.size == 0:
+        return {"windows": 0, "threshold": threshold}
+    flags = err > threshold
+    p95, p99 = np.percentile(err, [95, 99])
+    k = min(int(top_k), err.size)
+    top = np.argpartition(-err, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+    top = top[np.argsort(-err[top], kind="stable")]
+    return {
+        "windows": int(err.size),
+        "threshold": threshold,
+        "err_mean": float(err.mean()),
+        "err_p95": float(p95),
+        "err_p99": float(p99),
+        "err_max": float(err.max()),
+        "anomaly_windows": int(flags.sum()),
+        "anomaly_ratio": float(flags.mean()),
+        "is_anomaly": bool(p95 > threshold),
+        "top_windows": [{"window_index": int(i), "error": float(err[i])} for i in top],
+    }
+
+
+def format_window_results(recon_err, threshold, mode="full"):
+    """mode: full (dict 리스트) / columnar / summary. ndjson 은 iter_ndjson 으로 직렬화합니다."""
+    if mode == "full":
+        return format_results(recon_err, threshold)
+    if mode == "columnar":
+        return format_columnar(recon_err, threshold)
+    if mode == "summary":
+        return summarize_errors(recon_err, threshold)
+    raise ValueError(f"지원하지 않는 응답 형식입니다: {mode} ({', '.join(RESPONSE_MODES)})")
+
+
+def _json_finite(obj):
+    """nan / inf float 을 None 으로 바꾼 사본 (dict / list 재귀)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_finite(v) for v in obj]
+    return obj
+
+
+def iter_ndjson(header: dict, recon_err, threshold, block=NDJSON_BLOCK):
+    """
+    첫 줄은 header(요청 정보 + summary), 이후 윈도우마다 한 줄씩 NDJSON 으로 내보냅니다.
+    윈도우 줄은 block 개씩 모아 문자열로 만들어 응답 버퍼를 작게 유지합니다.
+    """
+    yield json.dumps(_json_finite(header), ensure_ascii=False, allow_nan=False) + "\n"
+    err = np.asarray(recon_err, dtype=np.float64)
+    flags = anomaly_flags(err, threshold)
+    # nan / inf 는 JSON 토큰이 아니므로 null 로 기록 (입력에 "nan" 이 있어도 파싱은 통과함)
+    finite = np.isfinite(err)
+    for s in range(0, err.size, block):
+        errs = err[s:s + block].tolist()
+        if not finite[s:s + block].all():
+            errs = [e if f else None for e, f in zip(errs, finite[s:s + block].tolist())]
+        yield "".join(
+            f'{{"window_index":{i},"error":{"null" if e is None else repr(e)},"is_anomaly":{"true" if a else "false"}}}\n'
+            for i, e, a in zip(range(s, s + block), errs, flags[s:s + block].tolist())
+        )
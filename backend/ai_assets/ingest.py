@@ -0,0 +1,126 @@
+# backend/ai_assets/ingest.py
+# /predict 업로드를 청크 단위로 읽으면서 SHA-256, 숫자 파싱, decimation 을 한 번에 처리합니다.
+import time
+import hashlib
+from io import BytesIO
+import numpy as np
+from ai_assets.decimation import StreamingDecimator
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+class CsvColumnParser:
+    """
+    헤더 없는 CSV 를 청크 단위로 받아 첫 번째 열만 float64 로 파싱합니다.
+    청크 경계에서 잘린 마지막 줄은 다음 청크와 합쳐서 처리합니다.
+    """
+
+    def __init__(self):
+        self._tail = b""
+
+    @staticmethod
+    def _parse(block: bytes):
+        if b"," not in block:
+            # 빠른 경로: 단일 열 (권장 업로드 형식)
+            return np.array(block.split(), dtype=np.float64)
+        # 다중 열: 첫 번째 열만 사용 (app.py 의 1컬럼 강제 추출과 동일)
+        return np.loadtxt(BytesIO(block), delimiter=",", usecols=0, dtype=np.float64, ndmin=1)
+
+    def feed(self, chunk: bytes) -> np.ndarray:
+        """반환: 완성된 줄들의 첫 번째 열 (float64)"""
+        data = self._tail + chunk
+        cut = data.rfind(b"\n") + 1
+        self._tail = data[cut:]
+        if cut == 0:
+            return np.empty(0, dtype=np.float64)
+        return self._parse(data[:cut])
+
+    def flush(self) -> np.ndarray:
+        data, self._tail = self._tail, b""
+        if not data.strip():
+            return np.empty(0, dtype=np.float64)
+        return self._parse(data + b"\n")
+
+
+class StreamingIngest:
+    """
+    업로드 스트림 처리기.
+    - SHA-256 을 청크마다 갱신 (sha256 이 주어지면 이미 계산된 값으로 보고 생략)
+    - 첫 번째 열의 평균(유사성 검사용)을 누적 계산
+    - 샘플은 float32 로 바로 StreamingDecimator 에 전달 (원신호 전체를 메모리에 두지 않음)
+    - spool(captures.CaptureWriter)이 주어지면 첫 번째 열을 float32 로 기록 (검증 통과 시 저장 파일로 사용)
+    평균 제거는 decimate 이후 전체 평균이 필요하므로 decimate 된 신호(원신호의 1/decim)만 보관합니다.
+    단계별 누적 시간(초)은 timings 에 기록됩니다. (ai_assets/metrics.py)
+    """
+
+    def __init__(self, decim: int, spool=None, cascade: bool = True, sha256=None):
+        self.sha = hashlib.sha256() if sha256 is None else None
+        self.known_sha256 = sha256
+        self.parser = CsvColumnParser()
+        self.decimator = StreamingDecimator(decim, cascade=cascade)
+        self.spool = spool
+        self.nbytes = 0
+        self.n_samples = 0
+        self._sum = 0.0
+        self._dec_chunks = []
+        self.timings = {"sha256": 0.0, "csv_parse": 0.0, "write_back": 0.0, "decimate": 0.0}
+        if self.sha is None:
+            del self.timings["sha256"]
+
+    def _consume(self, values):
+        if values.size == 0:
+            return
+        self.n_samples += values.size
+        self._sum += float(values.sum())
+        x = values.astype(np.float32)
+        t0 = time.perf_counter()
+        if self.spool is not None:
+            self.spool.write(x)
+        t1 = time.perf_counter()
+        y = self.decimator.process(x)
+        if y.size:
+            self._dec_chunks.append(y)
+        self.timings["write_back"] += t1 - t0
+        self.timings["decimate"] += time.perf_counter() - t1
+
+    def _parse(self, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        self.timings["csv_parse"] += time.perf_counter() - t0
+        return out
+
+    def feed(self, chunk: bytes):
+        self.nbytes += len(chunk)
+        if self.sha is not None:
+            t0 = time.perf_counter()
+            self.sha.update(chunk)
+            self.timings["sha256"] += time.perf_counter() - t0
+        self._consume(self._parse(self.parser.feed, chunk))
+
+    def finish(self) -> dict:
+        self._consume(self._parse(self.parser.flush))
+        t0 = time.perf_counter()
+        tail = self.decimator.flush()
+        self.timings["decimate"] += time.perf_counter() - t0
+        if tail.size:
+            self._dec_chunks.append(tail)
+        signal = np.concatenate(self._dec_chunks) if self._dec_chunks else np.empty(0, dtype=np.float32)
+        return {
+            "sha256": self.known_sha256 if self.sha is None else self.sha.hexdigest(),
+            "nbytes": self.nbytes,
+            "n_samples": self.n_samples,
+            "mean": self._sum / self.n_samples if self.n_samples else float("nan"),
+            "signal": signal,  # decimate 된 float32 신호 (평균 제거 전)
+            "timings": dict(self.timings),
+        }
+
+
+def read_column_csv(path, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """저장된 업로드 CSV(validated_data)의 첫 번째 열을 float64 로 읽습니다."""
+    parser = CsvColumnParser()
+    parts = []
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            parts.append(parser.feed(chunk))
+    parts.append(parser.flush())
+    return np.concatenate(parts)
@@ -0,0 +1,259 @@
+# backend/ai_assets/metrics.py
+# 단계별 지연 시간 / 처리량 계측과 Prometheus text format(0.0.4) 출력 (/metrics)
+#
+# 기록은 perf_counter 두 번 + 구간 탐색(bisect) + 덧셈뿐이며, 문자열 생성은 /metrics 요청 때만 합니다.
+# 워커 프로세스에서 잰 단계 시간(ingest 의 "timings")은 결과와 함께 돌려받아 메인 프로세스에서 기록합니다.
+import time
+import threading
+from bisect import bisect_left
+
+# 초 단위 지연 구간 (0.1 ms ~ 30 s)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_text(names, values, extra="") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()   # 추론 스레드(inline executor / to_thread)에서도 기록됨
+        self._values = {}
+
+    def _check(self, values):
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name}: 레이블 {self.labels} 가 필요합니다. (받은 값 {values})")
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, value=1.0):
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_label_text(self.labels, k)} {_num(v)}" for k, v in items]
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._le = [f'le="{_num(b)}"' for b in self.buckets] + ['le="+Inf"']
+
+    def observe(self, value, *labels):
+        self._check(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    def time(self, *labels):
+        """with hist.time(...): 블록 실행 시간을 기록합니다."""
+        return _Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        for k, (counts, total) in items:
+            acc = 0
+            for le, c in zip(self._le, counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, k, le)} {acc}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, k)} {_num(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, k)} {acc}")
+        return lines
+
+
+class _Timer:
+    # contextlib.contextmanager 보다 호출 비용이 적은 클래스형 컨텍스트 매니저
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist, labels):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+        return False
+
+
+class Gauge(_Metric):
+    """scrape 시점에 fn() 을 호출해 값을 읽는 gauge. fn 반환: 숫자 또는 {레이블 튜플: 값}"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn, labels=()):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def render(self):
+        lines = self._header()
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines += [f"{self.name}{_label_text(self.labels, k)} {_num(v)}" for k, v in sorted(values.items())]
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 metric 입니다: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, fn, labels=()) -> Gauge:
+        """같은 이름으로 다시 등록하면 fn 을 교체합니다. (app 재로드 대비)"""
+        self._metrics.pop(name, None)
+        return self._add(Gauge(name, help_text, fn, labels))
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics.values():
+            try:
+                lines += m.render()
+            except Exception as e:   # gauge 콜백 오류로 /metrics 전체가 실패하지 않도록
+                lines.append(f"# {m.name} 수집 실패: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "nut_stage_seconds", "Per-stage processing time in seconds.", ("endpoint", "stage"))
+HTTP_SECONDS = REGISTRY.histogram(
+    "nut_http_request_seconds", "HTTP request latency in seconds.", ("method", "route", "status"))
+WINDOWS = REGISTRY.counter(
+    "nut_windows_total", "Windows scored.", ("endpoint", "rpm"))
+ANOMALY_WINDOWS = REGISTRY.counter(
+    "nut_anomaly_windows_total", "Windows whose reconstruction error exceeded the threshold.", ("endpoint", "rpm"))
+BYTES = REGISTRY.counter(
+    "nut_bytes_total", "Upload / stream bytes processed.", ("endpoint",))
+SAMPLES = REGISTRY.counter(
+    "nut_samples_total", "Raw signal samples processed.", ("endpoint",))
+MODEL_CACHE = REGISTRY.counter(
+    "nut_model_cache_total", "Model registry lookups (hit / miss) and version swaps (swap).", ("result",))
+BATCH_WINDOWS = REGISTRY.histogram(
+    "nut_batch_windows", "Windows per micro-batch forward pass.", (), SIZE_BUCKETS)
+RESULT_CACHE = REGISTRY.counter(
+    "nut_result_cache_total", "Scoring result cache lookups by tier (memory / mongo hit, all miss).", ("tier", "result"))
+RESULT_CACHE_EVICTIONS = REGISTRY.counter(
+    "nut_result_cache_evictions_total", "Scoring result cache entries removed (lru / invalidate).", ("reason",))
+RETRAIN_TRIGGERS = REGISTRY.counter(
+    "nut_retrain_triggers_total", "Retraining trigger decisions that fired.", ("rpm", "reason"))
+RETRAIN_RUNS = REGISTRY.counter(
+    "nut_retrain_runs_total", "Retraining launches by result.", ("rpm", "result"))
+
+
+def record_stages(endpoint: str, timings: dict):
+    """{단계: 초} 를 한 번에 기록합니다. (워커가 돌려준 timings 용)"""
+    for stage, sec in timings.items():
+        STAGE_SECONDS.observe(sec, endpoint, stage)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청 지연 시간을 nut_http_request_seconds 에 기록하는 ASGI 미들웨어.
+    route 레이블은 경로 템플릿(/api/monitoring/drift/{rpm})이며, 등록되지 않은 경로는 "other" 로 묶습니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "other")
+            HTTP_SECONDS.observe(time.perf_counter() - t0, scope["method"], route, str(status[0]))
+
+
+if __name__ == "__main__":
+    # 출력 형식 / 기록 비용 확인
+    STAGE_SECONDS.observe(0.003, "predict", "decimate")
+    STAGE_SECONDS.observe(0.2, "predict", "decimate")
+    with STAGE_SECONDS.time("predict", "fft_features"):
+        pass
+    WINDOWS.inc("predict", "800", value=13)
+    REGISTRY.gauge("nut_example_gauge", "Example.", lambda: {("a",): 1, ("b",): 2.5}, ("k",))
+    text = render()
+    print("\n".join(line for line in text.splitlines() if "decimate" in line and "_bucket" not in line
+                    or "windows_total" in line or "example" in line))
+    assert 'nut_stage_seconds_bucket{endpoint="predict",stage="decimate",le="+Inf"} 2' in text
+    assert 'nut_stage_seconds_bucket{endpoint="predict",stage="decimate",le="0.005"} 1' in text
+    assert 'nut_windows_total{endpoint="predict",rpm="800"} 13' in text
+
+    n = 200_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with STAGE_SECONDS.time("bench", "noop"):
+            pass
+    print(f"timer + observe: {(time.perf_counter() - t0) / n * 1e9:.0f} ns per stage")
@@ -1,13 +1,40 @@
 # backend/ai_assets/mlops.py
 import subprocess
 import os
+import sys
+from pathlib import Path
+from ai_assets.metrics import RETRAIN_RUNS
 
-def run_retraining():
-    """기존에 작성하신 02_train_ae_sklearn_rpm.py 스크립트를 실행하여 모델을 갱신합니다."""
-    script_path = "02_train_ae_sklearn_rpm.py" # 파일 경로 확인 필요
-    if os.path.exists(script_path):
-        print(f" [MLOps] 자동 재학습 시작...")
-        # 백그라운드에서 학습 스크립트 실행
-        subprocess.Popen(["python", script_path])
-        return True
-    return False
\ No newline at end of file
+# 실행 위치(cwd)와 관계없이 backend/retrain_pipeline.py 를 찾음
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RETRAIN_SCRIPT = BACKEND_DIR / "retrain_pipeline.py"
+LOG_DIR = BACKEND_DIR / "ai_assets" / "retrain_logs"
+# incremental: 현재 모델에서 새 데이터 + replay 샘플로 미세 조정 / full: 처음부터 전체 재학습
+RETRAIN_MODE = os.getenv("RETRAIN_MODE", "incremental")
+
+_running = {}  # rpm -> Popen (같은 RPM 재학습 중복 실행 방지)
+
+def run_retraining(rpm):
+    """retrain_pipeline.py 를 별도 프로세스로 실행하여 해당 RPM 모델의 새 버전을 만듭니다."""
+    rpm = str(rpm)
+    proc = _running.get(rpm)
+    if proc is not None and proc.poll() is None:
+        print(f" [MLOps] RPM {rpm} 재학습이 이미 진행 중입니다. (pid {proc.pid})")
+        RETRAIN_RUNS.inc(rpm, "already_running")
+        return False
+    if not RETRAIN_SCRIPT.exists():
+        print(f" [MLOps] 재학습 스크립트를 찾을 수 없습니다: {RETRAIN_SCRIPT}")
+        RETRAIN_RUNS.inc(rpm, "missing_script")
+        return False
+
+    print(f" [MLOps] RPM {rpm} 자동 재학습 시작 ({RETRAIN_MODE})...")
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log = open(LOG_DIR / f"retrain_{rpm}.log", "ab")
+    # 백그라운드에서 학습 스크립트 실행 (완료되면 서버의 registry.watch() 가 새 버전을 로드)
+    _running[rpm] = subprocess.Popen(
+        [sys.executable, str(RETRAIN_SCRIPT), "--rpm", rpm, "--mode", RETRAIN_MODE],
+        cwd=str(BACKEND_DIR), stdout=log, stderr=subprocess.STDOUT,
+    )
+    log.close()
+    RETRAIN_RUNS.inc(rpm, "started")
+    return True
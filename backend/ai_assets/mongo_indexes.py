@@ -0,0 +1,50 @@
+# backend/ai_assets/mongo_indexes.py
+# nutdb.model_inputs 인덱스 선언 및 서버 시작 시 생성
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+# rpm 필터 + created_at 정렬 조회 (최근/처음 100개, 직전 mean_val)
+# error_val / mean_val 을 뒤에 붙여 두면 {"_id": 0} 프로젝션 조회가 문서를 읽지 않는 covered scan 이 됩니다.
+RPM_CREATED_AT = IndexModel(
+    [("rpm", ASCENDING), ("created_at", DESCENDING), ("error_val", ASCENDING), ("mean_val", ASCENDING)],
+    name="rpm_created_at",
+)
+# 전체 최신 문서 조회 (latest-analysis)
+CREATED_AT = IndexModel([("created_at", DESCENDING)], name="created_at")
+# 동일 파일 중복 저장 방지 / 삭제 API 조회
+SHA256_UNIQUE = IndexModel([("sha256", ASCENDING)], name="sha256_unique", unique=True)
+
+MODEL_INPUTS_INDEXES = [RPM_CREATED_AT, CREATED_AT, SHA256_UNIQUE]
+
+# nutdb.result_cache (ai_assets/result_cache.py 영속 계층): 모델 교체 / 업로드 삭제 시 무효화, 7일 뒤 만료
+RESULT_CACHE_INDEXES = [
+    IndexModel([("rpm", ASCENDING), ("model_version", ASCENDING)], name="rpm_model_version"),
+    IndexModel([("sha256", ASCENDING)], name="sha256"),
+    IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+]
+
+# 커버링 조회용 프로젝션
+ERROR_ONLY = {"error_val": 1, "_id": 0}
+MEAN_ONLY = {"mean_val": 1, "_id": 0}
+
+DUPLICATE_KEY = 11000
+
+
+async def ensure_indexes(col, indexes=MODEL_INPUTS_INDEXES) -> list:
+    """
+    인덱스를 생성합니다. (이미 있으면 아무 작업도 하지 않음)
+    기존 데이터에 sha256 중복이 있어 unique 인덱스를 만들 수 없으면 일반 인덱스로 대신 생성합니다.
+    반환: 생성(확인)된 인덱스 이름 목록
+    """
+    names = []
+    for index in indexes:
+        try:
+            names.append(await col.create_indexes([index]))
+        except OperationFailure as e:
+            doc = index.document
+            if not (doc.get("unique") and e.code == DUPLICATE_KEY):
+                raise
+            print(f"[Mongo] {doc['name']} 생성 실패 (기존 중복 데이터): {e.details and e.details.get('errmsg')}")
+            fallback = IndexModel(list(doc["key"].items()), name=doc["name"].replace("_unique", ""))
+            names.append(await col.create_indexes([fallback]))
+    return [n for group in names for n in group]
@@ -0,0 +1,293 @@
+# backend/ai_assets/realtime.py
+# /ws/stream/{rpm} 실시간 스트리밍 채점
+#
+#   - StreamWindower: decimate 된 샘플을 이어 붙여 win / hop 윈도우를 만들고 겹치는 꼬리만 보관
+#   - StreamSession: 연결 하나의 StreamingDecimator 필터 상태 + 윈도우 버퍼 + 모델 버전
+#   - run_stream: 수신(reader) / 채점(scorer) 두 작업을 크기 제한 큐로 연결 (backpressure)
+#
+# 프로토콜 (클라이언트 -> 서버)
+#   binary frame : little-endian float32 원신호 샘플 (fs 그대로, decimate 전)
+#   text frame   : {"samples": [...]}  또는  {"type": "end"} (남은 필터 출력까지 채점 후 상태 초기화)
+# 서버 -> 클라이언트
+#   {"type": "ready", ...}   연결 직후 모델 / 전처리 정보
+#   {"type": "windows", "first_index", "sample_offset", "errors", "is_anomaly", ...}  완성된 윈도우마다
+#   {"type": "end", "windows", "samples"}  /  {"type": "error", "message"}
+import json
+import asyncio
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ai_assets.decimation import StreamingDecimator
+from ai_assets.features import log_fft_features
+from ai_assets.metrics import STAGE_SECONDS, WINDOWS, ANOMALY_WINDOWS, SAMPLES
+
+MAX_CHUNK_SAMPLES = 1 << 20   # 메시지 하나의 최대 샘플 수 (넘으면 1009 로 종료)
+QUEUE_CHUNKS = 8              # 채점 대기 청크 수 (가득 차면 수신을 멈춰 TCP 로 송신 측을 늦춤)
+WARMUP_WINDOWS = 4            # 처음 이 개수의 윈도우가 모일 때까지 채점을 미루고 그 구간 평균을 함께 사용
+CLOSE_TOO_BIG = 1009
+CLOSE_TRY_AGAIN = 1013
+
+
+class StreamWindower:
+    """
+    decimate 된 샘플로 win 길이 / hop 간격 윈도우를 만듭니다. (frame_signal 의 스트리밍 버전)
+    배치 경로(preprocess_signal)는 신호 전체 평균을 빼지만 스트림은 끝을 알 수 없으므로
+    윈도우 끝까지 받은 샘플의 누적 평균(causal mean)을 뺍니다. 평균은 rFFT 의 DC 성분에만 영향을 줍니다.
+    """
+
+    def __init__(self, win: int, hop: int, warmup: int = 0):
+        self.win = int(win)
+        self.hop = int(hop)
+        self.warmup = int(warmup)    # 평균 추정용으로 먼저 모으는 샘플 수 (그 전 윈도우는 이 구간 평균 사용)
+        self.reset()
+
+    def reset(self):
+        self.buf = np.empty(0, dtype=np.float32)
+        self.buf_start = 0       # buf[0] 의 샘플 번호
+        self.sum_before = 0.0    # buf 이전에 버린 샘플의 합
+        self.next_start = 0      # 다음 윈도우 시작 샘플 번호
+
+    def push(self, y: np.ndarray, final: bool = False):
+        """
+        반환: (첫 윈도우 번호, (B, win) float32 평균 제거된 윈도우)
+        final=True 이면 warmup 만큼 모이지 않았어도 지금까지의 샘플로 윈도우를 만듭니다.
+        """
+        buf = np.concatenate([self.buf, np.asarray(y, dtype=np.float32)])
+        first = self.next_start // self.hop
+        off = self.next_start - self.buf_start
+        n = 0 if len(buf) < off + self.win else (len(buf) - off - self.win) // self.hop + 1
+        if self.buf_start + len(buf) < self.warmup and not final:
+            n = 0
+        if n:
+            frames = sliding_window_view(buf[off:], self.win)[::self.hop][:n]
+            ends = off + self.win + self.hop * np.arange(n)           # buf 기준 윈도우 끝 (미포함)
+            ends = np.minimum(np.maximum(ends, self.warmup - self.buf_start), len(buf))
+            csum = np.cumsum(buf, dtype=np.float64)[ends - 1] + self.sum_before
+            means = (csum / (self.buf_start + ends)).astype(np.float32)
+            frames = frames - means[:, None]
+        else:
+            frames = np.empty((0, self.win), dtype=np.float32)
+        self.next_start += n * self.hop
+
+        # 다음 윈도우 시작 전 샘플은 합만 남기고 버림 (버퍼는 최대 win + 청크 길이)
+        drop = min(self.next_start - self.buf_start, len(buf))
+        if drop > 0:
+            self.sum_before += float(buf[:drop].sum(dtype=np.float64))
+            buf = buf[drop:].copy()
+            self.buf_start += drop
+        self.buf = buf
+        return first, frames
+
+
+class StreamSession:
+    """
+    연결 하나의 스트리밍 상태. 새 모델 버전이 발행되면 전처리 설정(decim / 필터 방식 / win / hop)이
+    같을 때만 다음 청크부터 새 버전으로 채점하고, 다르면 연결 시점의 버전을 계속 사용합니다.
+    """
+
+    def __init__(self, model, warmup_windows: int = WARMUP_WINDOWS):
+        self.model = model
+        cfg = model.config
+        self.decim = cfg["decim"]
+        self.win = cfg["win"]
+        self.hop = cfg["hop"]
+        self.cascade = cfg["cascade"]
+        warmup = self.win + (warmup_windows - 1) * self.hop if warmup_windows > 0 else 0
+        self.windower = StreamWindower(self.win, self.hop, warmup)
+        self.reset()
+
+    def reset(self):
+        self.decimator = StreamingDecimator(self.decim, cascade=self.cascade)
+        self.windower.reset()
+
+    @property
+    def n_samples(self) -> int:
+        return self.decimator.n_in
+
+    def _preprocess_key(self, model) -> tuple:
+        cfg = model.config
+        return cfg["decim"], cfg["cascade"], cfg["win"], cfg["hop"]
+
+    def maybe_swap(self, model) -> bool:
+        if model is None or model is self.model or self._preprocess_key(model) != self._preprocess_key(self.model):
+            return False
+        self.model = model
+        return True
+
+    def _features(self, y, final=False):
+        first, frames = self.windower.push(y, final)
+        return first, self.model.normalize(log_fft_features(frames), inplace=True)
+
+    def push(self, x: np.ndarray):
+        """원신호 청크 -> (첫 윈도우 번호, (B, F) 정규화된 특징)"""
+        return self._features(self.decimator.process(x))
+
+    def finish(self):
+        """필터에 남은 출력까지 윈도우로 만든 뒤 상태를 초기화합니다. 반환: (첫 윈도우 번호, 특징, 총 샘플 수)"""
+        n = self.n_samples
+        first, X = self._features(self.decimator.flush(), final=True)
+        self.reset()
+        return first, X, n
+
+
+class StreamStats:
+    """활성 스트림 수 / 누적 처리량 (모니터링 API 용)"""
+
+    def __init__(self):
+        self.active = 0
+        self.opened = 0
+        self.rejected = 0
+        self.samples = 0
+        self.windows = 0
+        self.anomalies = 0
+        self.backpressure_waits = 0
+
+    def snapshot(self) -> dict:
+        return dict(vars(self))
+
+
+def _parse_message(msg, max_chunk: int):
+    """반환: ("samples", ndarray) / ("end", None) / ("error", 메시지)"""
+    data = msg.get("bytes")
+    if data is not None:
+        if len(data) % 4:
+            return "error", "binary frame 길이는 4 바이트(float32) 의 배수여야 합니다."
+        x = np.frombuffer(data, dtype="<f4")
+    else:
+        try:
+            ctrl = json.loads(msg.get("text") or "")
+        except ValueError:
+            return "error", "JSON 형식이 아닙니다."
+        if isinstance(ctrl, dict) and ctrl.get("type") == "end":
+            return "end", None
+        if not isinstance(ctrl, dict) or "samples" not in ctrl:
+            return "error", "알 수 없는 메시지입니다. (samples 또는 type=end)"
+        try:
+            x = np.asarray(ctrl["samples"], dtype=np.float32).ravel()
+        except (TypeError, ValueError):
+            return "error", "samples 는 숫자 배열이어야 합니다."
+    if x.size > max_chunk:
+        return "too_big", f"메시지당 최대 {max_chunk} 샘플까지 보낼 수 있습니다."
+    return "samples", x
+
+
+async def run_stream(websocket, model, get_model, batcher, stats: StreamStats, max_queue=QUEUE_CHUNKS,
+                     max_chunk=MAX_CHUNK_SAMPLES, warmup_windows=WARMUP_WINDOWS):
+    """
+    websocket: accept 된 Starlette WebSocket (receive / send_json / close 만 사용)
+    model: 연결 시점의 ModelVersion, get_model: rpm -> 현재 ModelVersion (예: predictor.get_model)
+    수신 작업은 decimation / 윈도우 / 특징 계산까지 하고 큐에 넣으며, 채점 작업은 같은 RPM 의 다른
+    스트림 / 업로드와 함께 MicroBatcher 로 순전파합니다. 큐가 가득 차면 수신을 멈춥니다.
+    """
+    rpm = model.rpm
+    session = StreamSession(model, warmup_windows)
+    queue = asyncio.Queue(maxsize=max_queue)
+    await websocket.send_json({
+        "type": "ready", "rpm": rpm, "model_version": model.version, "threshold": model.threshold,
+        "decim": session.decim, "win": session.win, "hop": session.hop,
+        "samples_per_window": session.win * session.decim, "samples_per_hop": session.hop * session.decim,
+        "warmup_windows": warmup_windows, "max_chunk_samples": max_chunk,
+    })
+
+    async def put(item):
+        if queue.full():
+            stats.backpressure_waits += 1
+        await queue.put(item)
+
+    async def reader():
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                scorer_task.cancel()     # 보낼 곳이 없으므로 대기 중인 채점도 버림
+                return
+            kind, x = _parse_message(msg, max_chunk)
+            if kind == "too_big":
+                # 닫은 소켓에 채점 결과를 보내지 않도록 채점 작업을 먼저 멈추고 대기 중인 청크는 버림
+                scorer_task.cancel()
+                await asyncio.wait([scorer_task])
+                await websocket.send_json({"type": "error", "message": x})
+                await websocket.close(code=CLOSE_TOO_BIG)
+                return
+            if kind == "error":
+                await websocket.send_json({"type": "error", "message": x})
+                continue
+            session.maybe_swap(get_model(rpm))
+            if kind == "end":
+                first, X, n = session.finish()
+                await put((session.model, first, X, n))
+            else:
+                stats.samples += len(x)
+                SAMPLES.inc("stream", value=len(x))
+                with STAGE_SECONDS.time("stream", "features"):
+                    first, X = session.push(x)
+                if len(X):
+                    await put((session.model, first, X, None))
+
+    async def scorer():
+        while True:
+            mv, first, X, end_samples = await queue.get()
+            if len(X):
+                with STAGE_SECONDS.time("stream", "inference"):
+                    err = await batcher.score(rpm, mv.engine, X)
+                flags = err > mv.threshold
+                n_anomaly = int(flags.sum())
+                stats.windows += len(err)
+                stats.anomalies += n_anomaly
+                WINDOWS.inc("stream", rpm, value=len(err))
+                ANOMALY_WINDOWS.inc("stream", rpm, value=n_anomaly)
+                await websocket.send_json({
+                    "type": "windows",
+                    "model_version": mv.version,
+                    "first_index": int(first),
+                    "sample_offset": int(first) * session.hop * session.decim,
+                    "errors": err.tolist(),
+                    "is_anomaly": flags.tolist(),
+                    "threshold": mv.threshold,
+                    "anomaly_windows": n_anomaly,
+                    "queued": queue.qsize(),
+                })
+            if end_samples is not None:
+                await websocket.send_json({"type": "end", "windows": int(first) + len(X), "samples": end_samples})
+
+    stats.active += 1
+    stats.opened += 1
+    scorer_task = asyncio.create_task(scorer())
+    tasks = [asyncio.create_task(reader()), scorer_task]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for t in tasks:
+            t.cancel()
+        stats.active -= 1
+    for t in tasks:
+        if t.done() and not t.cancelled() and t.exception() is not None:
+            raise t.exception()
+
+
+if __name__ == "__main__":
+    # 동등성 확인: 스트리밍 특징 = extract_features (DC 성분 제외), 청크 크기와 무관
+    import os
+    from ai_assets.features import extract_features
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    rng = np.random.default_rng(0)
+    csv = os.path.join(here, "Case2_800.csv")
+    x = np.loadtxt(csv, dtype=np.float32) if os.path.exists(csv) else rng.normal(size=360_000).astype(np.float32)
+    win, hop, decim = 100, 50, 500
+
+    for cascade in (False, True):
+        ref = extract_features(x, win, hop, decim, cascade=cascade)
+        outs = []
+        for bounds in (np.sort(rng.choice(np.arange(1, len(x)), 60, replace=False)), np.arange(1, len(x), 997)):
+            dec, wnd, frames = StreamingDecimator(decim, cascade=cascade), StreamWindower(win, hop), []
+            for c in np.split(x, bounds):
+                first, f = wnd.push(dec.process(c))
+                assert first == sum(len(a) for a in frames)
+                frames.append(f)
+            frames.append(wnd.push(dec.flush())[1])
+            outs.append(log_fft_features(np.concatenate(frames)))
+        assert np.allclose(outs[0], outs[1], rtol=1e-5, atol=1e-5), "청크 크기에 따라 결과가 다릅니다."
+        feat = outs[0]
+        assert feat.shape == ref.shape, (feat.shape, ref.shape)
+        assert np.allclose(feat[:, 1:], ref[:, 1:], rtol=1e-4, atol=1e-5)
+        dc = np.abs(feat[:, 0] - ref[:, 0]).max()
+        print(f"cascade={cascade}: {len(feat)} windows, non-DC features match, max |DC diff| {dc:.3e}")
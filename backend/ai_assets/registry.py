@@ -0,0 +1,301 @@
+# backend/ai_assets/registry.py
+# RPM_model/model_<rpm> 모델의 버전 관리, 사전 로드(warm-up), 변경 감지 및 원자적 교체
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+import numpy as np
+from ai_assets.ae_engine import AEEngine
+from ai_assets.artifact import ARTIFACT_FILE, load_artifact
+from ai_assets.features import FeatureExtractor
+from ai_assets.decimation import uses_cascade
+from ai_assets.metrics import MODEL_CACHE
+
+MODEL_FILE = "ae_sklearn.npz"
+THRESHOLD_FILE = "threshold.json"
+ERRORS_FILE = "ae_errors.npy"
+STATS_FILE = "feature_stats.npz"   # 버전 폴더에 함께 저장된 전처리 통계 (없으면 data_proc_rpm 사용)
+CURRENT_FILE = "CURRENT"           # model_<rpm>/CURRENT : 서비스 중인 버전 ID
+VERSIONS_DIR = "versions"          # model_<rpm>/versions/<version>/...
+
+
+def list_model_rpms(base_model_dir) -> list:
+    """RPM_model/model_<rpm> 폴더에서 RPM 목록을 반환합니다."""
+    return sorted(p.name[len("model_"):] for p in Path(base_model_dir).glob("model_*") if p.is_dir())
+
+
+def new_version_id() -> str:
+    """시각 기반 버전 ID (정렬 순서 = 생성 순서)"""
+    return time.strftime("%Y%m%d_%H%M%S") + f"_{os.getpid() % 10000:04d}"
+
+
+def publish_version(model_root, staging_dir, version: str) -> Path:
+    """
+    staging_dir 에 준비된 모델 파일들을 model_<rpm>/versions/<version>/ 로 옮기고
+    CURRENT 를 원자적으로 교체합니다. (서버의 watch() 가 감지해 새 버전으로 전환)
+    """
+    model_root = Path(model_root)
+    target = model_root / VERSIONS_DIR / version
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staging_dir, target)
+    tmp = model_root / f"{CURRENT_FILE}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, model_root / CURRENT_FILE)
+    return target
+
+
+class ModelVersion:
+    """한 RPM 모델의 특정 버전 (로드 후 변경하지 않음)"""
+
+    __slots__ = ("rpm", "version", "path", "engine", "config", "loaded_at")
+
+    def __init__(self, rpm, version, path, engine, config):
+        self.rpm = rpm
+        self.version = version
+        self.path = path
+        self.engine = engine
+        self.config = config
+        self.loaded_at = time.time()
+
+    @property
+    def threshold(self) -> float:
+        return self.config["threshold"]
+
+    def extract_features(self, x, decimated=False) -> np.ndarray:
+        """정규화 전 특징 (B, F) 을 새 배열로 반환합니다."""
+        return self.config["extractor"].transform(x, decimated=decimated).copy()
+
+    def normalize(self, feat, inplace=False) -> np.ndarray:
+        """학습 시 mean/std 로 정규화합니다."""
+        Xn = feat if inplace else np.empty_like(feat)
+        np.subtract(feat, self.config["mean"], out=Xn)
+        np.divide(Xn, self.config["scale"], out=Xn)
+        return Xn
+
+
+class ModelRegistry:
+    """
+    RPM 별 현재 모델(ModelVersion)을 보관합니다.
+    - 읽기(get)는 dict 조회 한 번으로 끝나며 잠금이 없습니다.
+    - 교체는 새 dict 를 만들어 참조를 통째로 바꾸므로(copy-on-write),
+      처리 중인 요청은 자신이 받은 이전 버전으로 끝까지 처리됩니다.
+    - 버전 폴더 레이아웃: model_<rpm>/CURRENT + versions/<version>/
+      (CURRENT 가 없으면 model_<rpm>/ 에 바로 있는 기존 파일을 사용하고, 내용 해시를 버전 ID 로 사용)
+    """
+
+    def __init__(self, base_model_dir, base_data_dir):
+        self.base_model_dir = Path(base_model_dir)
+        self.base_data_dir = Path(base_data_dir)
+        self._models = {}          # rpm -> ModelVersion
+        self._sigs = {}            # rpm -> 로드 시점 파일 시그니처
+        self._seen = {}            # rpm -> 직전 폴링에서 본 시그니처 (쓰기 도중 교체 방지)
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    # --- 경로 / 시그니처 ---
+
+    def model_root(self, rpm) -> Path:
+        return self.base_model_dir / f"model_{rpm}"
+
+    def resolve(self, rpm):
+        """(모델 폴더, 전처리 통계 파일, 버전 ID 또는 None)"""
+        root = self.model_root(rpm)
+        current = root / CURRENT_FILE
+        if current.exists():
+            version = current.read_text(encoding="utf-8").strip()
+            model_dir = root / VERSIONS_DIR / version
+        else:
+            version, model_dir = None, root
+        stats_path = model_dir / STATS_FILE
+        if not stats_path.exists():
+            stats_path = self.base_data_dir / str(rpm) / "dataset.npz"
+        return model_dir, stats_path, version
+
+    def signature(self, rpm):
+        """변경 감지용 (경로, mtime_ns, size) 목록"""
+        root = self.model_root(rpm)
+        paths = [root / CURRENT_FILE, root / ARTIFACT_FILE, root / MODEL_FILE, root / THRESHOLD_FILE]
+        sig = []
+        for p in paths:
+            try:
+                st = p.stat()
+                sig.append((p.name, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append((p.name, None, None))
+        return tuple(sig)
+
+    # --- 로드 ---
+
+    def _load_artifact(self, rpm, path, version):
+        """model.nutae 한 파일에서 가중치 / 통계 / 전처리 파라미터 / threshold 를 읽습니다. (pickle 없음)"""
+        try:
+            art = load_artifact(path)
+            engine = AEEngine(art.coefs, art.intercepts)
+        except Exception as e:
+            print(f"Error loading model artifact {path}: {e}")
+            return None
+        h = art.header
+        config = {
+            "mean": art.tensors["mean"],
+            "std": art.tensors["std"],
+            "win": int(h["win"]),
+            "hop": int(h["hop"]),
+            "decim": int(h["decim"]),
+            "fs": int(h["fs"]),
+            "cascade": bool(h["cascade"]),
+            "threshold": float(h["threshold"]),
+        }
+        config["extractor"] = FeatureExtractor(config["win"], config["hop"], config["decim"],
+                                               cascade=config["cascade"])
+        config["scale"] = (config["std"] + 1e-9).astype(np.float32)
+        version = version or art.version
+        if version is None:
+            # 버전 ID 없이 저장된 flat 아티팩트: 파일 내용 해시
+            version = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+        return ModelVersion(rpm, version, path.parent, engine, config)
+
+    def _load(self, rpm):
+        rpm = str(rpm)
+        model_dir, stats_path, version = self.resolve(rpm)
+        # 아티팩트가 있으면 우선 사용 (없으면 기존 ae_sklearn.npz + 통계 파일)
+        if (model_dir / ARTIFACT_FILE).exists():
+            return self._load_artifact(rpm, model_dir / ARTIFACT_FILE, version)
+        model_path = model_dir / MODEL_FILE
+        thr_path = model_dir / THRESHOLD_FILE
+
+        if not model_path.exists():
+            print(f"Error: Model not found at {model_path}")
+            return None
+
+        # 1. 전처리 기준 및 Threshold 로드
+        try:
+            data_info = np.load(str(stats_path), allow_pickle=True)
+            with open(thr_path, "r", encoding="utf-8") as f:
+                thr_data = json.load(f)
+        except Exception as e:
+            print(f"Error loading data info or threshold: {e}")
+            return None
+
+        config = {
+            "mean": data_info["mean"],
+            "std": data_info["std"],
+            "win": int(data_info["win"]),
+            "hop": int(data_info["hop"]),
+            "decim": int(data_info["decim"]),
+            "fs": int(data_info["fs"]) if "fs" in data_info.files else 0,   # decimation 후 샘플링 주파수 (0 = 알 수 없음)
+            "cascade": uses_cascade(data_info),
+            "threshold": float(thr_data["threshold"])
+        }
+        # 학습(01_prepare_data.py)과 동일한 특징 추출 경로 (decimation 필터 방식 포함)
+        config["extractor"] = FeatureExtractor(config["win"], config["hop"], config["decim"],
+                                               cascade=config["cascade"])
+        config["scale"] = (config["std"] + 1e-9).astype(np.float32)  # 0 나누기 방지
+
+        # 2. 모델 가중치 복원 (sklearn 없이 float32 추론 엔진으로 로드)
+        try:
+            engine = AEEngine.from_npz(model_path)
+        except Exception as e:
+            print(f"Error restoring model weights: {e}")
+            return None
+
+        if version is None:
+            # 기존(flat) 레이아웃: 가중치 + threshold 내용 해시를 버전 ID 로 사용
+            h = hashlib.sha256()
+            for p in (model_path, thr_path):
+                h.update(p.read_bytes())
+            version = h.hexdigest()[:12]
+
+        return ModelVersion(rpm, version, model_dir, engine, config)
+
+    def _publish(self, mv: ModelVersion, sig):
+        with self._lock:
+            old = self._models.get(mv.rpm)
+            models = dict(self._models)
+            models[mv.rpm] = mv
+            self._models = models       # 참조 교체 (원자적)
+            self._sigs[mv.rpm] = sig
+        if old is not None and old.version != mv.version:
+            print(f"--- [Registry] RPM {mv.rpm} 모델 교체: {old.version} -> {mv.version} ---")
+            MODEL_CACHE.inc("swap")
+            for fn in self._listeners:
+                fn(mv.rpm, old, mv)
+
+    def get(self, rpm):
+        """현재 모델을 반환합니다. (처음 요청된 RPM 이면 로드, 실패 시 None)"""
+        mv = self._models.get(str(rpm))
+        if mv is not None:
+            MODEL_CACHE.inc("hit")
+            return mv
+        MODEL_CACHE.inc("miss")
+        return self.reload(rpm)
+
+    def reload(self, rpm):
+        """디스크에서 다시 읽어 교체합니다."""
+        sig = self.signature(rpm)
+        mv = self._load(rpm)
+        if mv is None:
+            return None
+        self._publish(mv, sig)
+        return mv
+
+    @staticmethod
+    def warm_up(mv: ModelVersion):
+        """FFT / 순전파 버퍼를 미리 할당해 첫 요청 지연을 없앱니다."""
+        cfg = mv.config
+        x = np.zeros((cfg["win"] + cfg["hop"]) * max(cfg["decim"], 1), dtype=np.float32)
+        Xn = mv.normalize(mv.extract_features(x), inplace=True)
+        mv.engine.reconstruction_error(Xn)
+
+    def preload(self, warmup=True) -> dict:
+        """모든 RPM 모델을 로드(및 warm-up)합니다. 반환: {rpm: version}"""
+        for rpm in list_model_rpms(self.base_model_dir):
+            mv = self.reload(rpm)
+            if mv is not None and warmup:
+                self.warm_up(mv)
+        return self.versions()
+
+    def versions(self) -> dict:
+        return {rpm: mv.version for rpm, mv in self._models.items()}
+
+    def add_listener(self, fn):
+        """모델 교체 시 fn(rpm, old, new) 호출"""
+        self._listeners.append(fn)
+
+    # --- 변경 감지 ---
+
+    def refresh(self) -> list:
+        """
+        파일 시그니처가 바뀐 RPM 을 다시 로드합니다.
+        학습 스크립트가 파일을 쓰는 도중에 읽지 않도록, 두 번 연속 같은 시그니처가 관측된 뒤에 교체합니다.
+        """
+        swapped = []
+        for rpm in list_model_rpms(self.base_model_dir):
+            sig = self.signature(rpm)
+            if sig == self._sigs.get(rpm):
+                self._seen.pop(rpm, None)
+                continue
+            if self._seen.get(rpm) != sig:
+                self._seen[rpm] = sig
+                continue
+            self._seen.pop(rpm, None)
+            old = self._models.get(rpm)
+            mv = self._load(rpm)
+            if mv is None:
+                continue
+            self.warm_up(mv)
+            self._publish(mv, sig)
+            if old is None or old.version != mv.version:
+                swapped.append(rpm)
+        return swapped
+
+    async def watch(self, interval: float = 5.0):
+        """interval 초마다 refresh (FastAPI lifespan 에서 백그라운드 태스크로 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"[Registry] refresh 실패: {e}")
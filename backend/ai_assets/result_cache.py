@@ -0,0 +1,215 @@
+# backend/ai_assets/result_cache.py
+# /predict 채점 결과 캐시: (업로드 SHA-256, RPM, 모델 버전) -> 윈도우별 오차
+# 게이트웨이 재시도 등으로 같은 파일이 다시 오면 decimation / 특징 추출 / 채점 / 저장을 모두 건너뜁니다.
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from pymongo.errors import PyMongoError
+from ai_assets.metrics import RESULT_CACHE, RESULT_CACHE_EVICTIONS
+
+HASH_CHUNK = 1 << 20
+ENTRY_OVERHEAD = 256          # 오차 배열 외 항목당 대략적인 메모리 (bytes)
+MONGO_MAX_ERRORS = 1 << 20    # Mongo 문서 16MB 한도 안에서 저장할 최대 윈도우 수 (4 MiB)
+
+
+def hash_upload(fileobj, chunk_size: int = HASH_CHUNK) -> str:
+    """업로드 파일 전체의 SHA-256 (읽은 뒤 처음 위치로 되돌림)"""
+    h = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(chunk_size):
+        h.update(chunk)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+class CachedResult:
+    """한 업로드의 채점 결과 (errors 는 읽기 전용 float32)"""
+
+    __slots__ = ("sha256", "rpm", "version", "errors", "mean", "n_samples", "nbytes", "stored")
+
+    def __init__(self, sha256, rpm, version, errors, mean, n_samples, nbytes, stored=False):
+        self.sha256 = sha256
+        self.rpm = str(rpm)
+        self.version = version
+        self.errors = np.array(errors, dtype=np.float32)
+        self.errors.setflags(write=False)
+        self.mean = float(mean)
+        self.n_samples = int(n_samples)
+        self.nbytes = int(nbytes)
+        self.stored = bool(stored)    # model_inputs 에 저장되었는지 (다시 저장하지 않음)
+
+    @property
+    def key(self):
+        return (self.sha256, self.rpm, self.version)
+
+    @property
+    def size(self) -> int:
+        return self.errors.nbytes + ENTRY_OVERHEAD
+
+    def to_doc(self) -> dict:
+        return {
+            "_id": ":".join(self.key),
+            "sha256": self.sha256,
+            "rpm": self.rpm,
+            "model_version": self.version,
+            "errors": self.errors.tobytes(),
+            "mean_val": self.mean,
+            "row_count": self.n_samples,
+            "file_size_bytes": self.nbytes,
+            "stored": self.stored,
+            "created_at": datetime.utcnow(),
+        }
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc["sha256"], doc["rpm"], doc["model_version"], np.frombuffer(doc["errors"], dtype=np.float32),
+                   doc["mean_val"], doc["row_count"], doc["file_size_bytes"], doc.get("stored", False))
+
+
+class ResultCache:
+    """
+    2단계 결과 캐시.
+    - 메모리: 오차 배열 bytes 합이 max_bytes 를 넘지 않는 LRU
+    - Mongo(col 이 있을 때): 서버 재시작 / 여러 인스턴스 사이에서 공유, 메모리 miss 때만 조회
+    키에 모델 버전이 들어 있으므로 새 버전의 결과와 섞이지 않으며, 레지스트리가 새 모델을 게시하면
+    on_model_swap 이 그 RPM 의 이전 버전 항목을 지웁니다. (Mongo 삭제는 다음 비동기 호출 때 수행)
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, col=None):
+        self.max_bytes = int(max_bytes)
+        self.col = col
+        self._entries = OrderedDict()   # key -> CachedResult
+        self._bytes = 0
+        self._lock = threading.Lock()   # on_model_swap 은 registry.refresh 스레드에서 호출됨
+        self._stale = {}                # rpm -> 유지할 버전 (Mongo 에서 지울 대상)
+        self.hits = {"memory": 0, "mongo": 0}
+        self.misses = 0
+        self.evictions = {"lru": 0, "invalidate": 0}
+
+    # --- 메모리 계층 ---
+
+    def _remember(self, entry: CachedResult):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[entry.key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, victim = self._entries.popitem(last=False)
+                self._bytes -= victim.size
+                self.evictions["lru"] += 1
+                RESULT_CACHE_EVICTIONS.inc("lru")
+
+    def _drop(self, pred) -> int:
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if pred(e)]
+            for k in keys:
+                self._bytes -= self._entries.pop(k).size
+        self.evictions["invalidate"] += len(keys)
+        RESULT_CACHE_EVICTIONS.inc("invalidate", value=len(keys))
+        return len(keys)
+
+    # --- 조회 / 기록 ---
+
+    async def get(self, sha256, rpm, version):
+        """캐시된 결과 또는 None"""
+        key = (sha256, str(rpm), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            self.hits["memory"] += 1
+            RESULT_CACHE.inc("memory", "hit")
+            return entry
+        if self.col is not None:
+            try:
+                await self._purge_stale()
+                doc = await self.col.find_one({"_id": ":".join(key)})
+            except PyMongoError as e:
+                # 영속 계층은 선택 사항이므로 장애 시 miss 로 처리
+                print(f"[ResultCache] Mongo 조회 실패: {e}")
+                doc = None
+            if doc is not None:
+                entry = CachedResult.from_doc(doc)
+                self._remember(entry)
+                self.hits["mongo"] += 1
+                RESULT_CACHE.inc("mongo", "hit")
+                return entry
+        self.misses += 1
+        RESULT_CACHE.inc("all", "miss")
+        return None
+
+    async def put(self, entry: CachedResult):
+        self._remember(entry)
+        if self.col is not None and entry.errors.size <= MONGO_MAX_ERRORS:
+            doc = entry.to_doc()
+            try:
+                await self.col.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+            except PyMongoError as e:
+                print(f"[ResultCache] Mongo 저장 실패: {e}")
+
+    # --- 무효화 ---
+
+    def on_model_swap(self, rpm, old, new):
+        """ModelRegistry.add_listener 용: 그 RPM 의 다른 버전 항목 삭제"""
+        rpm = str(rpm)
+        self._drop(lambda e: e.rpm == rpm and e.version != new.version)
+        if self.col is not None:
+            with self._lock:
+                self._stale[rpm] = new.version
+
+    async def _purge_stale(self):
+        with self._lock:
+            stale, self._stale = self._stale, {}
+        for rpm, keep in stale.items():
+            await self.col.delete_many({"rpm": rpm, "model_version": {"$ne": keep}})
+
+    async def forget(self, sha256):
+        """업로드 기록이 삭제되면 그 파일의 결과도 지웁니다. (다시 올리면 새로 채점 / 저장)"""
+        self._drop(lambda e: e.sha256 == sha256)
+        if self.col is not None:
+            await self.col.delete_many({"sha256": sha256})
+
+    def snapshot(self) -> dict:
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "persistent": self.col is not None,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "evictions": dict(self.evictions),
+        }
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    class _MV:
+        def __init__(self, version):
+            self.version = version
+
+    async def main():
+        cache = ResultCache(max_bytes=3 * (400 + ENTRY_OVERHEAD))
+        err = np.arange(100, dtype=np.float32)
+        for i in range(4):
+            await cache.put(CachedResult(f"sha{i}", "800", "v1", err, 1.0, 2000, 9000))
+        assert await cache.get("sha0", "800", "v1") is None          # LRU 로 밀려남
+        assert (await cache.get("sha3", "800", "v1")).errors[5] == 5.0
+        assert await cache.get("sha3", "800", "v2") is None          # 다른 모델 버전
+        await cache.put(CachedResult("sha9", "1000", "v1", err, 1.0, 2000, 9000))
+        cache.on_model_swap("800", _MV("v1"), _MV("v2"))
+        assert await cache.get("sha3", "800", "v1") is None
+        assert await cache.get("sha9", "1000", "v1") is not None
+        print(cache.snapshot())
+
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+# backend/ai_assets/shards.py
+# 학습 데이터셋 저장 형식: CSV 파일별 float32 특징 shard + mmap 으로 여는 인덱스 + 정규화 통계
+#
+#   <root>/shards/<sha256 앞 20자>.npy   (B, D) float32 정규화 전 특징 (CSV 내용 해시로 이름을 정함)
+#   <root>/index.npy                     파일별 (case_id, file_id, start, count) 구조체 배열
+#   <root>/files.json                    파일별 경로 / 해시 / shard 이름 / 통계 (재실행 시 건너뛰기용)
+#   <root>/feature_stats.npz             mean, std, n, fs, win, hop, decim (서빙 registry 와 같은 키)
+import os
+import json
+import numpy as np
+from ai_assets.registry import STATS_FILE
+
+SHARDS_DIR = "shards"
+INDEX_FILE = "index.npy"
+MANIFEST_FILE = "files.json"
+
+INDEX_DTYPE = np.dtype([
+    ("case_id", "<i4"),
+    ("file_id", "<i4"),
+    ("start", "<i8"),    # 전체 윈도우 순서에서의 시작 위치
+    ("count", "<i8"),    # 윈도우 수
+])
+
+
+class RunningStats:
+    """
+    특징 차원별 평균 / 분산을 배치 단위로 누적합니다. (Chan et al. 병렬 분산 병합)
+    전체 X 를 메모리에 두지 않고 X.mean(axis=0), X.std(axis=0) 과 같은 값을 얻습니다.
+    """
+
+    def __init__(self, dim=None):
+        self.n = 0
+        self.mean = None if dim is None else np.zeros(dim, dtype=np.float64)
+        self.m2 = None if dim is None else np.zeros(dim, dtype=np.float64)
+
+    @classmethod
+    def of(cls, X):
+        st = cls()
+        st.update(X)
+        return st
+
+    def update(self, X):
+        X = np.asarray(X)
+        if X.shape[0] == 0:
+            return self
+        mean = X.mean(axis=0, dtype=np.float64)
+        m2 = ((X - mean) ** 2).sum(axis=0, dtype=np.float64)
+        return self._merge(X.shape[0], mean, m2)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        return self._merge(other.n, other.mean, other.m2)
+
+    def _merge(self, n_b, mean_b, m2_b):
+        if self.n == 0:
+            self.n, self.mean, self.m2 = int(n_b), np.array(mean_b, dtype=np.float64), np.array(m2_b, dtype=np.float64)
+            return self
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.m2 = self.m2 + m2_b + delta ** 2 * (self.n * n_b / n)
+        self.n = n
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / self.n
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "mean": self.mean.tolist(), "m2": self.m2.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        st = cls()
+        if d and d.get("n"):
+            st._merge(d["n"], np.asarray(d["mean"]), np.asarray(d["m2"]))
+        return st
+
+
+def save_npy_atomic(path, arr):
+    """임시 파일에 쓴 뒤 os.replace (중단되어도 반쯤 쓴 shard 가 남지 않음)"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def build_index(entries) -> np.ndarray:
+    """entries: file_id 순서의 (case_id, n_windows) 목록 -> INDEX_DTYPE 배열"""
+    index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+    start = 0
+    for i, (case_id, count) in enumerate(entries):
+        index[i] = (case_id, i, start, count)
+        start += count
+    return index
+
+
+class ShardDataset:
+    """
+    01_prepare_data.py 출력 폴더를 읽습니다.
+    index / shard 는 mmap 으로 열리므로 필요한 파일의 윈도우만 메모리에 올라옵니다.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self.index = np.load(os.path.join(self.root, INDEX_FILE), mmap_mode="r")
+        with open(os.path.join(self.root, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.files = self.manifest["files"]
+        stats = np.load(os.path.join(self.root, STATS_FILE))
+        self.mean = stats["mean"].astype(np.float32)
+        self.std = stats["std"].astype(np.float32)
+        self.params = {k: int(stats[k]) for k in ("fs", "win", "hop", "decim")}
+
+    def __len__(self):
+        return int(self.index["count"].sum()) if len(self.index) else 0
+
+    @property
+    def dim(self) -> int:
+        return int(self.mean.shape[-1])
+
+    def shard(self, file_id: int) -> np.ndarray:
+        """(B, D) float32 정규화 전 특징 (mmap)"""
+        path = os.path.join(self.root, SHARDS_DIR, self.files[file_id]["shard"])
+        return np.load(path, mmap_mode="r")
+
+    def shard_paths(self, case_ids=None) -> list:
+        """case_ids 에 속한 shard 파일 경로 (streaming 학습용)"""
+        return [os.path.join(self.root, SHARDS_DIR, self.files[int(row["file_id"])]["shard"])
+                for row in self.select(case_ids)]
+
+    def select(self, case_ids=None) -> np.ndarray:
+        """case_ids 에 속한 파일의 인덱스 행"""
+        if case_ids is None:
+            return self.index
+        return self.index[np.isin(self.index["case_id"], np.asarray(case_ids, dtype=np.int32))]
+
+    def window_case_ids(self, case_ids=None) -> np.ndarray:
+        rows = self.select(case_ids)
+        return np.repeat(rows["case_id"], rows["count"])
+
+    def normalize(self, X, out=None) -> np.ndarray:
+        out = np.subtract(X, self.mean, out=out, dtype=np.float32)
+        return np.divide(out, self.std, out=out)
+
+    def iter_files(self, case_ids=None, normalize=True):
+        """파일 단위로 (index 행, 특징) 을 돌려줍니다."""
+        for row in self.select(case_ids):
+            X = self.shard(int(row["file_id"]))
+            yield row, (self.normalize(X) if normalize else np.array(X))
+
+    def load(self, case_ids=None, normalize=True) -> np.ndarray:
+        """선택한 case 의 윈도우를 하나의 (N, D) float32 배열로 읽습니다."""
+        rows = self.select(case_ids)
+        X = np.empty((int(rows["count"].sum()), self.dim), dtype=np.float32)
+        pos = 0
+        for row in rows:
+            n = int(row["count"])
+            X[pos:pos + n] = self.shard(int(row["file_id"]))
+            pos += n
+        return self.normalize(X, out=X) if normalize else X
@@ -0,0 +1,225 @@
+# backend/ai_assets/streaming.py
+# 메모리보다 큰 학습 데이터용: 디스크의 특징 shard(.npy, mmap)에서 섞은 mini-batch 로 AutoEncoder 학습
+#
+#   - iter_blocks: 파일 순서를 섞고 최대 buffer_windows 개 윈도우만 메모리에 올려 섞은 블록 단위로 반환
+#   - fit_streaming: 블록마다 partial_fit (sklearn 이 블록 안에서 batch_size 로 나눠 학습), epoch 반복
+#   - StreamingQuantile: 전체 오차 배열 없이 상대 오차 rel_err 이내로 분위수를 추정 (로그 구간 히스토그램)
+#   - evaluate_streaming: 파일 단위로 재구성 오차를 계산해 분위수 / 평균 / 오차 샘플을 누적
+import numpy as np
+from sklearn.neural_network import MLPRegressor
+from ai_assets.ae_engine import AEEngine
+from ai_assets.finetune import quiet_batch_clip
+
+BUFFER_WINDOWS = 16384        # 한 번에 메모리에 올리는 윈도우 수 (셔플 버퍼)
+BATCH_SIZE = 200              # sklearn MLPRegressor 기본값(min(200, n))과 동일
+LEARNING_RATE = 1e-3
+TOL = 1e-4                    # sklearn 기본 tol / n_iter_no_change 와 같은 조기 종료 기준
+N_ITER_NO_CHANGE = 10
+MAX_SAVED_ERRORS = 100_000    # ae_errors.npy 에 남기는 오차 샘플 최대 개수
+
+
+class StreamingQuantile:
+    """
+    로그 간격 구간(gamma = (1+a)/(1-a)) 에 오차 개수만 누적하는 분위수 추정기.
+    메모리는 값의 범위(자릿수)에만 비례하고, 추정값의 상대 오차는 rel_err 이하입니다.
+    """
+
+    def __init__(self, rel_err=0.005, min_value=1e-12):
+        self.rel_err = float(rel_err)
+        self.gamma = (1.0 + rel_err) / (1.0 - rel_err)
+        self.log_gamma = np.log(self.gamma)
+        self.min_value = float(min_value)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0          # counts[0] 에 해당하는 구간 번호
+        self.n_small = 0         # min_value 이하 (0 으로 취급)
+        self.n = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if x.size == 0:
+            return self
+        self.n += x.size
+        self.total += float(x.sum())
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        small = x <= self.min_value
+        self.n_small += int(small.sum())
+        x = x[~small]
+        if x.size == 0:
+            return self
+        k = np.ceil(np.log(x) / self.log_gamma).astype(np.int64)
+        lo, hi = int(k.min()), int(k.max())
+        if self.counts.size == 0:
+            self.offset = lo
+        if lo < self.offset or hi >= self.offset + self.counts.size:
+            new_lo = min(lo, self.offset)
+            new_hi = max(hi + 1, self.offset + self.counts.size)
+            grown = np.zeros(new_hi - new_lo, dtype=np.int64)
+            grown[self.offset - new_lo:self.offset - new_lo + self.counts.size] = self.counts
+            self.counts, self.offset = grown, new_lo
+        self.counts += np.bincount(k - self.offset, minlength=self.counts.size)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def quantile(self, q: float) -> float:
+        """q: 0 ~ 1 (np.percentile 과 같은 rank = q * (n - 1) 기준)"""
+        if self.n == 0:
+            raise ValueError("빈 분포입니다.")
+        rank = q * (self.n - 1)
+        if rank < self.n_small:
+            return max(self.min, 0.0)
+        pos = int(np.searchsorted(np.cumsum(self.counts), rank - self.n_small, side="right"))
+        k = self.offset + min(pos, self.counts.size - 1)
+        value = 2.0 * self.gamma ** k / (self.gamma + 1.0)
+        return float(min(max(value, self.min), self.max))
+
+    def percentile(self, p: float) -> float:
+        return self.quantile(p / 100.0)
+
+
+def iter_blocks(paths, mean, std, rng, buffer_windows=BUFFER_WINDOWS):
+    """
+    paths: (N_i, D) float32 정규화 전 특징 .npy 파일 목록
+    파일 순서를 섞어 최대 buffer_windows 개 윈도우씩 모은 뒤 정규화 / 셔플한 블록을 반환합니다.
+    파일 하나가 buffer_windows 보다 크면 구간으로 나눠 읽습니다.
+    """
+    buf, n_buf = [], 0
+    for i in rng.permutation(len(paths)):
+        X = np.load(str(paths[i]), mmap_mode="r")
+        for s in range(0, len(X), buffer_windows):
+            part = X[s:s + buffer_windows]
+            buf.append(part)
+            n_buf += len(part)
+            if n_buf >= buffer_windows:
+                yield _shuffled_block(buf, mean, std, rng)
+                buf, n_buf = [], 0
+    if n_buf:
+        yield _shuffled_block(buf, mean, std, rng)
+
+
+def _shuffled_block(parts, mean, std, rng):
+    # concatenate 로 만든 새 배열 하나에서 셔플 / 정규화를 모두 in-place 로 처리 (버퍼 1개 크기만 사용)
+    block = np.concatenate(parts, axis=0, dtype=np.float32)
+    rng.shuffle(block, axis=0)
+    block -= mean
+    block /= std
+    return block
+
+
+def new_regressor(hidden, learning_rate_init=LEARNING_RATE, batch_size=BATCH_SIZE, random_state=42) -> MLPRegressor:
+    return MLPRegressor(hidden_layer_sizes=hidden, activation="relu", solver="adam",
+                        learning_rate_init=learning_rate_init, batch_size=batch_size,
+                        random_state=random_state)
+
+
+def fit_streaming(ae, paths, mean, std, max_epochs=200, tol=TOL, n_iter_no_change=N_ITER_NO_CHANGE,
+                  buffer_windows=BUFFER_WINDOWS, random_state=42, verbose=False) -> dict:
+    """
+    ae: new_regressor() 또는 finetune.warm_start_regressor() 로 만든 MLPRegressor
+    epoch 마다 모든 파일을 한 번씩 학습합니다. epoch 평균 loss 가 best - tol 보다 낮아지지 않는
+    epoch 가 n_iter_no_change 번 이어지면 멈춥니다. (sklearn fit 의 조기 종료와 같은 규칙)
+    """
+    rng = np.random.default_rng(random_state)
+    curve, best, bad = [], np.inf, 0
+    for epoch in range(1, max_epochs + 1):
+        total, n = 0.0, 0
+        for block in iter_blocks(paths, mean, std, rng, buffer_windows):
+            with quiet_batch_clip():
+                ae.partial_fit(block, block)
+            total += float(ae.loss_) * len(block)
+            n += len(block)
+        loss = total / max(n, 1)
+        curve.append(loss)
+        if verbose:
+            print(f"Iteration {epoch}, loss = {loss:.8f}")
+        if loss > best - tol:
+            bad += 1
+        else:
+            bad = 0
+        best = min(best, loss)
+        if bad >= n_iter_no_change:
+            break
+    return {
+        "epochs": len(curve),
+        "final_loss": curve[-1] if curve else None,
+        "stopped_early": len(curve) < max_epochs,
+        "windows_per_epoch": n,
+        "buffer_windows": buffer_windows,
+        "loss_curve": [round(v, 8) for v in curve],
+    }
+
+
+def evaluate_streaming(engine: AEEngine, paths, mean, std, rel_err=0.005, max_saved=MAX_SAVED_ERRORS):
+    """
+    파일 단위로 재구성 오차를 계산합니다.
+    반환: (StreamingQuantile, 저장용 오차 샘플) - 샘플은 전체 오차를 일정 간격으로 최대 max_saved 개 추린 것
+    """
+    sizes = [int(np.load(str(p), mmap_mode="r").shape[0]) for p in paths]
+    step = max(1, -(-sum(sizes) // max_saved))
+    sketch = StreamingQuantile(rel_err)
+    sample, pos = [], 0
+    for p in paths:
+        X = np.load(str(p), mmap_mode="r")
+        for s in range(0, len(X), BUFFER_WINDOWS):
+            Xb = np.subtract(X[s:s + BUFFER_WINDOWS], mean, dtype=np.float32)
+            Xb /= std
+            err = engine.reconstruction_error(Xb)
+            sketch.update(err)
+            # 전체 순서 기준 step 간격 위치의 오차만 보관
+            first = (-pos) % step
+            sample.append(err[first::step].copy())
+            pos += len(err)
+    return sketch, (np.concatenate(sample) if sample else np.empty(0, dtype=np.float32))
+
+
+def sample_parts(paths, n, random_state=42) -> np.ndarray:
+    """여러 .npy 파일에 걸쳐 최대 n 개 윈도우를 균등하게 뽑습니다. (finetune.sample_replay 의 파일 버전)"""
+    sizes = np.array([np.load(str(p), mmap_mode="r").shape[0] for p in paths], dtype=np.int64)
+    total = int(sizes.sum())
+    if total == 0:
+        return np.empty((0, 0), dtype=np.float32)
+    idx = np.arange(total) if total <= n else np.sort(np.random.default_rng(random_state).choice(total, n, replace=False))
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    out = []
+    for i, p in enumerate(paths):
+        lo, hi = np.searchsorted(idx, [starts[i], starts[i + 1]])
+        if hi > lo:
+            out.append(np.asarray(np.load(str(p), mmap_mode="r")[idx[lo:hi] - starts[i]], dtype=np.float32))
+    return np.concatenate(out, axis=0)
+
+
+if __name__ == "__main__":
+    # 분위수 추정 오차 / 블록 셔플 커버리지 확인
+    import os
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    errs = rng.gamma(2.0, 0.01, 1_000_003)
+    sk = StreamingQuantile()
+    for s in range(0, len(errs), 10_000):
+        sk.update(errs[s:s + 10_000])
+    for p in (50, 95, 99, 99.9):
+        exact = float(np.percentile(errs, p))
+        est = sk.percentile(p)
+        print(f"p{p}: exact {exact:.6e} | sketch {est:.6e} | rel {abs(est / exact - 1):.3%} | buckets {sk.counts.size}")
+        assert abs(est / exact - 1) <= sk.rel_err + 1e-9
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, n in enumerate([5, 300, 1000, 17, 2500]):
+            X = np.full((n, 4), 0.0, dtype=np.float32)
+            X[:, 0] = np.arange(n) + 10_000 * i
+            paths.append(os.path.join(tmp, f"{i}.npy"))
+            np.save(paths[-1], X)
+        seen = [b[:, 0] for b in iter_blocks(paths, 0.0, 1.0, rng, buffer_windows=256)]
+        assert max(len(b) for b in seen) < 256 + 256
+        all_ids = np.sort(np.concatenate(seen))
+        expect = np.sort(np.concatenate([np.arange(n) + 10_000 * i for i, n in enumerate([5, 300, 1000, 17, 2500])]))
+        assert np.array_equal(all_ids, expect)
+        print(f"iter_blocks: {len(seen)} blocks, every window once")
@@ -1,19 +1,69 @@
 import os
+import time
+APP_IMPORT_STARTED = time.perf_counter()   # /ready 의 import_sec / startup_sec 기준
+import asyncio
+from typing import List
+from contextlib import asynccontextmanager
 from pathlib import Path
-import pandas as pd
 import numpy as np
-import hashlib
 from datetime import datetime
-from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect
 from motor.motor_asyncio import AsyncIOMotorClient
-from ai_assets.inference import NutPredictor
+from ai_assets.inference import NutPredictor, RESPONSE_MODES, format_window_results, summarize_errors, iter_ndjson
 from ai_assets.mlops import run_retraining
+from ai_assets.executor import InferenceExecutor, ExecutorBusy
+from ai_assets.batcher import MicroBatcher
+from ai_assets.realtime import run_stream, StreamStats, CLOSE_TRY_AGAIN
+from ai_assets.metrics import (
+    REGISTRY, STAGE_SECONDS, WINDOWS, ANOMALY_WINDOWS, BYTES, SAMPLES, RETRAIN_TRIGGERS,
+    MetricsMiddleware, record_stages, render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+)
+from ai_assets.drift import DriftMonitor
+from ai_assets.analysis import AnalysisCache
+from ai_assets.mongo_indexes import ensure_indexes, ERROR_ONLY, MEAN_ONLY, RESULT_CACHE_INDEXES
+from ai_assets.result_cache import ResultCache, CachedResult, hash_upload
+from ai_assets.captures import CaptureStore
+from ai_assets.feature_store import FeatureStore, prep_key
+from ai_assets.registry import list_model_rpms
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from fastapi.middleware.cors import CORSMiddleware 
-import uvicorn
-from io import BytesIO
-from scipy.stats import ks_2samp  # 분포 분석용 추가
-
-app = FastAPI()
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델 사전 로드(warm-up) 및 추론 워커 프로세스 기동
+    t0 = time.perf_counter()
+    versions = await asyncio.to_thread(predictor.registry.preload)
+    readiness["warmup_sec"] = time.perf_counter() - t0
+    # model_inputs 인덱스 생성 (rpm+created_at, 전체 created_at, sha256 unique)
+    try:
+        print(f"[Mongo] indexes: {await ensure_indexes(model_inputs_col)}")
+        if result_cache.col is not None:
+            print(f"[Mongo] result_cache indexes: {await ensure_indexes(result_cache.col, RESULT_CACHE_INDEXES)}")
+    except Exception as e:
+        print(f"[Mongo] 인덱스 생성 실패: {e}")
+    # 재학습 판단용 드리프트 통계 로드 (저장 이후 처음 로드되면 중복 집계되므로 요청 처리 전에 수행)
+    try:
+        await drift.load(versions.keys())
+    except Exception as e:
+        print(f"[Drift] 상태 로드 실패 (첫 사용 시 다시 시도): {e}")
+    await asyncio.to_thread(executor.start)
+    # 모델 파일 변경 감지 -> 새 버전으로 원자적 교체 (처리 중인 요청은 이전 버전으로 완료)
+    watcher = asyncio.create_task(predictor.registry.watch(MODEL_WATCH_SEC))
+    # 모든 RPM 모델이 로드 / warm-up 되어야 ready (/ready 가 200 을 반환)
+    readiness["missing_models"] = [r for r in list_model_rpms(MODEL_DIR) if r not in versions]
+    readiness["startup_sec"] = time.perf_counter() - APP_IMPORT_STARTED
+    readiness["ready"] = not readiness["missing_models"]
+    print(f"[Startup] import {readiness['import_sec']:.2f}s | model warm-up {readiness['warmup_sec']:.2f}s | "
+          f"ready after {readiness['startup_sec']:.2f}s")
+    yield
+    # 종료 중에는 로드밸런서가 새 요청을 보내지 않도록 먼저 not ready 로 전환
+    readiness["ready"] = False
+    watcher.cancel()
+    await drift.checkpoint()
+    executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,10 +72,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 요청별 지연 시간 (/metrics 의 nut_http_request_seconds)
+app.add_middleware(MetricsMiddleware)
 
 CURRENT_DIR = Path(__file__).parent 
 BASE_PATH = CURRENT_DIR / "ai_assets" 
 STORAGE_PATH = BASE_PATH / "validated_data"
+# 검증 통과 업로드: validated_data/<sha256 앞 2자>/<sha256>.f32 (float32 캡처, ai_assets/captures.py)
+capture_store = CaptureStore(STORAGE_PATH)
+# 검증 통과 업로드의 정규화 전 특징 (재학습이 decimation / FFT 없이 읽음, ai_assets/feature_store.py)
+FEATURE_STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR") or BASE_PATH / "feature_store")
+feature_store = FeatureStore(FEATURE_STORE_DIR)
 MODEL_DIR = BASE_PATH / "RPM_model" 
 DATA_DIR = BASE_PATH / "data_proc_rpm"
 
@@ -34,52 +91,135 @@ client = AsyncIOMotorClient(MONGO_DETAILS)
 db = client.nutdb 
 model_inputs_col = db.model_inputs 
 model_configs_col = db.model_configs 
+drift_state_col = db.drift_state
 
 predictor = NutPredictor(base_model_dir=str(MODEL_DIR), base_data_dir=str(DATA_DIR))
 
-# --- 유틸리티 로직 ---
+# 추론 프로세스 풀 설정 (INFER_WORKERS=0 이면 프로세스 없이 스레드에서 실행)
+INFER_WORKERS = int(os.getenv("INFER_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFER_MAX_PENDING = int(os.getenv("INFER_MAX_PENDING", "32"))
+INFER_TIMEOUT_SEC = float(os.getenv("INFER_TIMEOUT_SEC", "60"))
+
+executor = InferenceExecutor(
+    MODEL_DIR, DATA_DIR,
+    workers=INFER_WORKERS,
+    max_pending=INFER_MAX_PENDING,
+    timeout=INFER_TIMEOUT_SEC,
+    predictor=predictor,
+)
+
+# 동시 요청 micro-batching 설정 (최대 대기 시간 / 배치당 최대 윈도우 수)
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_WINDOWS = int(os.getenv("BATCH_MAX_WINDOWS", "4096"))
+
+batcher = MicroBatcher(max_windows=BATCH_MAX_WINDOWS, max_wait_ms=BATCH_MAX_WAIT_MS)
 
-def get_sha256(content: bytes):
-    return hashlib.sha256(content).hexdigest()
+# 실시간 스트리밍(/ws/stream) 설정: 동시 연결 수 / 연결당 채점 대기 청크 수 / 메시지당 최대 샘플 수 / 평균 추정 윈도우 수
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "256"))
+STREAM_QUEUE_CHUNKS = int(os.getenv("STREAM_QUEUE_CHUNKS", "8"))
+STREAM_MAX_CHUNK_SAMPLES = int(os.getenv("STREAM_MAX_CHUNK_SAMPLES", str(1 << 20)))
+STREAM_WARMUP_WINDOWS = int(os.getenv("STREAM_WARMUP_WINDOWS", "4"))
+
+stream_stats = StreamStats()
+
+# /ready 상태 (lifespan 이 모델 warm-up 과 워커 기동을 마치면 ready=True)
+readiness = {"ready": False, "import_sec": None, "warmup_sec": None, "startup_sec": None, "missing_models": []}
+
+# /metrics 요청 시점에 읽는 값
+REGISTRY.gauge("nut_executor_pending", "Uploads waiting for or running in the feature extraction pool.",
+               lambda: executor.pending)
+REGISTRY.gauge("nut_stream_active", "Open /ws/stream connections.", lambda: stream_stats.active)
+REGISTRY.gauge("nut_model_info", "Model version currently served per RPM.",
+               lambda: {(r, v): 1 for r, v in predictor.registry.versions().items()}, ("rpm", "version"))
+
+# 재학습 판단용 드리프트 통계 (메모리 증분 갱신 + Mongo 체크포인트)
+drift = DriftMonitor(model_inputs_col, drift_state_col)
+
+# latest-analysis 기준 분포 / 결과 캐시
+analysis_cache = AnalysisCache()
+
+# /predict 채점 결과 캐시 (업로드 SHA-256, RPM, 모델 버전): 메모리 LRU 한도(MB) / Mongo 영속 계층 사용 여부
+RESULT_CACHE_MB = float(os.getenv("RESULT_CACHE_MB", "64"))
+RESULT_CACHE_PERSIST = os.getenv("RESULT_CACHE_PERSIST", "0") == "1"
+
+result_cache = ResultCache(int(RESULT_CACHE_MB * 2**20), db.result_cache if RESULT_CACHE_PERSIST else None)
+# 새 모델 버전이 게시되면 그 RPM 의 이전 버전 결과 삭제
+predictor.registry.add_listener(result_cache.on_model_swap)
+REGISTRY.gauge("nut_result_cache_bytes", "Bytes held by the in-process scoring result cache.",
+               lambda: result_cache.snapshot()["bytes"])
+
+# 모델 파일 변경 감지 주기 (초)
+MODEL_WATCH_SEC = float(os.getenv("MODEL_WATCH_SEC", "5"))
+
+# --- 유틸리티 로직 ---
 
-async def trigger_retraining_if_needed(rpm: str, current_error: float):
+async def trigger_retraining_if_needed(rpm: str, errors):
     """
     MLOps: 재학습 트리거 조건
-    1. 데이터가 정확히 100개 쌓였을 때 (OR)
+    1. 데이터가 100개 단위로 쌓였을 때 (OR)
     2. 최근 100개 데이터에서 3가지 지표(분산, TCR, Shape) 이상이 모두 포착되었을 때
+    errors: 이번에 저장된 문서들의 오차 (/predict/batch 는 여러 건을 한 번에 저장)
+    통계는 DriftMonitor(ai_assets/drift.py)가 메모리에서 증분 갱신합니다.
     """
-    # 현재까지 쌓인 전체 데이터 수 확인
-    total_count = await model_inputs_col.count_documents({"rpm": rpm})
-    
-    # 조건 A: 데이터가 100개 쌓인 시점 (100, 200, 300...)
-    is_count_trigger = total_count > 0 and total_count % 100 == 0
-
-    # 조건 B: 3가지 성능 지표 이상 포착 여부 확인
-    is_performance_trigger = False
-    if total_count >= 100:
-        cursor = model_inputs_col.find({"rpm": rpm}).sort("created_at", -1).limit(100)
-        recent_docs = await cursor.to_list(length=100)
-        errors = np.array([doc.get("error_val", 0) for doc in recent_docs])
-
-        # 1. 오차 분산 커짐
-        is_var_high = np.var(errors) > 1.5 
-        # 2. Threshold Crossing Rate (TCR) 변화 (오차 0.5 초과 비율)
-        is_tcr_high = np.mean(errors > 0.5) > 0.2
-        # 3. Error Distribution Shape 붕괴 (초기 데이터와 현재 데이터 분포 비교)
-        first_docs = await model_inputs_col.find({"rpm": rpm}).sort("created_at", 1).limit(100).to_list(length=100)
-        base_errors = np.array([doc.get("error_val", 0) for doc in first_docs])
-        _, p_value = ks_2samp(base_errors, errors)
-        is_shape_collapsed = p_value < 0.05
-
-        # 3개 조건이 모두 포착되어야 성능 기반 트리거 작동
-        if is_var_high and is_tcr_high and is_shape_collapsed:
-            is_performance_trigger = True
+    decision = await drift.observe(rpm, errors)
 
     # 최종 판단: 개수 조건 만족 OR 성능 저하 조건 만족
-    if is_count_trigger or is_performance_trigger:
-        reason = "데이터 100개 도달" if is_count_trigger else "성능 지표 이상 포착"
+    if decision["should_retrain"]:
+        reason = "데이터 100개 도달" if decision["is_count_trigger"] else "성능 지표 이상 포착"
+        RETRAIN_TRIGGERS.inc(rpm, "count" if decision["is_count_trigger"] else "drift")
         print(f"--- [MLOps] RPM {rpm} 재학습 트리거 실행 (사유: {reason}) ---")
-        run_retraining() 
+        run_retraining(rpm)
+
+async def check_similarity(rpm: str, curr_mean: float):
+    """직전 저장 문서의 평균과 비교한 유사성 검사. 반환: (통과 여부, 평균 차이)"""
+    with STAGE_SECONDS.time("predict", "mongo_find_one"):
+        last_entry = await model_inputs_col.find_one(
+            {"rpm": rpm},
+            MEAN_ONLY,
+            sort=[("created_at", -1)]
+        )
+
+    if last_entry and "mean_val" in last_entry:
+        ref_mean = last_entry["mean_val"]
+    else:
+        ref_mean = curr_mean
+
+    mean_diff = abs(curr_mean - ref_mean)
+    return mean_diff < 5.0, mean_diff
+
+async def remove_duplicate_capture(sha256: str, path: str):
+    """
+    sha256 중복으로 저장이 취소된 업로드의 캡처 정리.
+    캡처 경로는 내용 주소이므로 기존 문서도 보통 같은 파일을 가리킵니다. (동시에 같은 파일이 올라온 경우 등)
+    기존 문서가 다른 경로(변환 전 CSV 등)를 가리킬 때만 삭제합니다.
+    """
+    existing = await model_inputs_col.find_one({"sha256": sha256}, {"storage_path": 1})
+    if existing is not None and existing.get("storage_path") != path:
+        capture_store.remove(path)
+
+async def persist_features(rpm: str, sha256: str, model, feat):
+    """(백그라운드) 저장된 업로드의 특징을 feature store 에 추가"""
+    try:
+        with STAGE_SECONDS.time("predict", "feature_store"):
+            await asyncio.to_thread(feature_store.append, rpm, sha256, model.version, prep_key(model.config), feat)
+    except Exception as e:
+        print(f"[FeatureStore] RPM {rpm} 기록 실패: {e}")
+
+def predict_response(response: dict, recon_err, threshold, mode: str):
+    """/predict 응답에 mode 형식의 윈도우별 결과를 붙입니다. (결과는 직렬화 직전까지 NumPy 배열로 유지)"""
+    with STAGE_SECONDS.time("predict", "format"):
+        if mode == "ndjson":
+            response["summary"] = summarize_errors(recon_err, threshold)
+            return StreamingResponse(iter_ndjson(response, recon_err, threshold),
+                                     media_type="application/x-ndjson")
+        if mode == "summary":
+            response["summary"] = summarize_errors(recon_err, threshold)
+            return response
+        response["data"] = format_window_results(recon_err, threshold, mode)
+        if mode == "columnar":
+            # 이미 JSON 기본형(list / float / bool)이므로 jsonable_encoder 순회를 건너뜀
+            return JSONResponse(response)
+        return response
 
 # --- 메인 API 엔드포인트 ---
 
@@ -88,49 +228,92 @@ async def predict_and_manage_data(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     rpm: str = Form(...),
-    user_id: int = Form(1)
+    user_id: int = Form(1),
+    mode: str = Form("full")
 ):
+    """
+    mode: 윈도우별 결과(data) 형식
+    - full: 윈도우마다 dict (기존 형식, Frontend 사용)
+    - columnar: {"threshold", "windows", "errors": [...], "is_anomaly": [...]}
+    - summary: data 없이 summary (평균 / p95 / p99 오차, 이상 비율, 오차 상위 윈도우)
+    - ndjson: 첫 줄에 요청 정보 + summary, 이후 윈도우마다 한 줄 (application/x-ndjson)
+    """
     file_ext = file.filename.split('.')[-1].lower()
     if file_ext != 'csv':
         raise HTTPException(status_code=400, detail="CSV 파일만 업로드 가능합니다.")
+    if mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode 는 {', '.join(RESPONSE_MODES)} 중 하나여야 합니다.")
 
-    try:
-        content = await file.read()
-        file_sha256 = get_sha256(content)
-        
-        raw_df = pd.read_csv(BytesIO(content), header=None)
-        df = raw_df.iloc[:, [0]]
-        
-        last_entry = await model_inputs_col.find_one(
-            {"rpm": rpm},
-            sort=[("created_at", -1)]
-        )
-        
-        curr_mean = float(df.iloc[:, 0].mean())
-        
-        if last_entry and "mean_val" in last_entry:
-            ref_mean = last_entry["mean_val"]
-        else:
-            ref_mean = curr_mean
+    # 요청 시작 시점의 모델 버전을 고정 (처리 도중 교체되어도 같은 버전으로 끝까지 처리)
+    model = predictor.get_model(rpm)
+    if model is None:
+        return {"status": "error", "message": "해당 RPM의 모델을 찾을 수 없습니다."}
+
+    spool_path = None
 
-        mean_diff = abs(curr_mean - ref_mean)
-        is_validated = mean_diff < 5.0 
+    try:
+        # 업로드 SHA-256 을 먼저 계산해 같은 파일 / 같은 모델 버전의 이전 채점 결과가 있으면 재사용
+        with STAGE_SECONDS.time("predict", "sha256"):
+            file_sha256 = await asyncio.to_thread(hash_upload, file.file)
+        with STAGE_SECONDS.time("predict", "result_cache"):
+            cached = await result_cache.get(file_sha256, rpm, model.version)
+        if cached is not None:
+            is_validated, mean_diff = await check_similarity(rpm, cached.mean)
+            # 이미 저장된 파일이거나 여전히 저장 대상이 아니면 추출 / 채점 / 저장 없이 반환
+            # (이전에 유사성 검사로 저장되지 않았는데 지금은 통과하면 아래에서 새로 처리해 저장)
+            if cached.stored or not is_validated:
+                response = {
+                    "status": "success",
+                    "is_saved": False,
+                    "is_duplicate": cached.stored,
+                    "cached": True,
+                    "rpm": rpm,
+                    "model_version": model.version,
+                    "mean_diff": round(mean_diff, 4),
+                }
+                return predict_response(response, cached.errors, model.threshold, mode)
+
+        # 업로드를 디스크 임시 파일로 넘겨 워커 프로세스에서 첫 번째 열 파싱 / decimation / 특징 추출 수행
+        # (첫 번째 열은 float32 캡처로 임시 파일에 기록해 두고, 유사성 검사 통과 시 그대로 저장 파일로 사용)
+        spool_path = capture_store.new_spool()
+        try:
+            with STAGE_SECONDS.time("predict", "extract"):
+                ingest = await executor.extract_upload(file, rpm, spool_path, model.version, file_sha256)
+        except ExecutorBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except asyncio.TimeoutError:
+            # 워커가 아직 spool 에 쓰고 있을 수 있으므로 삭제는 작업이 끝난 뒤 executor 가 수행
+            spool_path = None
+            raise HTTPException(status_code=504, detail=f"추론 시간 초과 ({executor.timeout:.0f}s)")
+        # 워커에서 잰 업로드 읽기 / CSV 파싱 / 원문 기록 / decimation / FFT 시간
+        record_stages("predict", ingest["timings"])
+        BYTES.inc("predict", value=ingest["nbytes"])
+        SAMPLES.inc("predict", value=ingest["n_samples"])
+
+        if ingest["n_samples"] == 0:
+            return {"status": "error", "message": "CSV에서 숫자 데이터를 찾을 수 없습니다."}
+
+        curr_mean = float(ingest["mean"])
+        is_validated, mean_diff = await check_similarity(rpm, curr_mean)
 
         # --- [추론 및 에러 처리 수정] ---
         try:
-            results = predictor.predict(df, rpm)
-            if results is None:
-                return {"status": "error", "message": "해당 RPM의 모델을 찾을 수 없습니다."}
-            
-            # 리스트로 반환될 경우 첫 번째 요소에서 에러값 추출 (AttributeError 방지)
-            if isinstance(results, list) and len(results) > 0:
-                # 결과 리스트의 첫 번째 항목이 딕셔너리인지 확인 후 추출
-                first_res = results[0]
-                current_error = first_res.get("recon_error", 0) if isinstance(first_res, dict) else 0
-            elif isinstance(results, dict):
-                current_error = results.get("recon_error", 0)
-            else:
-                current_error = 0
+            feat = ingest["features"]
+            if feat is None or len(feat) == 0:
+                return {"status": "error", "message": "윈도우를 생성할 수 없습니다. (신호 길이 부족)"}
+
+            # 동시에 들어온 요청들의 윈도우와 묶어서 AE 순전파 (micro-batching)
+            with STAGE_SECONDS.time("predict", "inference"):
+                # 저장 대상이면 정규화 전 특징을 feature store 용으로 남겨 둠
+                Xn = model.normalize(feat, inplace=not is_validated)
+                recon_err = await batcher.score(rpm, model.engine, Xn)
+            WINDOWS.inc("predict", rpm, value=len(recon_err))
+            ANOMALY_WINDOWS.inc("predict", rpm, value=int(np.count_nonzero(recon_err > model.threshold)))
+
+            # 첫 번째 윈도우의 오차를 대표값으로 저장
+            current_error = float(recon_err[0])
+            entry = CachedResult(file_sha256, rpm, model.version, recon_err, curr_mean,
+                                 ingest["n_samples"], ingest["nbytes"])
 
         except Exception as inf_err:
             return {
@@ -140,122 +323,391 @@ async def predict_and_manage_data(
             }
 
         save_path = ""
+        is_duplicate = False
         if is_validated:
-            target_dir = STORAGE_PATH / rpm
-            os.makedirs(target_dir, exist_ok=True)
-            
-            filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
-            save_path = str(target_dir / filename)
-            df.to_csv(save_path, index=False, header=False)
+            # 같은 업로드는 같은 경로 (이미 있으면 기존 파일 사용)
+            path, created = capture_store.commit(spool_path, file_sha256)
+            save_path = str(path)
+            spool_path = None
 
             doc = {
                 "user_id": user_id,
                 "rpm": rpm,
                 "original_filename": file.filename,
                 "storage_path": save_path,
-                "file_size_bytes": len(content),
+                "file_size_bytes": ingest["nbytes"],
                 "sha256": file_sha256,
                 "file_ext": file_ext,
                 "mime_type": file.content_type,
-                "row_count": len(df),
+                "row_count": ingest["n_samples"],
                 "mean_val": curr_mean,
                 "error_val": current_error, # 모니터링 분석을 위한 오차값 저장
+                "model_version": model.version,
                 "created_at": datetime.utcnow()
             }
-            await model_inputs_col.insert_one(doc)
-            
-            # 백그라운드 태스크로 재학습 트리거 로직 실행
-            background_tasks.add_task(trigger_retraining_if_needed, rpm, current_error)
+            try:
+                with STAGE_SECONDS.time("predict", "mongo_insert_one"):
+                    await model_inputs_col.insert_one(doc)
+            except DuplicateKeyError:
+                # 이미 저장된 파일 (sha256 unique 인덱스): 이번에 만든 캡처를 기존 문서가 쓰지 않을 때만 삭제
+                if created:
+                    await remove_duplicate_capture(file_sha256, save_path)
+                is_validated, is_duplicate = False, True
+                entry.stored = True
+                print(f"--- [Skip] 이미 저장된 파일입니다. (sha256: {file_sha256[:12]}) ---")
+            else:
+                entry.stored = True
+                background_tasks.add_task(persist_features, rpm, file_sha256, model, feat)
+                # 백그라운드 태스크로 재학습 트리거 로직 실행
+                background_tasks.add_task(trigger_retraining_if_needed, rpm, [current_error])
         else:
             print(f"--- [Skip] 유사성 검사 실패 (차이: {mean_diff:.2f}). 저장하지 않습니다. ---")
+        await result_cache.put(entry)
 
-        return {
+        response = {
             "status": "success",
             "is_saved": is_validated,
+            "is_duplicate": is_duplicate,
+            "cached": False,
             "rpm": rpm,
+            "model_version": model.version,
             "mean_diff": round(mean_diff, 4),
-            "data": results
         }
+        return predict_response(response, recon_err, model.threshold, mode)
 
+    except HTTPException:
+        raise
     except Exception as e:
         return {"status": "error", "message": f"처리 중 오류: {str(e)}"}
+    finally:
+        # 저장되지 않은 임시 파일 정리
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
 
-# --- 모니터링 및 관리 API ---
+@app.post("/predict/batch")
+async def predict_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    rpm: List[str] = Form(...),
+    user_id: int = Form(1)
+):
+    """
+    여러 CSV 를 한 번에 처리합니다. (데이터 로거의 교대 단위 일괄 업로드용)
+    rpm 은 파일마다 하나씩 보내거나, 모든 파일에 적용할 값 하나만 보냅니다.
+    - 특징 추출: 워커 프로세스에서 병렬 처리
+    - 추론: RPM 모델별로 모든 윈도우를 묶어 한 번에 수행
+    - 저장: 검증 통과 문서를 insert_many 한 번으로 기록, 재학습 트리거는 RPM 별 1회
+    """
+    t_start = time.perf_counter()
+    if len(rpm) == 1:
+        rpms = rpm * len(files)
+    elif len(rpm) == len(files):
+        rpms = rpm
+    else:
+        raise HTTPException(status_code=400, detail="rpm 은 1개 또는 파일 수만큼 보내야 합니다.")
+
+    summaries = [{"filename": f.filename, "rpm": r, "status": "pending"} for f, r in zip(files, rpms)]
+    jobs = []  # (index, file, rpm, spool_path)
+    spool_paths = []
+    models = {}  # rpm -> ModelVersion (배치 전체에서 같은 버전 사용)
 
+    try:
+        for i, (f, r) in enumerate(zip(files, rpms)):
+            if f.filename.split('.')[-1].lower() != 'csv':
+                summaries[i].update(status="error", message="CSV 파일만 업로드 가능합니다.")
+                continue
+            if r not in models:
+                models[r] = predictor.get_model(r)
+            if models[r] is None:
+                summaries[i].update(status="error", message="해당 RPM의 모델을 찾을 수 없습니다.")
+                continue
+            spool_paths.append(capture_store.new_spool())
+            jobs.append((i, f, r, spool_paths[-1]))
+
+        # 1. 특징 추출 (워커 수의 2배까지만 동시에 제출해 대기열 한도를 넘지 않도록 함)
+        sem = asyncio.Semaphore(max(1, executor.workers) * 2)
+
+        async def extract(job):
+            async with sem:
+                return await executor.extract_upload(job[1], job[2], job[3], models[job[2]].version)
+
+        extracted = await asyncio.gather(*[extract(job) for job in jobs], return_exceptions=True)
+        t_extract = time.perf_counter()
+        STAGE_SECONDS.observe(t_extract - t_start, "predict_batch", "extract")
+
+        groups = {}  # rpm -> [(job, ingest)]
+        for job, ingest in zip(jobs, extracted):
+            i = job[0]
+            if isinstance(ingest, BaseException):
+                summaries[i].update(status="error", message=f"처리 중 오류: {str(ingest) or type(ingest).__name__}")
+            elif ingest["n_samples"] == 0 or ingest["features"] is None or len(ingest["features"]) == 0:
+                summaries[i].update(status="error", message="윈도우를 생성할 수 없습니다. (신호 길이 부족)")
+            else:
+                groups.setdefault(job[2], []).append((job, ingest))
+            if not isinstance(ingest, BaseException):
+                record_stages("predict_batch", ingest["timings"])
+                BYTES.inc("predict_batch", value=ingest["nbytes"])
+                SAMPLES.inc("predict_batch", value=ingest["n_samples"])
+
+        # 2. RPM 모델별로 모든 윈도우를 묶어 한 번에 추론
+        async def score_group(r, items):
+            X = np.concatenate([ingest["features"] for _, ingest in items], axis=0)
+            X = models[r].normalize(X, inplace=True)
+            return await batcher.score(r, models[r].engine, X)
+
+        group_errors = await asyncio.gather(*[score_group(r, items) for r, items in groups.items()])
+        t_infer = time.perf_counter()
+        STAGE_SECONDS.observe(t_infer - t_extract, "predict_batch", "inference")
+
+        # 3. 유사성 검사 (RPM 별 최근 평균 1회 조회, 배치 안에서는 직전 저장 파일이 기준)
+        docs = []
+        doc_index = []    # docs[k] 에 해당하는 summaries 인덱스
+        doc_created = []  # docs[k] 의 캡처를 이번에 새로 만들었는지
+        doc_feats = []    # docs[k] 의 정규화 전 특징 (feature store 용)
+        for (r, items), err in zip(groups.items(), group_errors):
+            threshold = models[r].threshold
+            WINDOWS.inc("predict_batch", r, value=len(err))
+            ANOMALY_WINDOWS.inc("predict_batch", r, value=int(np.count_nonzero(err > threshold)))
+            with STAGE_SECONDS.time("predict_batch", "mongo_find_one"):
+                last_entry = await model_inputs_col.find_one(
+                    {"rpm": r}, MEAN_ONLY, sort=[("created_at", -1)]
+                )
+            ref_mean = last_entry.get("mean_val") if last_entry else None
+
+            start = 0
+            for (i, f, _, spool_path), ingest in items:
+                e = err[start:start + len(ingest["features"])]
+                start += len(e)
+
+                curr_mean = float(ingest["mean"])
+                if ref_mean is None:
+                    ref_mean = curr_mean
+                mean_diff = abs(curr_mean - ref_mean)
+                is_validated = mean_diff < 5.0
+
+                anomaly_windows = int(np.count_nonzero(e > threshold))
+                summaries[i].update(
+                    status="success",
+                    is_saved=is_validated,
+                    model_version=models[r].version,
+                    mean_diff=round(mean_diff, 4),
+                    windows=int(len(e)),
+                    error_mean=float(e.mean()),
+                    error_max=float(e.max()),
+                    threshold=threshold,
+                    anomaly_windows=anomaly_windows,
+                    anomaly_ratio=anomaly_windows / len(e),
+                )
+
+                if is_validated:
+                    path, created = capture_store.commit(spool_path, ingest["sha256"])
+                    save_path = str(path)
+                    ref_mean = curr_mean
+                    doc_index.append(i)
+                    doc_created.append(created)
+                    doc_feats.append(ingest["features"])
+                    docs.append({
+                        "user_id": user_id,
+                        "rpm": r,
+                        "original_filename": f.filename,
+                        "storage_path": save_path,
+                        "file_size_bytes": ingest["nbytes"],
+                        "sha256": ingest["sha256"],
+                        "file_ext": "csv",
+                        "mime_type": f.content_type,
+                        "row_count": ingest["n_samples"],
+                        "mean_val": curr_mean,
+                        "error_val": float(e[0]),
+                        "model_version": models[r].version,
+                        "created_at": datetime.utcnow()
+                    })
+
+        # 4. 검증 통과 문서 일괄 저장 + RPM 별 재학습 트리거 1회
+        failed = set()
+        if docs:
+            try:
+                with STAGE_SECONDS.time("predict_batch", "mongo_insert_many"):
+                    await model_inputs_col.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                for we in e.details.get("writeErrors", []):
+                    if we.get("code") != 11000:
+                        raise
+                    failed.add(we["index"])
+                # 이미 저장된 파일 (sha256 unique 인덱스) 은 저장 취소 (배치 안 중복이면 같은 캡처를 공유하므로 유지)
+                kept = {d["storage_path"] for k, d in enumerate(docs) if k not in failed}
+                for k in failed:
+                    d = docs[k]
+                    if doc_created[k] and d["storage_path"] not in kept:
+                        await remove_duplicate_capture(d["sha256"], d["storage_path"])
+                    summaries[doc_index[k]].update(is_saved=False, is_duplicate=True)
+        for k, d in enumerate(docs):
+            if k not in failed:
+                background_tasks.add_task(persist_features, d["rpm"], d["sha256"], models[d["rpm"]], doc_feats[k])
+        docs = [d for k, d in enumerate(docs) if k not in failed]
+        inserted = {}
+        for d in docs:
+            inserted.setdefault(d["rpm"], []).append(d["error_val"])
+        for r, errs in inserted.items():
+            background_tasks.add_task(trigger_retraining_if_needed, r, errs)
+        t_end = time.perf_counter()
+
+        return {
+            "status": "success",
+            "files": summaries,
+            "saved": len(docs),
+            "timing_ms": {
+                "extract": round((t_extract - t_start) * 1000, 2),
+                "inference": round((t_infer - t_extract) * 1000, 2),
+                "validate_and_store": round((t_end - t_infer) * 1000, 2),
+                "total": round((t_end - t_start) * 1000, 2),
+            }
+        }
+
+    finally:
+        # 저장되지 않은 임시 파일 정리
+        for path in spool_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+@app.websocket("/ws/stream/{rpm}")
+async def stream_predict(websocket: WebSocket, rpm: str):
+    """
+    센서 게이트웨이가 샘플 청크를 계속 보내면 완성된 윈도우마다 오차 / 이상 여부를 돌려보냅니다.
+    연결마다 decimation 필터 상태와 윈도우 겹침 버퍼를 유지하며, 메시지 형식은 ai_assets/realtime.py 참고.
+    """
+    await websocket.accept()
+    if stream_stats.active >= STREAM_MAX_CONNECTIONS:
+        stream_stats.rejected += 1
+        await websocket.close(code=CLOSE_TRY_AGAIN, reason="동시 스트림 수 초과")
+        return
+    model = predictor.get_model(rpm)
+    if model is None:
+        await websocket.send_json({"type": "error", "message": "해당 RPM의 모델을 찾을 수 없습니다."})
+        await websocket.close(code=1008)
+        return
+    try:
+        await run_stream(websocket, model, predictor.get_model, batcher, stream_stats,
+                         max_queue=STREAM_QUEUE_CHUNKS, max_chunk=STREAM_MAX_CHUNK_SAMPLES,
+                         warmup_windows=STREAM_WARMUP_WINDOWS)
+    except WebSocketDisconnect:
+        pass
+
+# --- 모니터링 및 관리 API ---
 
-import numpy as np
-import json
-from scipy.stats import ks_2samp
-from fastapi import APIRouter
 
 @app.get("/api/monitoring/latest-analysis")
 async def get_latest_analysis():
     # 1. MongoDB (nutdb.model_inputs)에서 가장 최근 데이터 1건 조회
-    latest_doc = await model_inputs_col.find().sort("created_at", -1).limit(1).to_list(length=1)
+    latest_doc = await model_inputs_col.find(
+        {}, {"rpm": 1, "original_filename": 1, "created_at": 1, "error_val": 1}
+    ).sort("created_at", -1).limit(1).to_list(length=1)
     
     if not latest_doc:
         return {"status": "error", "message": "No data found in MongoDB."}
     
     doc = latest_doc[0]
     rpm = str(doc["rpm"]) # "800", "1000", "1200" 등
-    
-    # 2. 모델 파일 경로 설정 (이미지 구조 기반)
-    model_path = MODEL_DIR / f"model_{rpm}"
-    baseline_path = model_path / "ae_errors.npy"
-    threshold_path = model_path / "threshold.json"
-    
-    if not baseline_path.exists():
-        return {"status": "error", "message": f"Baseline file for RPM {rpm} not found."}
 
-    # 3. 데이터 로드 및 통계 계산
-    baseline_errors = np.load(str(baseline_path))
-    with open(threshold_path, 'r') as f:
-        threshold_config = json.load(f)
-        limit = threshold_config.get("threshold", 0.5)
+    model = predictor.get_model(rpm)
+    if model is None:
+        return {"status": "error", "message": f"Model for RPM {rpm} not found."}
+
+    # 2. 새 업로드(최신 문서) 또는 새 모델 버전이 없으면 이전 분석 결과를 그대로 반환
+    key = (doc["_id"], rpm, model.version)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
 
-    # 최근 100개 오차 데이터를 가져와 지표 계산 (재학습 판단 로직과 동일)
-    cursor = model_inputs_col.find({"rpm": rpm}).sort("created_at", -1).limit(100)
+    # 3. 최근 100개 오차 데이터를 가져와 지표 계산 (기준 분포 / 구간은 모델 버전별로 캐시)
+    cursor = model_inputs_col.find({"rpm": rpm}, ERROR_ONLY).sort("created_at", -1).limit(100)
     recent_docs = await cursor.to_list(length=100)
     recent_errors = np.array([d.get("error_val", 0) for d in recent_docs])
 
-    variance = float(np.var(recent_errors))
-    tcr = float(np.mean(recent_errors > limit))
-    _, p_value = ks_2samp(baseline_errors, recent_errors)
-
-    # 4. 시각화를 위한 히스토그램 데이터 생성 (간소화 버전)
-    # 실제 구현 시에는 np.histogram을 사용하여 구간별 빈도를 계산합니다.
-    chart_data = [
-        {"range": "0.0-0.2", "baseline": 0.5, "current": 0.4},
-        {"range": "0.2-0.4", "baseline": 0.3, "current": 0.35},
-        {"range": "0.4-0.6", "baseline": 0.1, "current": 0.2}, # TCR 발생 구역
-        {"range": "0.6-0.8", "baseline": 0.05, "current": 0.04},
-        {"range": "0.8+", "baseline": 0.05, "current": 0.01},
-    ]
-
-    return {
-        "rpm": rpm,
-        "filename": doc["original_filename"],
-        "timestamp": doc["created_at"].isoformat(),
-        "metrics": {
-            "variance": variance,
-            "tcr": tcr,
-            "p_value": p_value,
-            "current_error": doc.get("error_val", 0),
-            "limit": limit
-        },
-        "chartData": chart_data
-    }
+    # 4. 기준 분포와 같은 구간으로 np.histogram 한 현재 분포 (chartData)
+    result = analysis_cache.analyze(model, doc, recent_errors)
+    if "chartData" in result:
+        analysis_cache.put(key, result)
+    return result
+
+@app.get("/api/models")
+async def get_model_versions():
+    """RPM 별 서비스 중인 모델 버전"""
+    return {"status": "success", "versions": predictor.registry.versions()}
+
+@app.get("/api/monitoring/drift/{rpm}")
+async def get_drift_state(rpm: str):
+    """재학습 판단에 사용되는 현재 드리프트 통계"""
+    await drift.get(rpm)
+    return {"status": "success", **drift.snapshot(rpm)}
+
+@app.get("/api/monitoring/batcher")
+async def get_batcher_stats():
+    """micro-batching 튜닝용 배치 크기 / 대기 시간 통계"""
+    return batcher.snapshot()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text format: 단계별 지연 시간 히스토그램 / 윈도우 수 / 처리 바이트 / 모델 캐시 / 재학습 트리거"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/monitoring/result-cache")
+async def get_result_cache_stats():
+    """/predict 채점 결과 캐시 항목 수 / 메모리 / 계층별 hit·miss / 제거 횟수"""
+    return result_cache.snapshot()
+
+@app.get("/api/monitoring/streams")
+async def get_stream_stats():
+    """실시간 스트림 연결 수 / 처리량 / backpressure 대기 횟수"""
+    return {"max_connections": STREAM_MAX_CONNECTIONS, **stream_stats.snapshot()}
 
 @app.delete("/monitoring/delete-anomaly")
 async def delete_anomaly_data(sha256: str):
-    doc = await model_inputs_col.find_one({"sha256": sha256})
+    doc = await model_inputs_col.find_one({"sha256": sha256}, {"storage_path": 1, "rpm": 1})
     if doc:
-        path = doc.get("storage_path")
-        if os.path.exists(path):
-            os.remove(path)
         await model_inputs_col.delete_one({"sha256": sha256})
+        # 캡처는 sha256 주소라 이 문서만 참조하지만, 변환 전 CSV(<시각>_<파일명>.csv)는 여러 문서가
+        # 같은 파일을 가리킬 수 있으므로 남은 문서가 참조하지 않을 때만 삭제
+        path = doc.get("storage_path")
+        if not (path and path.endswith(".csv")
+                and await model_inputs_col.find_one({"storage_path": path}, {"_id": 1}) is not None):
+            capture_store.remove(path)
+        await drift.invalidate(doc["rpm"])
+        analysis_cache.invalidate()
+        await result_cache.forget(sha256)
+        # feature store 는 append-only 이므로 tombstone 으로 제외 (threshold 재계산 / 재학습에 쓰이지 않도록)
+        await asyncio.to_thread(feature_store.forget, doc["rpm"], sha256)
         return {"status": "deleted", "sha256": sha256}
     return {"status": "error", "message": "기록을 찾을 수 없습니다."}
 
+@app.get("/ready")
+async def ready():
+    """readiness probe: 모든 모델의 사전 로드 / warm-up 과 추론 워커 기동이 끝난 뒤에만 200 (그 전과 종료 중은 503)"""
+    body = {**readiness, "models": predictor.registry.versions()}
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+# 모듈 끝까지 import 된 시간 (무거운 라이브러리는 학습 / 재학습 / 모니터링 경로에서 처음 사용할 때 로드)
+readiness["import_sec"] = time.perf_counter() - APP_IMPORT_STARTED
+
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    import argparse
+    import uvicorn
+
+    # dev: 코드 변경 시 자동 재시작 (reload 감시 프로세스 포함) / prod: reload 없이 바로 기동, 접근 로그 끔
+    ap = argparse.ArgumentParser(description="NUT 추론 API 서버")
+    ap.add_argument("--profile", choices=["dev", "prod"], default=os.getenv("APP_PROFILE", "dev"))
+    ap.add_argument("--host", default=None, help="기본: dev 127.0.0.1 / prod 0.0.0.0")
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("UVICORN_WORKERS", "1")),
+                    help="1 만 지원 (drift 카운트 / 결과 캐시 / 배처 / 레지스트리 감시가 프로세스 단위이므로 "
+                         "확장은 컨테이너를 늘리고, 코어 활용은 INFER_WORKERS 로 조절)")
+    args = ap.parse_args()
+    if args.workers != 1:
+        # 프로세스마다 DriftMonitor 가 같은 drift_state 문서를 덮어쓰고, 재학습 트리거도 N 배 늦게 걸림
+        ap.error("--workers 는 1 만 지원합니다. 서버 프로세스를 늘리려면 컨테이너(레플리카)를 늘리세요.")
+
+    if args.profile == "dev":
+        uvicorn.run("app:app", host=args.host or "127.0.0.1", port=args.port, reload=True)
+    else:
+        # 이미 import 된 app 객체를 그대로 사용 (모듈을 한 번 더 import 하지 않음)
+        uvicorn.run(app, host=args.host or "0.0.0.0", port=args.port, access_log=False,
+                    timeout_graceful_shutdown=30)
\ No newline at end of file
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_decimation.py
+# scipy.signal.decimate vs 단일 단계 polyphase vs cascade polyphase 비교: 시간 / scipy 대비 차이 / 재구성 오차 변화
+#
+#   python benchmarks/bench_decimation.py                        # Case2_800.csv x 10 (3.6M 샘플), q=500
+#   python benchmarks/bench_decimation.py --tile 30 --repeat 7 --out decim.json
+#
+# 시간은 repeat 회 중 최솟값입니다. 재구성 오차 변화는 현재 RPM 800 모델에 두 방식의 특징을 넣어 윈도우별로 비교합니다.
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+from scipy.signal import decimate as scipy_decimate
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.decimation import decimate, design_stages, fir_taps   # noqa: E402
+from ai_assets.ingest import read_column_csv                          # noqa: E402
+from ai_assets.registry import ModelRegistry                          # noqa: E402
+from ai_assets.features import extract_features                       # noqa: E402
+from retrain_pipeline import MODEL_DIR, DATA_DIR                      # noqa: E402
+
+SOURCE_CSV = BACKEND_DIR / "ai_assets" / "Case2_800.csv"
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return out, min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="decimation 방식 비교")
+    ap.add_argument("--q", type=int, default=500)
+    ap.add_argument("--tile", type=int, default=10, help="Case2_800.csv 를 반복해 붙이는 횟수")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--rpm", default="800")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    x1 = read_column_csv(SOURCE_CSV).astype(np.float32)
+    x = np.tile(x1, args.tile)
+    stages = design_stages(args.q)
+    print(f"{len(x):,} samples, q={args.q} | single taps {len(fir_taps(args.q))} | "
+          f"cascade stages {[s for s, _ in stages]} taps {[len(h) for _, h in stages]}")
+
+    ref, t_scipy = best_time(lambda: scipy_decimate(x, args.q, ftype="fir", zero_phase=True), args.repeat)
+    single, t_single = best_time(lambda: decimate(x, args.q, cascade=False), args.repeat)
+    casc, t_casc = best_time(lambda: decimate(x, args.q), args.repeat)
+    rms = float(np.sqrt(np.mean(ref ** 2)))
+
+    def rel_rms(y):
+        return float(np.sqrt(np.mean((y.astype(np.float64) - ref) ** 2))) / rms
+
+    rows = {
+        "scipy": {"ms": t_scipy * 1e3, "rel_rms_vs_scipy": 0.0},
+        "single": {"ms": t_single * 1e3, "rel_rms_vs_scipy": rel_rms(single)},
+        "cascade": {"ms": t_casc * 1e3, "rel_rms_vs_scipy": rel_rms(casc)},
+    }
+    print(f"\n{'method':<10}{'ms':>9}{'speedup':>9}{'rel RMS':>11}")
+    for name, r in rows.items():
+        r["speedup"] = t_scipy * 1e3 / r["ms"]
+        print(f"{name:<10}{r['ms']:>9.1f}{r['speedup']:>8.2f}x{r['rel_rms_vs_scipy']:>11.2e}")
+
+    # 같은 모델에서 단일 단계 / cascade 특징의 윈도우별 재구성 오차 차이
+    mv = ModelRegistry(MODEL_DIR, DATA_DIR).get(args.rpm)
+    win, hop, decim = mv.config["win"], mv.config["hop"], mv.config["decim"]
+    errs = {}
+    for cascade in (False, True):
+        f = extract_features(x1, win, hop, decim, cascade=cascade)
+        errs[cascade] = mv.engine.reconstruction_error(mv.normalize(f, inplace=True))
+    change = np.abs(errs[True] / errs[False] - 1.0)
+    thr = mv.threshold
+    flips = int(np.sum((errs[True] > thr) != (errs[False] > thr)))
+    print(f"\nRPM {args.rpm} model ({'cascade' if mv.config['cascade'] else 'single-stage'} trained): "
+          f"per-window error change max {change.max():.2%} mean {change.mean():.2%} | "
+          f"threshold decisions changed {flips}/{len(change)}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "samples": len(x), **rows,
+                       "error_change_max": float(change.max()), "error_change_mean": float(change.mean()),
+                       "decision_flips": flips}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
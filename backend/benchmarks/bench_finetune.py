@@ -0,0 +1,111 @@
+# backend/benchmarks/bench_finetune.py
+# 전체 재학습(mode="full") vs 증분 미세 조정(mode="incremental") 비교: wall time / threshold 안정성 / held-out 오차
+#
+#   python benchmarks/bench_finetune.py                       # RPM 800, 3 라운드 x 60 캡처
+#   python benchmarks/bench_finetune.py --rounds 5 --captures 100 --out finetune.json
+#
+# Case2_800.csv 에서 구간을 잘라 이득/잡음을 섞은 캡처를 만들어 "교대마다 새 검증 파일이 쌓이는" 상황을 흉내 냅니다.
+# RPM_model 을 임시 폴더 두 곳에 복사해 각각 full / incremental 로 라운드마다 새 버전을 발행합니다.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.ingest import read_column_csv          # noqa: E402
+from ai_assets.registry import ModelRegistry          # noqa: E402
+from retrain_pipeline import run_retrain, MODEL_DIR, DATA_DIR  # noqa: E402
+
+SOURCE_CSV = BACKEND_DIR / "ai_assets" / "Case2_800.csv"
+
+
+def make_captures(signal, out_dir, start, n, length, rng):
+    """signal 에서 length 샘플씩 잘라 이득 / 잡음을 섞은 캡처 CSV n 개"""
+    paths = []
+    for i in range(start, start + n):
+        off = int(rng.integers(0, len(signal) - length))
+        x = signal[off:off + length] * (1.0 + 0.05 * rng.normal()) + rng.normal(0.0, 0.01 * signal.std(), length)
+        path = os.path.join(out_dir, f"cap_{i:05d}.csv")
+        x.astype(np.float32).tofile(path, sep="\n", format="%.6f")
+        paths.append(path)
+    return paths
+
+
+def heldout_error(model_root, rpm, paths) -> float:
+    mv = ModelRegistry(model_root, DATA_DIR).get(rpm)
+    errs = [mv.engine.reconstruction_error(mv.normalize(mv.extract_features(read_column_csv(p).astype(np.float32)), inplace=True))
+            for p in paths]
+    return float(np.concatenate(errs).mean())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="full vs incremental 재학습 비교")
+    ap.add_argument("--rpm", default="800")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--captures", type=int, default=60, help="라운드마다 추가되는 캡처 수")
+    ap.add_argument("--length", type=int, default=200_000, help="캡처 길이(샘플)")
+    ap.add_argument("--heldout", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    signal = read_column_csv(SOURCE_CSV)
+    tmp = Path(tempfile.mkdtemp(prefix="bench_finetune_"))
+    try:
+        cap_dir = tmp / "captures"
+        cap_dir.mkdir()
+        roots = {m: tmp / m for m in ("full", "incremental")}
+        for root in roots.values():
+            shutil.copytree(MODEL_DIR, root)
+        heldout = make_captures(signal, cap_dir, 10**4, args.heldout, args.length, rng)
+
+        rows, all_paths = [], []
+        for r in range(1, args.rounds + 1):
+            new = make_captures(signal, cap_dir, len(all_paths), args.captures, args.length, rng)
+            all_paths += new
+            for mode, root in roots.items():
+                data = all_paths if mode == "full" else new
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rep = run_retrain(args.rpm, data_list=list(data), workers=args.workers, mode=mode,
+                                      base_model_dir=root, base_data_dir=DATA_DIR)
+                wall = time.perf_counter() - t0
+                rows.append({
+                    "round": r, "mode": mode, "wall_sec": round(wall, 3),
+                    "train_sec": rep["timings_sec"]["train"], "extract_sec": rep["timings_sec"]["extract"],
+                    "windows": rep["windows"], "epochs": rep["fit"].get("epochs"),
+                    "threshold": rep["threshold"], "threshold_change": rep["threshold_change"],
+                    "heldout_error": heldout_error(root, args.rpm, heldout),
+                })
+
+        print(f"\n{'round':>5} {'mode':<12}{'wall s':>8}{'train s':>9}{'windows':>9}{'epochs':>8}"
+              f"{'threshold':>12}{'thr chg':>9}{'heldout':>10}")
+        for row in rows:
+            chg = row["threshold_change"]
+            print(f"{row['round']:>5} {row['mode']:<12}{row['wall_sec']:>8.2f}{row['train_sec']:>9.2f}"
+                  f"{row['windows']:>9}{row['epochs'] or 0:>8}{row['threshold']:>12.5f}"
+                  f"{(f'{chg:+.1%}' if chg is not None else '-'):>9}{row['heldout_error']:>10.5f}")
+        for mode in roots:
+            sel = [x for x in rows if x["mode"] == mode]
+            thr = np.array([x["threshold"] for x in sel])
+            print(f"{mode:<12} mean wall {np.mean([x['wall_sec'] for x in sel]):.2f}s | "
+                  f"threshold CV {thr.std() / thr.mean():.2%} across rounds")
+
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(rows, f, indent=2)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/benchmarks/bench_hot_path.py
+# 신호 처리 / 추론 경로 단계별 micro-benchmark (CSV 파싱 -> decimation -> windowing -> FFT/log1p -> 정규화 -> AE 순전파 -> 오차)
+#
+#   python benchmarks/bench_hot_path.py                                  # 합성 5s / 3min / 15min + Case2_800.csv
+#   python benchmarks/bench_hot_path.py --out hot_path.json              # 결과 저장 (다음 비교의 baseline 으로 사용)
+#   python benchmarks/bench_hot_path.py --baseline hot_path.json --tolerance 0.15   # 회귀 시 종료 코드 1
+#   python benchmarks/bench_hot_path.py --lengths 100000 36000000 --stages decimate fft_log1p
+#
+# 단계마다 한 번 측정이 min_time 이상이 되도록 반복 횟수를 정하고 repeat 회 측정한 중앙값을 사용합니다.
+# 메모리는 tracemalloc 으로 한 번 호출하는 동안의 할당 최대치(입력 제외)를 잽니다.
+# 비교는 잡음이 적은 최솟값(best of repeat) 시간의 비율이며, 1 + tolerance 를 넘으면 회귀로 봅니다.
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import importlib.util
+from pathlib import Path
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.decimation import decimate                                # noqa: E402
+from ai_assets.features import frame_signal, log_fft_features           # noqa: E402
+from ai_assets.ingest import CsvColumnParser, CHUNK_SIZE                 # noqa: E402
+from ai_assets.inference import NutPredictor                             # noqa: E402
+
+SOURCE_CSV = BACKEND_DIR / "ai_assets" / "Case2_800.csv"
+MODEL_DIR = BACKEND_DIR / "ai_assets" / "RPM_model"
+DATA_DIR = BACKEND_DIR / "ai_assets" / "data_proc_rpm"
+FS = 20000
+DEFAULT_LENGTHS = [100_000, 3_600_000, 18_000_000]    # 5 s / 3 min / 15 min (윈도우 3 / 143 / 719 개)
+STAGES = ["csv_parse", "decimate", "decimate_single", "window", "fft_log1p", "normalize",
+          "ae_forward", "error_reduce", "ae_forward_error", "mlp_predict_ref", "end_to_end"]
+
+
+def load_mlp_predict():
+    """Trainingpy/03_score_sklearn.py 의 mlp_predict (float64 기준 구현)"""
+    spec = importlib.util.spec_from_file_location("score_sklearn", BACKEND_DIR / "Trainingpy" / "03_score_sklearn.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod.mlp_predict
+
+
+def synthetic_signal(n, rpm=800, seed=0) -> np.ndarray:
+    """회전 주파수 고조파 + 백색 잡음 (float32)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n, dtype=np.float64) / FS
+    f0 = rpm / 60.0
+    x = sum(a * np.sin(2 * np.pi * k * f0 * t + rng.uniform(0, 2 * np.pi)) for k, a in [(1, 1.0), (2, 0.4), (3, 0.2), (7, 0.1)])
+    x += rng.normal(0.0, 0.3, n)
+    return x.astype(np.float32)
+
+
+def csv_bytes(x) -> bytes:
+    """업로드 형식(헤더 없는 단일 열, 소수점 6자리) CSV 내용"""
+    with tempfile.TemporaryFile() as f:
+        x.tofile(f, sep="\n", format="%.6f")
+        f.write(b"\n")
+        f.seek(0)
+        return f.read()
+
+
+def time_stage(fn, repeat, min_time):
+    """(중앙값 초, 최솟값 초, 호출당 반복 수)"""
+    fn()                                    # warm-up (버퍼 할당 / 필터 설계 캐시)
+    t0 = time.perf_counter()
+    fn()
+    once = max(time.perf_counter() - t0, 1e-7)
+    number = max(1, int(np.ceil(min_time / once)))
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+    return float(np.median(times)), float(np.min(times)), number
+
+
+def peak_memory(fn) -> float:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - base) / 2**20
+
+
+def build_stages(x, text, mv, predictor, mlp_predict):
+    """단계 이름 -> 인자 없는 함수. 각 단계의 입력은 앞 단계 결과를 미리 계산해 고정합니다."""
+    cfg = mv.config
+    win, hop, decim, cascade = cfg["win"], cfg["hop"], cfg["decim"], cfg["cascade"]
+    xd = decimate(x, decim, cascade=cascade)
+    xc = xd - xd.mean(axis=0, keepdims=True)
+    frames = frame_signal(xc, win, hop)
+    feat_buf = np.empty((frames.shape[0], mv.engine.n_features), dtype=np.float32)
+    feat = log_fft_features(frames).copy()
+    Xn = mv.normalize(feat)
+    recon = mv.engine.predict(Xn)
+    diff = np.empty_like(recon)
+    err = np.empty(len(Xn), dtype=np.float32)
+    coefs64 = [W.astype(np.float64) for W in mv.engine.coefs]
+    intercepts64 = [b.astype(np.float64) for b in mv.engine.intercepts]
+
+    def csv_parse():
+        # 업로드 경로(executor.InferenceExecutor.extract_upload)와 같은 CHUNK_SIZE 단위 입력
+        p = CsvColumnParser()
+        for s in range(0, len(text), CHUNK_SIZE):
+            p.feed(text[s:s + CHUNK_SIZE])
+        p.flush()
+
+    def error_reduce():
+        np.subtract(recon, Xn, out=diff)
+        np.einsum("ij,ij->i", diff, diff, out=err)
+        np.divide(err, np.float32(diff.shape[1]), out=err)
+
+    def mlp_ref():
+        r = mlp_predict(Xn, coefs64, intercepts64)
+        np.mean((r - Xn) ** 2, axis=1)
+
+    return len(frames), {
+        "csv_parse": csv_parse,
+        "decimate": lambda: decimate(x, decim, cascade=True),
+        "decimate_single": lambda: decimate(x, decim, cascade=False),
+        "window": lambda: frame_signal(xd - xd.mean(axis=0, keepdims=True), win, hop),
+        "fft_log1p": lambda: log_fft_features(frames, out=feat_buf),
+        "normalize": lambda: mv.normalize(feat),
+        "ae_forward": lambda: mv.engine.predict(Xn),
+        "error_reduce": error_reduce,
+        "ae_forward_error": lambda: mv.engine.reconstruction_error(Xn),
+        "mlp_predict_ref": mlp_ref,
+        "end_to_end": lambda: predictor.predict_signal(x, mv.rpm),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """반환: (회귀 목록, 비교 행 목록)"""
+    base = {(r["input"], r["stage"]): r for r in baseline["results"]}
+    rows, regressions = [], []
+    for r in results:
+        b = base.get((r["input"], r["stage"]))
+        if b is None:
+            continue
+        ratio = r["min_sec"] / b["min_sec"]
+        row = {"input": r["input"], "stage": r["stage"], "ratio": ratio,
+               "baseline_sec": b["min_sec"], "current_sec": r["min_sec"]}
+        rows.append(row)
+        if ratio > 1.0 + tolerance:
+            regressions.append(row)
+    return regressions, rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="신호 처리 / 추론 경로 단계별 micro-benchmark")
+    ap.add_argument("--lengths", type=int, nargs="*", default=DEFAULT_LENGTHS, help="합성 신호 길이 (샘플)")
+    ap.add_argument("--no-csv", action="store_true", help="Case2_800.csv 입력 제외")
+    ap.add_argument("--stages", nargs="*", default=STAGES, choices=STAGES)
+    ap.add_argument("--rpm", default="800")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--min-time", type=float, default=0.05, help="측정 1회의 최소 시간 (초)")
+    ap.add_argument("--out", default=None, help="결과 JSON 경로")
+    ap.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="허용 시간 증가 비율")
+    args = ap.parse_args()
+
+    predictor = NutPredictor(str(MODEL_DIR), str(DATA_DIR))
+    mv = predictor.get_model(args.rpm)
+    if mv is None:
+        sys.exit(f"RPM {args.rpm} 모델을 찾을 수 없습니다.")
+    mlp_predict = load_mlp_predict()
+
+    inputs = [(f"synthetic_{n}", synthetic_signal(n)) for n in args.lengths]
+    if not args.no_csv and SOURCE_CSV.exists():
+        inputs.append(("Case2_800.csv", None))
+
+    results = []
+    print(f"{'input':<20}{'stage':<18}{'median ms':>11}{'Msamples/s':>12}{'windows/s':>12}{'peak MiB':>10}")
+    for name, x in inputs:
+        text = SOURCE_CSV.read_bytes() if x is None else csv_bytes(x)
+        if x is None:
+            p = CsvColumnParser()
+            x = np.concatenate([p.feed(text), p.flush()]).astype(np.float32)
+        n_windows, stages = build_stages(x, text, mv, predictor, mlp_predict)
+        for stage in args.stages:
+            fn = stages[stage]
+            med, best, number = time_stage(fn, args.repeat, args.min_time)
+            peak = peak_memory(fn)
+            row = {
+                "input": name, "stage": stage, "samples": int(len(x)), "windows": int(n_windows),
+                "median_sec": med, "min_sec": best, "loops": number,
+                "samples_per_sec": len(x) / med, "windows_per_sec": n_windows / med, "peak_mib": peak,
+            }
+            results.append(row)
+            print(f"{name:<20}{stage:<18}{med * 1e3:>11.3f}{row['samples_per_sec'] / 1e6:>12.1f}"
+                  f"{row['windows_per_sec']:>12.0f}{peak:>10.2f}")
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "rpm": args.rpm, "model_version": mv.version, "repeat": args.repeat, "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, rows = compare(results, baseline, args.tolerance)
+        print(f"\nvs baseline {args.baseline} ({baseline['meta'].get('created')}, tolerance +{args.tolerance:.0%}): "
+              f"{len(rows)} compared, {len(regressions)} regressions")
+        for r in sorted(rows, key=lambda r: -r["ratio"]):
+            mark = "REGRESSION" if r in regressions else ("faster" if r["ratio"] < 1.0 - args.tolerance else "")
+            print(f"  {r['input']:<20}{r['stage']:<18}{r['baseline_sec'] * 1e3:>10.3f} -> {r['current_sec'] * 1e3:>10.3f} ms "
+                  f"({r['ratio'] - 1.0:+.1%}) {mark}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
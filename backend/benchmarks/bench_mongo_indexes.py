@@ -0,0 +1,165 @@
+# backend/benchmarks/bench_mongo_indexes.py
+# model_inputs 조회 지연 비교: 인덱스 없음 + 문서 전체 조회(기존)  vs  인덱스 + 프로젝션(현재 app.py)
+#
+#   python benchmarks/bench_mongo_indexes.py                      # localhost:27017, 1,000,000 문서
+#   python benchmarks/bench_mongo_indexes.py --uri mongodb://host:27017 --n 200000
+#   python benchmarks/bench_mongo_indexes.py --mock --n 20000     # mongod 없이 mongomock 사용
+#
+# 주의: mongomock 은 인덱스를 조회에 사용하지 않으므로 --mock 결과는 프로젝션 효과만 보여 줍니다.
+# 벤치마크용 DB(nutdb_bench)를 사용하며 서비스 DB(nutdb)는 건드리지 않습니다.
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ai_assets.mongo_indexes import MODEL_INPUTS_INDEXES, ERROR_ONLY, MEAN_ONLY  # noqa: E402
+
+RPMS = ["800", "1000", "1200"]
+
+
+def connect(uri: str, mock: bool):
+    if mock:
+        import mongomock
+        return mongomock.MongoClient(), "mongomock"
+    from pymongo import MongoClient
+    client = MongoClient(uri, serverSelectionTimeoutMS=3000)
+    info = client.server_info()
+    return client, f"mongod {info.get('version')}"
+
+
+def populate(col, n: int, batch: int = 10000, seed: int = 0):
+    """app.py 가 저장하는 것과 같은 형태의 문서 n 개를 생성합니다."""
+    rng = np.random.default_rng(seed)
+    t0 = datetime(2025, 1, 1)
+    for start in range(0, n, batch):
+        m = min(batch, n - start)
+        rpm_idx = rng.integers(0, len(RPMS), m)
+        errors = rng.gamma(2.0, 0.1, m)
+        means = rng.normal(0.0, 1.0, m)
+        docs = []
+        for k in range(m):
+            i = start + k
+            rpm = RPMS[rpm_idx[k]]
+            name = f"sig_{i:07d}.csv"
+            docs.append({
+                "user_id": 1,
+                "rpm": rpm,
+                "original_filename": name,
+                "storage_path": f"/data/validated_data/{rpm}/20250101000000_{name}",
+                "file_size_bytes": 2_000_000,
+                "sha256": hashlib.sha256(str(i).encode()).hexdigest(),
+                "file_ext": "csv",
+                "mime_type": "text/csv",
+                "row_count": 200_000,
+                "mean_val": float(means[k]),
+                "error_val": float(errors[k]),
+                "model_version": "a733fe8db1a8",
+                "created_at": t0 + timedelta(seconds=i),
+            })
+        col.insert_many(docs, ordered=False)
+
+
+def queries(indexed: bool):
+    """(이름, cursor 생성 함수) 목록 - indexed=False 는 프로젝션 없는 기존 조회"""
+    err = ERROR_ONLY if indexed else None
+    mean = MEAN_ONLY if indexed else None
+    latest = {"rpm": 1, "original_filename": 1, "created_at": 1, "error_val": 1, "_id": 0} if indexed else None
+    sha = hashlib.sha256(b"123456").hexdigest()
+    return [
+        ("last_mean_val (/predict)",
+         lambda c: c.find({"rpm": "800"}, mean).sort("created_at", -1).limit(1)),
+        ("recent_100_errors (drift / latest-analysis)",
+         lambda c: c.find({"rpm": "800"}, err).sort("created_at", -1).limit(100)),
+        ("first_100_errors (drift baseline)",
+         lambda c: c.find({"rpm": "800"}, err).sort("created_at", 1).limit(100)),
+        ("latest_doc (latest-analysis)",
+         lambda c: c.find({}, latest).sort("created_at", -1).limit(1)),
+        ("find_by_sha256 (delete)",
+         lambda c: c.find({"sha256": sha}, {"storage_path": 1, "rpm": 1} if indexed else None).limit(1)),
+    ]
+
+
+def plan_summary(cursor) -> dict:
+    """explain 결과에서 실행 단계 / 읽은 키·문서 수만 추립니다. (mongomock 은 미지원)"""
+    try:
+        ex = cursor.explain()
+    except Exception:
+        return {}
+    stats = ex.get("executionStats", {})
+    stages = []
+    node = ex.get("queryPlanner", {}).get("winningPlan", {})
+    while node:
+        stages.append(node.get("stage"))
+        node = node.get("inputStage") or node.get("queryPlan", {}).get("inputStage")
+    return {
+        "stages": ">".join(s for s in stages if s),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+    }
+
+
+def run(col, indexed: bool, repeat: int) -> dict:
+    out = {}
+    for name, make in queries(indexed):
+        list(make(col))  # warm-up
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            list(make(col))
+            times.append((time.perf_counter() - t0) * 1000.0)
+        out[name] = {"median_ms": float(np.median(times)), "p95_ms": float(np.percentile(times, 95))}
+        out[name].update(plan_summary(make(col)))
+    t0 = time.perf_counter()
+    col.count_documents({"rpm": "800"})
+    out["count_documents(rpm)"] = {"median_ms": (time.perf_counter() - t0) * 1000.0}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="model_inputs 인덱스 / 프로젝션 벤치마크")
+    ap.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    ap.add_argument("--db", default="nutdb_bench")
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--mock", action="store_true", help="mongod 대신 mongomock 사용")
+    ap.add_argument("--keep", action="store_true", help="종료 후 벤치마크 컬렉션을 남김")
+    ap.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args()
+
+    client, server = connect(args.uri, args.mock)
+    col = client[args.db].model_inputs
+    col.drop()
+
+    t0 = time.perf_counter()
+    populate(col, args.n)
+    print(f"[{server}] {args.n:,} documents inserted in {time.perf_counter() - t0:.1f}s")
+
+    before = run(col, indexed=False, repeat=args.repeat)
+    t0 = time.perf_counter()
+    col.create_indexes(MODEL_INPUTS_INDEXES)
+    print(f"indexes built in {time.perf_counter() - t0:.1f}s")
+    after = run(col, indexed=True, repeat=args.repeat)
+
+    print(f"\n{'query':<46}{'before ms':>12}{'after ms':>12}{'speedup':>10}  plan (after)")
+    for name in before:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        plan = after[name].get("stages", "")
+        if after[name].get("docs_examined") is not None:
+            plan += f"  docs {before[name].get('docs_examined')} -> {after[name]['docs_examined']}"
+        print(f"{name:<46}{b:>12.2f}{a:>12.2f}{b / max(a, 1e-9):>9.1f}x  {plan}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"server": server, "n": args.n, "before": before, "after": after}, f, indent=2)
+    if not args.keep:
+        col.drop()
+
+
+if __name__ == "__main__":
+    main()
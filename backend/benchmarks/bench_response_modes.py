@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_response_modes.py
+# /predict 응답 형식별 결과 생성 + JSON 직렬화 시간과 응답 크기 (full / columnar / summary / ndjson)
+#
+#   python benchmarks/bench_response_modes.py                         # 윈도우 1k / 10k / 100k
+#   python benchmarks/bench_response_modes.py --windows 50000 --out modes.json
+#
+# full 은 FastAPI 기본 경로(jsonable_encoder -> json.dumps), columnar / summary 는 JSONResponse 와 같은 json.dumps 입니다.
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.inference import RESPONSE_MODES, format_window_results, summarize_errors, iter_ndjson   # noqa: E402
+
+THRESHOLD = 0.01761365495622158
+
+
+def render(mode, err, thr):
+    """응답 본문 bytes (app.py 의 /predict 와 같은 경로)"""
+    head = {"status": "success", "rpm": "800"}
+    if mode == "ndjson":
+        head["summary"] = summarize_errors(err, thr)
+        return "".join(iter_ndjson(head, err, thr)).encode("utf-8")
+    if mode == "summary":
+        body = {**head, "summary": summarize_errors(err, thr)}
+    else:
+        body = {**head, "data": format_window_results(err, thr, mode)}
+    if mode == "full":
+        body = jsonable_encoder(body)
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return out, min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="/predict 응답 형식 비교")
+    ap.add_argument("--windows", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    print(f"{'windows':>9}  {'mode':<10}{'ms':>10}{'KiB':>11}{'vs full':>9}")
+    for n in args.windows:
+        err = rng.gamma(2.0, 0.01, n).astype(np.float32)
+        base = None
+        for mode in RESPONSE_MODES:
+            body, sec = best_time(lambda: render(mode, err, THRESHOLD), args.repeat)
+            base = base or sec
+            rows.append({"windows": n, "mode": mode, "ms": sec * 1e3, "bytes": len(body)})
+            print(f"{n:>9}  {mode:<10}{sec * 1e3:>10.2f}{len(body) / 1024:>11.1f}{base / sec:>8.1f}x")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
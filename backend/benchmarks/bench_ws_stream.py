@@ -0,0 +1,136 @@
+# backend/benchmarks/bench_ws_stream.py
+# /ws/stream 동시 스트림 부하 측정: 처리량 / 윈도우 이벤트 지연 / 실시간 대비 지연 누적 여부
+#
+#   python benchmarks/bench_ws_stream.py                          # 64 스트림, 실시간 속도, 30초 분량
+#   python benchmarks/bench_ws_stream.py --streams 256 --rate 0 --seconds 60 --out ws.json   # 최대 속도
+#   python benchmarks/bench_ws_stream.py --source ai_assets/validated_data/ab/<sha256>.f32     # 저장된 업로드 재생
+#
+# app:app 을 uvicorn 하위 프로세스로 띄우고(--lifespan off, Mongo 불필요) websockets 클라이언트로
+# Case2_800.csv(또는 --source 의 캡처 / CSV)를 반복한 신호를 chunk 샘플씩 보냅니다. 지연은 "윈도우 이벤트 수신 시각 - 그 시점까지
+# 마지막으로 보낸 청크의 송신 시각" 으로, 실시간 속도(--rate 1)에서 청크 하나 처리 지연에 해당합니다.
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+import numpy as np
+from websockets.asyncio.client import connect
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.captures import read_signal    # noqa: E402
+
+SOURCE_CSV = BACKEND_DIR / "ai_assets" / "Case2_800.csv"
+FS = 20000
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(port, timeout=60.0):
+    t_end = time.monotonic() + timeout
+    while time.monotonic() < t_end:
+        try:
+            _, w = await asyncio.open_connection("127.0.0.1", port)
+            w.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("서버가 시작되지 않았습니다.")
+
+
+async def one_stream(url, signal, chunk, rate, offset):
+    latencies, windows, last_send = [], 0, 0.0
+    async with connect(url, max_size=None) as ws:
+        ready = json.loads(await ws.recv())
+
+        async def receive():
+            nonlocal windows
+            while True:
+                msg = json.loads(await ws.recv())
+                if msg["type"] == "windows":
+                    windows += len(msg["errors"])
+                    latencies.append(time.perf_counter() - last_send)
+                elif msg["type"] == "end":
+                    return msg
+
+        recv_task = asyncio.create_task(receive())
+        x = np.roll(signal, offset)    # 스트림마다 다른 위상
+        t0 = time.perf_counter()
+        for i, s in enumerate(range(0, len(x), chunk)):
+            if rate > 0:
+                delay = t0 + i * chunk / (FS * rate) - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(x[s:s + chunk].tobytes())
+            last_send = time.perf_counter()
+        await ws.send(json.dumps({"type": "end"}))
+        end = await recv_task
+        wall = time.perf_counter() - t0
+    return {"windows": windows, "latency": latencies, "wall": wall, "end": end, "version": ready["model_version"]}
+
+
+async def run(args, port):
+    signal = np.asarray(read_signal(args.source), dtype=np.float32)
+    signal = np.resize(signal, int(args.seconds * FS))
+    url = f"ws://127.0.0.1:{port}/ws/stream/{args.rpm}"
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    rows = await asyncio.gather(*[one_stream(url, signal, args.chunk, args.rate, int(rng.integers(len(signal))))
+                                  for _ in range(args.streams)])
+    wall = time.perf_counter() - t0
+    lat = np.concatenate([r["latency"] for r in rows]) * 1000.0
+    samples = args.streams * len(signal)
+    return {
+        "streams": args.streams,
+        "wall_sec": wall,
+        "samples_per_sec": samples / wall,
+        "realtime_factor": samples / wall / (FS * args.streams),
+        "windows": int(sum(r["windows"] for r in rows)),
+        "latency_ms": {"p50": float(np.percentile(lat, 50)), "p95": float(np.percentile(lat, 95)),
+                       "p99": float(np.percentile(lat, 99)), "max": float(lat.max())},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="/ws/stream 동시 스트림 부하 측정")
+    ap.add_argument("--streams", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=30.0, help="스트림당 신호 길이 (초, fs=20kHz)")
+    ap.add_argument("--chunk", type=int, default=2000, help="메시지당 샘플 수 (2000 = 100 ms)")
+    ap.add_argument("--rate", type=float, default=1.0, help="실시간 대비 송신 속도 (0 = 최대 속도)")
+    ap.add_argument("--rpm", default="800")
+    ap.add_argument("--source", default=str(SOURCE_CSV), help="재생할 캡처(.f32) 또는 CSV")
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    port = free_port()
+    env = dict(os.environ, INFER_WORKERS="0")
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+                               "--lifespan", "off", "--log-level", "warning"],
+                              cwd=str(BACKEND_DIR), env=env)
+    try:
+        asyncio.run(wait_ready(port))
+        res = asyncio.run(run(args, port))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    lat = res["latency_ms"]
+    print(f"{res['streams']} streams x {args.seconds:.0f}s @ rate {args.rate or 'max'} | chunk {args.chunk} samples")
+    print(f"wall {res['wall_sec']:.1f}s | {res['samples_per_sec'] / 1e6:.2f} M samples/s "
+          f"({res['realtime_factor']:.1f}x realtime per stream) | {res['windows']} windows")
+    print(f"window event latency ms: p50 {lat['p50']:.1f} | p95 {lat['p95']:.1f} | p99 {lat['p99']:.1f} | max {lat['max']:.1f}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), **res}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# backend/benchmarks/check_import_time.py
+# app.py import 시간 예산 확인 (서버 재시작 / 오토스케일링 시 첫 요청 전 지연)
+#
+#   python benchmarks/check_import_time.py                  # 새 인터프리터에서 5회, 최솟값이 예산 이내인지 확인
+#   python benchmarks/check_import_time.py --budget 0.8 --top 15
+#
+# 실패 조건 (종료 코드 1)
+#   - import 시간(최솟값)이 --budget 초 초과
+#   - 학습 / 재학습 / 모니터링 경로에서만 쓰는 무거운 라이브러리(LAZY_MODULES)가 import 시점에 로드됨
+# 모델 로드 / warm-up 은 lifespan 에서 하므로 여기에 포함되지 않습니다. (기동 전체 시간은 /ready 의 startup_sec)
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_BUDGET_SEC = float(os.getenv("IMPORT_BUDGET_SEC", "1.0"))
+LAZY_MODULES = ("pandas", "scipy.stats", "scipy.signal", "sklearn", "threadpoolctl", "matplotlib")
+
+# 새 인터프리터에서 실행: import 시간과 로드된 무거운 모듈 목록을 JSON 으로 출력
+PROBE = f"""
+import sys, time, json
+t0 = time.perf_counter()
+import app
+dt = time.perf_counter() - t0
+print(json.dumps({{"sec": dt, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def top_imports(env, n):
+    """-X importtime 누적 시간 상위 n 개 (app 의 직접 import 기준)"""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line[13:]:
+            continue
+        _, cum, name = line[12:].split("|")
+        if cum.strip().isdigit() and name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cum) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="app.py import 시간 예산 확인")
+    ap.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SEC, help="허용 import 시간 (초)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10, help="직접 import 중 오래 걸린 상위 모듈 수")
+    args = ap.parse_args()
+
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    runs = [measure(env) for _ in range(args.repeat)]
+    best = min(r["sec"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+
+    print(f"import app: best {best:.3f}s / median {sorted(r['sec'] for r in runs)[len(runs) // 2]:.3f}s "
+          f"({args.repeat} runs, budget {args.budget:.2f}s)")
+    for sec, name in top_imports(env, args.top):
+        print(f"  {sec:7.3f}s  {name}")
+
+    failed = False
+    if best > args.budget:
+        print(f"FAIL: import 시간 {best:.3f}s > 예산 {args.budget:.2f}s")
+        failed = True
+    if loaded:
+        print(f"FAIL: import 시점에 로드되면 안 되는 모듈: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
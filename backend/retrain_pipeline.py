@@ -1,59 +1,387 @@
-import os, json, numpy as np
-import pandas as pd
+import os, sys, json, time, shutil, argparse, tempfile, numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from sklearn.neural_network import MLPRegressor
 from datetime import datetime
 from pathlib import Path
 
+# 실행 위치와 관계없이 backend/ 기준 경로 사용
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+from ai_assets.features import extract_features
+from ai_assets.captures import read_signal, is_capture, open_capture
+from ai_assets.feature_store import FeatureStore
+from ai_assets.ae_engine import AEEngine
+from ai_assets.artifact import ARTIFACT_FILE, save_artifact
+from ai_assets.decimation import CASCADE_KEY, uses_cascade
+from ai_assets.shards import RunningStats
+from ai_assets.finetune import (
+    REPLAY_FILE, REPLAY_WINDOWS, load_weights, warm_start_regressor, fine_tune, sample_replay,
+)
+from ai_assets.streaming import (
+    BUFFER_WINDOWS, new_regressor, fit_streaming, evaluate_streaming, sample_parts,
+)
+from ai_assets.registry import (
+    ModelRegistry, MODEL_FILE, THRESHOLD_FILE, ERRORS_FILE, STATS_FILE, VERSIONS_DIR,
+    new_version_id, publish_version,
+)
+
 # 설정 (기존 스크립트의 설정 통합)
-ASSETS_DIR = Path("./ai_assets")
-MODEL_OUT = ASSETS_DIR / "ae_sklearn.npz"
-THR_OUT = ASSETS_DIR / "threshold.json"
-STATS_OUT = ASSETS_DIR / "feature_stats.npz"
+ASSETS_DIR = BACKEND_DIR / "ai_assets"
+MODEL_DIR = ASSETS_DIR / "RPM_model"
+DATA_DIR = ASSETS_DIR / "data_proc_rpm"
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+# streaming 모드에서 추출한 특징을 임시로 쓰는 위치 (기본: 시스템 임시 폴더)
+SPOOL_DIR = os.getenv("RETRAIN_SPOOL_DIR") or None
+# /predict 가 기록한 업로드별 특징 (app.py 와 같은 위치)
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR") or str(ASSETS_DIR / "feature_store")
+
+HIDDEN = (64, 16, 64)
+MAX_ITER = 500
+RANDOM_STATE = 42
+THRESHOLD_PERCENTILE = 95   # ai_assets/02_train_ae_sklearn_rpm.py 와 동일 (p95)
+MIN_WINDOWS = 5
+TRAIN_CASES = [0]           # 기존(data_proc_rpm) 데이터셋에서 정상으로 가정한 case
+
+# 증분 학습 (mode="incremental")
+FT_LEARNING_RATE = 1e-3
+FT_BATCH_SIZE = 64
+FT_MAX_EPOCHS = 100
+FT_PATIENCE = 5
+FT_TOL = 1e-3
+FT_VAL_FRACTION = 0.1
+
+class StageTimer:
+    """단계별 wall time 기록"""
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - t0, 3)
+            print(f"  [{name}] {self.timings[name]:.3f}s")
+
+def fetch_validated(rpm: str, since=None, mongo_uri: str = MONGO_URI) -> list:
+    """model_inputs 에 기록된 해당 RPM 의 검증 통과 파일 [(경로, created_at, sha256)] (저장 순서, since 이후만)"""
+    from pymongo import MongoClient
+    query = {"rpm": rpm}
+    if since is not None:
+        query["created_at"] = {"$gt": since}
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        cursor = client.nutdb.model_inputs.find(
+            query, {"storage_path": 1, "created_at": 1, "sha256": 1, "_id": 0}
+        ).sort("created_at", 1)
+        return [(d["storage_path"], d["created_at"], d.get("sha256")) for d in cursor if d.get("storage_path")]
+    finally:
+        client.close()
+
+def load_parent(model_dir: Path, stats_path: Path):
+    """
+    현재 버전의 (threshold.json 내용, 정규화 mean/std, replay 특징(정규화 전)).
+    기존(flat) 모델은 replay.npy 가 없으므로 data_proc_rpm 데이터셋의 정상 case 를 사용합니다.
+    """
+    meta = {}
+    if (model_dir / THRESHOLD_FILE).exists():
+        with open(model_dir / THRESHOLD_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    info = np.load(str(stats_path), allow_pickle=True)
+    mean, std = info["mean"].astype(np.float32), info["std"].astype(np.float32)
+    if (model_dir / REPLAY_FILE).exists():
+        replay = np.load(model_dir / REPLAY_FILE)
+    elif "X" in info.files:
+        X = info["X"]
+        if "case_id" in info.files:
+            X = X[np.isin(info["case_id"], np.asarray(TRAIN_CASES, dtype=np.int32))]
+        replay = sample_replay(X * std + mean)
+    else:
+        replay = np.empty((0, mean.shape[-1]), dtype=np.float32)
+    return meta, mean, std, replay
+
+def extract_file(path: str, win: int, hop: int, decim: int, cascade: bool = True):
+    """(워커) 저장된 업로드 1개(float32 캡처 또는 변환 전 CSV) -> (B, F) float32 특징. 읽을 수 없으면 None"""
+    try:
+        x = read_signal(path)
+    except (OSError, ValueError) as e:
+        print(f"  skip {path}: {e}")
+        return None
+    feats = extract_features(x, win, hop, decim, cascade=cascade)
+    return feats if len(feats) else None
+
+def extract_file_to(path: str, out_path: str, win: int, hop: int, decim: int, cascade: bool = True):
+    """(워커) extract_file 결과를 out_path(.npy)에 쓰고 (out_path, 윈도우 수, RunningStats dict) 만 반환"""
+    feats = extract_file(path, win, hop, decim, cascade)
+    if feats is None:
+        return None
+    np.save(out_path, feats)
+    return out_path, len(feats), RunningStats.of(feats).to_dict()
+
+def upload_sha256(path):
+    """직접 지정한 학습 파일의 업로드 SHA-256 (캡처 헤더, CSV 는 알 수 없음)"""
+    return open_capture(path).sha256 if is_capture(path) else None
+
+def stored_features(store, rpm, shas, prep):
+    """feature store 에 있는 파일의 특징 {data_list 번호: (B, F) float32}"""
+    found = {}
+    for i, sha in enumerate(shas):
+        feats = store.get(rpm, sha, prep) if sha else None
+        if feats is not None and len(feats) > 0:
+            found[i] = np.array(feats)
+    return found
 
-def run_retrain(data_list):
+def run_extract(fn, args, workers):
+    n = len(args[0])
+    if n == 0:
+        return []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, *args, chunksize=max(1, n // (workers * 4))))
+    return list(map(fn, *args))
+
+def run_retrain(rpm, data_list=None, workers=None, hidden=HIDDEN, max_iter=MAX_ITER, publish=True,
+                mode="full", base_model_dir=MODEL_DIR, base_data_dir=DATA_DIR,
+                streaming=False, buffer_windows=BUFFER_WINDOWS):
     """
-    data_list: DB에서 가져온 csv 파일 경로들의 리스트
+    rpm: 재학습할 RPM
+    data_list: 학습에 사용할 저장 파일(캡처 또는 CSV) 경로들의 리스트 (None 이면 DB 의 검증 통과 파일)
+    mode: "full" - 처음부터 학습 (DB 의 검증 통과 파일 전체)
+          "incremental" - 현재 모델 가중치에서 시작해 마지막 학습 이후 새 파일 + 이전 데이터 replay 샘플로 미세 조정
+    streaming: True 이면 특징을 파일별 .npy 로 디스크에 두고 mmap 으로 buffer_windows 개씩 읽어 학습
+               (전체 특징 배열을 메모리에 만들지 않으며, threshold 는 분위수 추정값)
+    반환: 버전 / 데이터 수 / threshold / 단계별 소요 시간
     """
-    print(f"[{datetime.now()}] 자동 재학습 시작...")
-    
-    X_all = []
-    
-    # 1. 전처리 (기존 01_prepare_data 로직 요약)
-    for file_path in data_list:
-        if not os.path.exists(file_path): continue
-        df = pd.read_csv(file_path, header=None)
-        # ... (여기서 기존의 FFT 및 전처리 로직 수행하여 feature 추출)
-        # 예시로 임의의 feature 생성 (실제로는 기존 extract_features_from_raw_2ch 사용)
-        # X_all.append(features)
-        pass
-
-    # 실제 구현 시에는 전처리된 데이터를 X_train으로 구성
-    # X_train = np.concatenate(X_all, axis=0)
-    
-    # 2. 모델 학습 (기존 02_train_ae_sklearn 로직)
-    HIDDEN = (64, 16, 64)
-    ae = MLPRegressor(hidden_layer_sizes=HIDDEN, activation="relu", max_iter=500)
-    
-    # ae.fit(X_train, X_train) 
-    
-    # 3. 결과 저장 (새로운 모델 및 임계값)
-    # np.savez(MODEL_OUT, coefs=ae.coefs_, intercepts=ae.intercepts_)
-    # threshold 계산 후 json 저장...
-    
-    # 3-1. 버전별 파일명 생성
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    MODEL_VERSION_OUT = f"ai_assets/ae_sklearn_{timestamp}.npz"
-    THR_VERSION_OUT = f"ai_assets/threshold_{timestamp}.json"
-
-    # 3-2. 학습 결과 저장 (버전 기록용)
-    np.savez(MODEL_VERSION_OUT, ...) 
-    # ... json 저장 ...
-
-    # 3-3. 서비스용 "최신 모델" 파일 교체 (덮어쓰기 또는 심볼릭 링크)
-    # app.py는 항상 'ae_sklearn.npz'를 읽으므로, 이 파일을 새 모델로 교체해줍니다.
-    import shutil
-    shutil.copy(MODEL_VERSION_OUT, "ai_assets/ae_sklearn.npz")
-    shutil.copy(THR_VERSION_OUT, "ai_assets/threshold.json")
-
-    print(f"새 모델 버전 생성 완료: {MODEL_VERSION_OUT}")
-    print(f"서비스용 모델이 최신 버전으로 교체되었습니다.")
+    spool = tempfile.mkdtemp(prefix=f"retrain_{rpm}_", dir=SPOOL_DIR) if streaming else None
+    try:
+        return _run_retrain(rpm, data_list, workers, hidden, max_iter, publish, mode,
+                            base_model_dir, base_data_dir, spool, buffer_windows)
+    finally:
+        if spool:
+            shutil.rmtree(spool, ignore_errors=True)
+
+def _run_retrain(rpm, data_list, workers, hidden, max_iter, publish, mode,
+                 base_model_dir, base_data_dir, spool, buffer_windows):
+    rpm = str(rpm)
+    print(f"[{datetime.now()}] RPM {rpm} 자동 재학습 시작 ({mode})...")
+    timer = StageTimer()
+    t_start = time.perf_counter()
+
+    # 현재 서비스 중인 버전과 같은 전처리 파라미터 사용
+    registry = ModelRegistry(base_model_dir, base_data_dir)
+    model_dir, stats_path, base_version = registry.resolve(rpm)
+    info = np.load(str(stats_path), allow_pickle=True)
+    win, hop, decim = int(info["win"]), int(info["hop"]), int(info["decim"])
+    fs = int(info["fs"]) if "fs" in info.files else 0
+    if mode == "incremental" and not any((model_dir / f).exists() for f in (ARTIFACT_FILE, MODEL_FILE)):
+        print("  현재 모델이 없어 전체 학습으로 전환합니다.")
+        mode = "full"
+    parent_meta, parent_replay = {}, None
+    if mode == "incremental":
+        parent_meta, mean, std, parent_replay = load_parent(model_dir, stats_path)
+    elif (model_dir / THRESHOLD_FILE).exists():
+        with open(model_dir / THRESHOLD_FILE, "r", encoding="utf-8") as f:
+            parent_meta = json.load(f)
+    trained_until = parent_meta.get("trained_until") if mode == "incremental" else None
+    # decimation 필터: 전체 학습은 다단(cascade), 증분 학습은 replay 특징과 맞추기 위해 현재 버전 방식 유지
+    cascade = uses_cascade(info) if mode == "incremental" else True
+
+    # 1. 학습 대상 파일 목록 (증분 학습은 마지막 학습 이후 저장된 파일만)
+    with timer.stage("collect"):
+        if data_list is None:
+            since = datetime.fromisoformat(trained_until) if trained_until else None
+            docs = fetch_validated(rpm, since)
+            data_list = [p for p, _, _ in docs]
+            shas = {p: sha for p, _, sha in docs}
+            if docs:
+                trained_until = docs[-1][1].isoformat()
+        else:
+            shas = {p: upload_sha256(p) for p in data_list if os.path.exists(p)}
+        data_list = [p for p in data_list if os.path.exists(p)]
+    if not data_list:
+        raise RuntimeError(f"[RPM {rpm}] 학습할 파일이 없습니다.")
+
+    # 2. 특징 추출: /predict 가 같은 전처리로 기록해 둔 특징은 feature store 에서 읽고,
+    #    나머지만 파일 단위로 여러 코어에 분배 (streaming 은 파일별 .npy 로 spool 에 기록)
+    with timer.stage("extract"):
+        n_list = len(data_list)
+        stored = stored_features(FeatureStore(FEATURE_STORE_DIR), rpm, [shas.get(p) for p in data_list],
+                                 (win, hop, decim, cascade))
+        todo = [i for i in range(n_list) if i not in stored]
+        workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+        files = [data_list[i] for i in todo]
+        params = ([win] * len(todo), [hop] * len(todo), [decim] * len(todo), [cascade] * len(todo))
+        print(f"  feature store: {len(stored)}/{n_list} files, extracting {len(todo)}")
+        if spool:
+            outs = [os.path.join(spool, f"{i:06d}.npy") for i in range(n_list)]
+            results = dict(zip(todo, run_extract(extract_file_to, (files, [outs[i] for i in todo], *params), workers)))
+            for i, f in stored.items():
+                np.save(outs[i], f)
+                results[i] = (outs[i], len(f), RunningStats.of(f).to_dict())
+            parts = [results[i] for i in range(n_list) if results[i] is not None]
+            paths = [p for p, _, _ in parts]
+            n_files, n_new = len(parts), sum(n for _, n, _ in parts)
+        else:
+            results = dict(zip(todo, run_extract(extract_file, (files, *params), workers)))
+            results.update(stored)
+            feats = [results[i] for i in range(n_list) if results[i] is not None]
+            X = np.concatenate(feats, axis=0) if feats else np.empty((0, 0), dtype=np.float32)
+            n_files, n_new = len(feats), len(X)
+        n_stored = len(stored)
+    if n_new < MIN_WINDOWS:
+        raise RuntimeError(f"[RPM {rpm}] 학습 데이터가 너무 적습니다. ({n_new} windows)")
+
+    # 3. 정규화 통계 (full: 01_prepare_data.py 와 같은 방식 std + 1e-8 / incremental: 현재 버전 통계 유지)
+    with timer.stage("normalize"):
+        if mode == "incremental":
+            if spool:
+                if len(parent_replay):
+                    paths.append(os.path.join(spool, REPLAY_FILE))
+                    np.save(paths[-1], parent_replay)
+            else:
+                X = np.concatenate([X, parent_replay], axis=0)
+        else:
+            st = RunningStats()
+            if spool:
+                for _, _, d in parts:
+                    st.merge(RunningStats.from_dict(d))
+            else:
+                st.update(X)
+            mean = st.mean.astype(np.float32)[None, :]
+            std = (st.std + 1e-8).astype(np.float32)[None, :]
+        if not spool:
+            Xn = ((X - mean) / std).astype(np.float32)
+    n_windows = n_new + (len(parent_replay) if mode == "incremental" else 0)
+
+    # 4. 모델 학습
+    fit_info = {}
+    with timer.stage("train"):
+        if mode == "incremental":
+            # 현재 가중치에서 시작, 새 데이터 + replay 를 mini-batch 로 학습
+            coefs, intercepts = load_weights(model_dir)
+            hidden = tuple(w.shape[1] for w in coefs[:-1])
+            ae = warm_start_regressor(coefs, intercepts, FT_LEARNING_RATE, FT_BATCH_SIZE, RANDOM_STATE)
+            if spool:
+                fit_info = fit_streaming(ae, paths, mean, std, FT_MAX_EPOCHS, n_iter_no_change=FT_PATIENCE,
+                                         buffer_windows=buffer_windows, random_state=RANDOM_STATE)
+            else:
+                # 검증 오차가 멈추면 종료하고 가장 좋았던 가중치로 되돌림
+                order = np.random.default_rng(RANDOM_STATE).permutation(len(Xn))
+                n_val = max(1, int(len(Xn) * FT_VAL_FRACTION))
+                fit_info = fine_tune(ae, Xn[order[n_val:]], Xn[order[:n_val]],
+                                     FT_MAX_EPOCHS, FT_PATIENCE, FT_TOL, RANDOM_STATE)
+        elif spool:
+            # mmap shard 에서 섞은 블록 단위 partial_fit (메모리 사용량은 buffer_windows 로 제한)
+            ae = new_regressor(hidden, random_state=RANDOM_STATE)
+            fit_info = fit_streaming(ae, paths, mean, std, max_iter,
+                                     buffer_windows=buffer_windows, random_state=RANDOM_STATE)
+        else:
+            # 기존 02_train_ae_sklearn 로직
+            ae = MLPRegressor(hidden_layer_sizes=hidden, activation="relu", solver="adam",
+                              max_iter=max_iter, random_state=RANDOM_STATE)
+            ae.fit(Xn, Xn)
+            fit_info = {"epochs": int(ae.n_iter_), "final_loss": float(ae.loss_)}
+
+    # 5. Threshold / ae_errors (서빙과 같은 float32 엔진으로 계산)
+    with timer.stage("evaluate"):
+        engine = AEEngine(ae.coefs_, ae.intercepts_)
+        if spool:
+            # 전체 오차 배열 대신 분위수 추정 (ae_errors.npy 에는 일정 간격 샘플만 저장)
+            sketch, err = evaluate_streaming(engine, paths, mean, std)
+            threshold_method = f"p{THRESHOLD_PERCENTILE}(train_recon_error, streaming quantile)"
+            threshold = sketch.percentile(THRESHOLD_PERCENTILE)
+            err_stats = {"train_err_mean": sketch.mean,
+                         "train_err_p95": sketch.percentile(95),
+                         "train_err_p99": sketch.percentile(99)}
+        else:
+            err = engine.reconstruction_error(Xn)
+            threshold_method = f"p{THRESHOLD_PERCENTILE}(train_recon_error)"
+            threshold = float(np.percentile(err, THRESHOLD_PERCENTILE))
+            err_stats = {"train_err_mean": float(err.mean()),
+                         "train_err_p95": float(np.percentile(err, 95)),
+                         "train_err_p99": float(np.percentile(err, 99))}
+
+    # 6. 새 버전 폴더에 저장 후 CURRENT 교체
+    version = new_version_id()
+    model_root = registry.model_root(rpm)
+    staging = model_root / VERSIONS_DIR / f".{version}.tmp"
+    with timer.stage("publish"):
+        staging.mkdir(parents=True, exist_ok=True)
+        np.save(staging / ERRORS_FILE, err)
+        replay = (sample_parts(paths, REPLAY_WINDOWS, RANDOM_STATE) if spool
+                  else sample_replay(X, random_state=RANDOM_STATE))
+        np.save(staging / REPLAY_FILE, replay)
+        np.savez(staging / STATS_FILE, mean=mean, std=std,
+                 fs=np.int32(fs), win=np.int32(win), hop=np.int32(hop), decim=np.int32(decim),
+                 **{CASCADE_KEY: np.int32(cascade)})
+        meta = {
+            "rpm": rpm,
+            "version": version,
+            "parent_version": base_version,
+            "mode": mode,
+            "trained_until": trained_until,
+            "threshold_method": threshold_method,
+            "threshold": threshold,
+            "train_files": n_files,
+            "train_windows": int(n_windows),
+            "new_windows": int(n_new),
+            **err_stats,
+            **fit_info,
+        }
+        with open(staging / THRESHOLD_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        # 서빙은 가중치 + 통계 + threshold 가 든 아티팩트 한 파일만 읽음 (pickle 없는 형식)
+        save_artifact(staging / ARTIFACT_FILE, ae.coefs_, ae.intercepts_, mean, std, win, hop, decim, fs, cascade,
+                      threshold, rpm=rpm, version=version, meta=meta)
+        if publish:
+            target = publish_version(model_root, staging, version)
+        else:
+            target = staging
+
+    parent_threshold = parent_meta.get("threshold")
+    report = {
+        "rpm": rpm,
+        "version": version,
+        "parent_version": base_version,
+        "mode": mode,
+        "streaming": bool(spool),
+        "published": publish,
+        "path": str(target),
+        "files": n_files,
+        "windows": int(n_windows),
+        "new_windows": int(n_new),
+        "feature_store_files": n_stored,
+        "threshold": threshold,
+        "threshold_change": (threshold / parent_threshold - 1.0) if parent_threshold else None,
+        "fit": fit_info,
+        "timings_sec": {**timer.timings, "total": round(time.perf_counter() - t_start, 3)},
+    }
+    with open(Path(target) / "report.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"새 모델 버전 생성 완료: {target}")
+    if publish:
+        print(f"서비스용 모델이 최신 버전({version})으로 교체되었습니다.")
+    return report
+
+def main():
+    ap = argparse.ArgumentParser(description="RPM 별 자동 재학습")
+    ap.add_argument("--rpm", required=True)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-iter", type=int, default=MAX_ITER)
+    ap.add_argument("--mode", choices=["full", "incremental"], default="full")
+    ap.add_argument("--streaming", action="store_true",
+                    help="특징을 디스크(.npy)에 두고 mmap mini-batch 로 학습 (데이터가 메모리보다 클 때)")
+    ap.add_argument("--buffer-windows", type=int, default=BUFFER_WINDOWS, help="streaming 셔플 버퍼 크기")
+    ap.add_argument("--no-publish", action="store_true", help="버전 폴더만 만들고 CURRENT 는 바꾸지 않음")
+    ap.add_argument("files", nargs="*", help="학습 파일 (생략 시 DB 의 검증 통과 파일)")
+    args = ap.parse_args()
+    report = run_retrain(args.rpm, data_list=args.files or None, workers=args.workers,
+                         max_iter=args.max_iter, publish=not args.no_publish, mode=args.mode,
+                         streaming=args.streaming, buffer_windows=args.buffer_windows)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()